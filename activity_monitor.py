@@ -0,0 +1,308 @@
+""" Sampling monitor of active sessions, running statements, wait events and lock waits """
+
+# Import the required modules
+
+import collections
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+from .constants import Constants
+from .renderers import AsciiRenderer, Renderer
+from .sql_utilities import SQLUtilities
+
+
+@dataclass
+class SessionSample:
+    """One active session seen by a sample"""
+    session_id: int
+    user: Optional[str]
+    database: Optional[str]
+    state: Optional[str]
+    query: str
+    wait_event: Optional[str]
+    seconds_running: Optional[float]
+    blocked_by: tuple = ()
+
+
+class ActivityMonitor:
+    """
+    Samples the active sessions of a PostgreSQL or MySQL server at a fixed interval and
+    aggregates the samples into the statements that take the most time and the sessions
+    that block the most others.
+
+    Each sample is a single catalog query (plus one lock wait query on MySQL), and only
+    aggregates are kept, so sampling for hours costs little memory and server time. The
+    time of a statement is estimated from the samples: a statement seen running in `n`
+    samples has used about `n * interval` seconds of session time.
+
+    Use a dedicated connection: `start` samples on a background thread.
+
+    Example:
+        monitor = ActivityMonitor(monitoring_cursor, interval=0.5)
+        monitor.run(duration=60)
+        monitor.display_report()
+    """
+
+    POSTGRES_SAMPLE_QUERY: str = """
+        SELECT pid, usename, datname, state, COALESCE(query, ''),
+               wait_event_type || ':' || wait_event,
+               EXTRACT(EPOCH FROM clock_timestamp() - query_start),
+               CASE WHEN wait_event_type = 'Lock' THEN pg_blocking_pids(pid) END
+        FROM pg_stat_activity
+        WHERE pid <> pg_backend_pid() AND backend_type = 'client backend'
+          AND state IS DISTINCT FROM 'idle';"""
+    MYSQL_SAMPLE_QUERY: str = """
+        SELECT t.PROCESSLIST_ID, t.PROCESSLIST_USER, t.PROCESSLIST_DB,
+               COALESCE(NULLIF(t.PROCESSLIST_STATE, ''), t.PROCESSLIST_COMMAND),
+               COALESCE(t.PROCESSLIST_INFO, ''), w.EVENT_NAME, t.PROCESSLIST_TIME
+        FROM performance_schema.threads t
+        LEFT JOIN performance_schema.events_waits_current w
+               ON w.THREAD_ID = t.THREAD_ID AND w.END_EVENT_ID IS NULL
+        WHERE t.TYPE = 'FOREGROUND' AND t.PROCESSLIST_ID <> CONNECTION_ID()
+          AND (t.PROCESSLIST_COMMAND <> 'Sleep' OR t.PROCESSLIST_ID IN
+               (SELECT blocking_pid FROM sys.innodb_lock_waits));"""
+    MYSQL_LOCK_WAITS_QUERY: str = "SELECT waiting_pid, blocking_pid FROM sys.innodb_lock_waits;"
+    # Literals replaced to group statements that only differ in their values
+    LITERAL_PATTERNS: list = [(re.compile(r"'(?:[^']|'')*'"), "?"),
+                              (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+                              (re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)"), "(...)"),
+                              (re.compile(r"\s+"), " ")]
+
+    def __init__(self, cursor_object: object, interval: float = 1.0):
+        """
+        Args:
+            cursor_object (object): A cursor on a connection used only for monitoring.
+            interval (float): The number of seconds between two samples.
+
+        Raises:
+            ValueError: If the database type is not supported or interval is not positive.
+        """
+        self.__cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        if self.__cursor_type not in (Constants.POSTGRES, Constants.MYSQL):
+            raise ValueError(f"Activity monitoring is not supported for: {self.__cursor_type}")
+        if interval <= 0:
+            raise ValueError("interval must be positive.")
+        self.__cursor = cursor_object
+        self.interval = interval
+        self.__lock = threading.Lock()
+        self.__stop_event = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Discards the aggregated samples"""
+        with self.__lock:
+            self.__sample_count = 0
+            self.__sampling_seconds = 0.0
+            self.__statements: dict = {}
+            self.__blockers: dict = {}
+            self.__wait_events: collections.Counter = collections.Counter()
+
+    @property
+    def sample_count(self) -> int:
+        """The number of samples aggregated"""
+        return self.__sample_count
+
+    def sample(self) -> list[SessionSample]:
+        """
+        Takes one sample of the active sessions and adds it to the aggregates.
+
+        Returns:
+            list[SessionSample]: The active sessions, with the sessions blocking them.
+        """
+        start_time = time.perf_counter()
+        if self.__cursor_type == Constants.POSTGRES:
+            # pg_stat_activity is otherwise read once per transaction
+            self.__cursor.execute("SELECT pg_stat_clear_snapshot();")
+            self.__cursor.execute(ActivityMonitor.POSTGRES_SAMPLE_QUERY)
+            sessions = [SessionSample(*row[:7], blocked_by=tuple(row[7] or ()))
+                        for row in self.__cursor.fetchall()]
+        else:
+            self.__cursor.execute(ActivityMonitor.MYSQL_SAMPLE_QUERY)
+            rows = self.__cursor.fetchall()
+            self.__cursor.execute(ActivityMonitor.MYSQL_LOCK_WAITS_QUERY)
+            blocking = collections.defaultdict(list)
+            for waiting_id, blocking_id in self.__cursor.fetchall():
+                blocking[waiting_id].append(blocking_id)
+            sessions = [SessionSample(*row, blocked_by=tuple(blocking.get(row[0], ())))
+                        for row in rows]
+        self.__aggregate(sessions, time.perf_counter() - start_time)
+        return sessions
+
+    def run(self, duration: float) -> None:
+        """
+        Samples every `interval` seconds for `duration` seconds (Ctrl+C stops early).
+
+        Args:
+            duration (float): The number of seconds to sample for.
+        """
+        deadline = time.perf_counter() + duration
+        try:
+            while not self.__stop_event.is_set():
+                next_sample = time.perf_counter() + self.interval
+                self.sample()
+                if next_sample >= deadline:
+                    break
+                self.__stop_event.wait(max(0.0, next_sample - time.perf_counter()))
+        except KeyboardInterrupt:
+            print("Sampling interrupted")
+        print(f"Took {self.__sample_count} samples, {self.overhead() * 1000:.1f} ms each")
+
+    def start(self) -> None:
+        """Starts sampling on a background thread until `stop` is called"""
+        if self.__thread is not None and self.__thread.is_alive():
+            return
+        self.__stop_event.clear()
+        self.__thread = threading.Thread(target=self.run, args=(float("inf"),),
+                                         name="activity-monitor", daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """Stops background sampling"""
+        self.__stop_event.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def overhead(self) -> float:
+        """The average number of seconds a sample took"""
+        return self.__sampling_seconds / self.__sample_count if self.__sample_count else 0.0
+
+    def display_sessions(self, renderer: Optional[Renderer] = None) -> list[SessionSample]:
+        """Takes a sample and displays the active sessions"""
+        sessions = self.sample()
+        (renderer or AsciiRenderer(row_limit=None)).render(
+            ["session", "user", "database", "state", "wait event", "seconds", "blocked by",
+             "query"],
+            ([session.session_id, session.user, session.database, session.state,
+              session.wait_event, round(session.seconds_running or 0, 3),
+              ", ".join(str(blocker) for blocker in session.blocked_by),
+              ActivityMonitor.__shorten(session.query)] for session in sessions))
+        return sessions
+
+    def top_statements(self, limit: int = 10) -> list[dict]:
+        """
+        The statements with the most estimated session time.
+
+        Returns:
+            list[dict]: Per statement: the normalized text, samples seen, estimated seconds,
+                        longest running time seen, sessions and most frequent wait event.
+        """
+        with self.__lock:
+            statements = sorted(self.__statements.items(),
+                                key=lambda item: item[1]["samples"], reverse=True)[:limit]
+            return [{"statement": statement, "samples": values["samples"],
+                     "estimated_seconds": round(values["samples"] * self.interval, 3),
+                     "max_seconds_running": round(values["max_seconds_running"], 3),
+                     "sessions": len(values["sessions"]),
+                     "top_wait_event": (values["wait_events"].most_common(1)[0][0]
+                                        if values["wait_events"] else None)}
+                    for statement, values in statements]
+
+    def top_blockers(self, limit: int = 10) -> list[dict]:
+        """
+        The sessions at the head of blocking chains, by the session time they made others
+        wait: every session blocked directly or through other blocked sessions adds
+        `interval` seconds per sample.
+
+        Returns:
+            list[dict]: Per blocking session: its id, estimated blocked seconds, the most
+                        sessions it blocked at once, its state and statement.
+        """
+        with self.__lock:
+            blockers = sorted(self.__blockers.items(),
+                              key=lambda item: item[1]["blocked_samples"], reverse=True)[:limit]
+            return [{"session_id": session_id,
+                     "blocked_seconds": round(values["blocked_samples"] * self.interval, 3),
+                     "max_blocked_sessions": values["max_blocked_sessions"],
+                     "samples": values["samples"], "state": values["state"],
+                     "statement": values["statement"]}
+                    for session_id, values in blockers]
+
+    def display_report(self, limit: int = 10, renderer: Optional[Renderer] = None) -> None:
+        """Displays the top statements, top blockers and wait events of the samples"""
+        renderer = renderer or AsciiRenderer(row_limit=None)
+        print(f"{Constants.DASHES} Top statements ({self.__sample_count} samples every "
+              f"{self.interval} sec) {Constants.DASHES}")
+        renderer.render(["statement", "samples", "est. seconds", "max running", "sessions",
+                         "top wait event"],
+                        ([self.__shorten(statement["statement"]), *list(statement.values())[1:]]
+                         for statement in self.top_statements(limit)))
+        print(f"{Constants.DASHES} Top blockers {Constants.DASHES}")
+        renderer.render(["session", "blocked seconds", "max blocked", "samples", "state",
+                         "statement"],
+                        ([*list(blocker.values())[:-1], self.__shorten(blocker["statement"])]
+                         for blocker in self.top_blockers(limit)))
+        print(f"{Constants.DASHES} Wait events {Constants.DASHES}")
+        with self.__lock:
+            wait_events = self.__wait_events.most_common(limit)
+        renderer.render(["wait event", "samples", "est. seconds"],
+                        ([event, count, round(count * self.interval, 3)]
+                         for event, count in wait_events))
+
+    def __aggregate(self, sessions: list[SessionSample], sample_seconds: float) -> None:
+        """Adds one sample to the statement, blocker and wait event aggregates"""
+        by_id = {session.session_id: session for session in sessions}
+        blocked_by = {session.session_id: session.blocked_by
+                      for session in sessions if session.blocked_by}
+
+        # Every blocked session counts against the heads of its blocking chains
+        impact: collections.Counter = collections.Counter()
+        for session_id in blocked_by:
+            seen, pending, heads = {session_id}, list(blocked_by[session_id]), set()
+            while pending:
+                blocker = pending.pop()
+                if blocker in seen:
+                    continue
+                seen.add(blocker)
+                if blocked_by.get(blocker):
+                    pending.extend(blocked_by[blocker])
+                else:
+                    heads.add(blocker)
+            impact.update(heads)
+
+        with self.__lock:
+            self.__sample_count += 1
+            self.__sampling_seconds += sample_seconds
+            for session in sessions:
+                if session.wait_event:
+                    self.__wait_events[session.wait_event] += 1
+                # Sessions idle in a transaction are not running their last statement
+                if not session.query or (session.state or "").startswith("idle in transaction"):
+                    continue
+                statement = self.__normalize(session.query)
+                values = self.__statements.setdefault(statement, {
+                    "samples": 0, "max_seconds_running": 0.0, "sessions": set(),
+                    "wait_events": collections.Counter()})
+                values["samples"] += 1
+                values["max_seconds_running"] = max(values["max_seconds_running"],
+                                                    float(session.seconds_running or 0))
+                values["sessions"].add(session.session_id)
+                if session.wait_event:
+                    values["wait_events"][session.wait_event] += 1
+            for blocker_id, blocked_count in impact.items():
+                blocker = by_id.get(blocker_id)
+                values = self.__blockers.setdefault(blocker_id, {
+                    "blocked_samples": 0, "max_blocked_sessions": 0, "samples": 0,
+                    "state": None, "statement": None})
+                values["blocked_samples"] += blocked_count
+                values["max_blocked_sessions"] = max(values["max_blocked_sessions"],
+                                                     blocked_count)
+                values["samples"] += 1
+                if blocker is not None:
+                    values["state"] = blocker.state
+                    values["statement"] = self.__normalize(blocker.query)
+
+    @staticmethod
+    def __normalize(query: str) -> str:
+        for pattern, replacement in ActivityMonitor.LITERAL_PATTERNS:
+            query = pattern.sub(replacement, query)
+        return query.strip()
+
+    @staticmethod
+    def __shorten(statement: Optional[str], length: int = 80) -> Optional[str]:
+        if statement is None or len(statement) <= length:
+            return statement
+        return statement[:length - 3] + "..."
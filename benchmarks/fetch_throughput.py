@@ -0,0 +1,150 @@
+""" Benchmark of the fetch throughput with the default and the fast type conversions
+
+Fetches the same rows with the driver's default conversions (Decimal and datetime objects),
+with the default conversions followed by the conversion to floats and integer epochs that
+code needing numbers does per row, and with fast types, which return floats and integer
+epochs directly. Prints rows per second for each. SQLite always
+runs, on a temporary table of DECIMAL and TIMESTAMP columns; PostgreSQL and MySQL run
+against an existing table when their driver is installed and connection settings are
+given as space-separated key=value pairs.
+
+Usage:
+    python benchmarks/fetch_throughput.py [--rows 200000] [--runs 5]
+        [--postgres "host=localhost dbname=shop user=postgres password=..."]
+        [--mysql "host=localhost database=shop user=root password=..."]
+        [--query "SELECT * FROM tbl_orders LIMIT 200000"]
+"""
+
+import argparse
+import calendar
+import datetime
+import decimal
+import importlib
+import importlib.util
+import pathlib
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+
+PACKAGE_DIR = pathlib.Path(__file__).resolve().parents[1]
+
+
+def to_numbers(row: tuple) -> tuple:
+    """Converts the Decimal and datetime values of a row to floats and integer epochs"""
+    return tuple(float(value) if isinstance(value, decimal.Decimal)
+                 else calendar.timegm(value.utctimetuple())
+                 if isinstance(value, (datetime.date, datetime.datetime)) else value
+                 for value in row)
+
+
+def fetch_rate(connect, query: str, runs: int, variant: str, fast_types) -> float:
+    """
+    Returns the median rows per second of `runs` fetches of `query` on fresh connections.
+    The variant is "default", "converted" (default types converted per row) or "fast".
+    """
+    rates = []
+    for _ in range(runs):
+        connection = connect()
+        cursor = connection.cursor()
+        if variant == "fast":
+            fast_types.enable(cursor)
+        start_time = time.perf_counter()
+        cursor.execute(query)
+        row_count = 0
+        while rows := cursor.fetchmany(10000):
+            if variant == "converted":
+                rows = [to_numbers(row) for row in rows]
+            row_count += len(rows)
+        rates.append(row_count / (time.perf_counter() - start_time))
+        if variant == "fast":
+            fast_types.disable(cursor)
+        connection.close()
+    return statistics.median(rates)
+
+
+def create_sqlite_database(path: str, row_count: int) -> None:
+    """Creates a table of order-like rows with DECIMAL and TIMESTAMP columns"""
+    generator = random.Random(42)
+    start = datetime.datetime(2020, 1, 1)
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE tbl_orders (order_id INTEGER PRIMARY KEY, "
+                       "total_amount DECIMAL(10, 2), tax DECIMAL(10, 2), "
+                       "order_date TIMESTAMP, shipped_date TIMESTAMP);")
+    connection.executemany(
+        "INSERT INTO tbl_orders VALUES (?, ?, ?, ?, ?);",
+        ((order_id, f"{generator.uniform(5, 500):.2f}", f"{generator.uniform(0, 50):.2f}",
+          (ordered := start + datetime.timedelta(seconds=generator.randrange(10 ** 8)))
+          .isoformat(" "), (ordered + datetime.timedelta(days=3)).isoformat(" "))
+         for order_id in range(1, row_count + 1)))
+    connection.commit()
+    connection.close()
+
+
+VARIANTS: dict = {"default": "default types", "converted": "default + to numbers",
+                  "fast": "fast types"}
+
+
+def run_variants(name: str, connect, query: str, runs: int, fast_types) -> None:
+    """Fetches with every variant and prints the rates relative to the default types"""
+    print(name)
+    rates = {variant: fetch_rate(connect, query, runs, variant, fast_types)
+             for variant in VARIANTS}
+    for variant, label in VARIANTS.items():
+        print(f"  {label:<22} {rates[variant]:12,.0f} rows/sec "
+              f"({rates[variant] / rates['default'] if rates['default'] else 0:.2f}x)")
+
+
+def settings(text: str) -> dict:
+    """Parses space-separated key=value pairs"""
+    return dict(pair.split("=", 1) for pair in text.split())
+
+
+def main() -> None:
+    """Runs the benchmark and prints the median fetch rates"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000, help="rows in the SQLite table")
+    parser.add_argument("--runs", type=int, default=5, help="fetches per variant")
+    parser.add_argument("--postgres", help="psycopg2 connection settings")
+    parser.add_argument("--mysql", help="mysql-connector connection settings")
+    parser.add_argument("--query", default="SELECT * FROM tbl_orders LIMIT 200000",
+                        help="query fetched on PostgreSQL and MySQL")
+    arguments = parser.parse_args()
+
+    sys.path.insert(0, str(PACKAGE_DIR.parent))
+    fast_types = importlib.import_module(f"{PACKAGE_DIR.name}.fast_types").FastTypes
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(pathlib.Path(directory) / "fetch_throughput.db")
+        create_sqlite_database(path, arguments.rows)
+        # The baseline converts like the server drivers do: Decimal and datetime objects
+        sqlite3.register_converter("DECIMAL", lambda value: decimal.Decimal(value.decode()))
+        sqlite3.register_converter("TIMESTAMP", lambda value: datetime.datetime.fromisoformat(
+            value.decode()))
+        connect = lambda: sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)  # noqa: E731
+        run_variants(f"SQLite, {arguments.rows:,} rows, median of {arguments.runs} fetches",
+                     connect, "SELECT * FROM tbl_orders;", arguments.runs, fast_types)
+
+    drivers = {"PostgreSQL": ("psycopg2", arguments.postgres),
+               "MySQL": ("mysql.connector", arguments.mysql)}
+    for name, (driver, connection_settings) in drivers.items():
+        if not connection_settings:
+            continue
+        if not importlib.util.find_spec(driver.split(".")[0]):
+            print(f"{name}: {driver} is not installed, skipped")
+            continue
+        module = importlib.import_module(driver)
+        if name == "PostgreSQL":
+            connect = lambda: module.connect(arguments.postgres)  # noqa: E731
+        else:
+            # Converter classes apply to the pure Python protocol only
+            connect = lambda: module.connect(use_pure=True, **settings(arguments.mysql))  # noqa: E731
+        run_variants(f"{name}, median of {arguments.runs} fetches", connect, arguments.query,
+                     arguments.runs, fast_types)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+""" Benchmark of the cold-start import time of sql_utilities
+
+Every measurement starts a fresh interpreter, as a CLI or cron job would, and imports
+`sql_utilities`. The "eager" variant also imports the database drivers first, which is
+what importing the module cost before the drivers were loaded through dialect plugins.
+
+Usage:
+    python benchmarks/import_time.py [--runs 20]
+"""
+
+import argparse
+import importlib.util
+import pathlib
+import statistics
+import subprocess
+import sys
+
+
+PACKAGE_DIR = pathlib.Path(__file__).resolve().parents[1]
+DRIVERS: list = ["sqlite3", "psycopg2", "mysql.connector"]
+
+
+def time_import(statement: str, runs: int) -> list:
+    """Returns the wall-clock seconds of `runs` fresh interpreters executing `statement`"""
+    timer = ("import time; _start = time.perf_counter(); {}; "
+             "print(time.perf_counter() - _start)")
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", timer.format(statement)],
+                                cwd=PACKAGE_DIR.parent, capture_output=True, text=True,
+                                check=True).stdout
+        timings.append(float(output.strip()))
+    return timings
+
+
+def main() -> None:
+    """Runs the benchmark and prints the median import times"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20, help="fresh interpreters per variant")
+    arguments = parser.parse_args()
+
+    module = f"{PACKAGE_DIR.name}.sql_utilities"
+    installed = [driver for driver in DRIVERS if importlib.util.find_spec(driver.split(".")[0])]
+    missing = sorted(set(DRIVERS) - set(installed))
+
+    variants = {
+        "lazy (drivers imported on first cursor)": f"import {module}",
+        "eager (drivers imported up front)": f"import {', '.join(installed + [module])}",
+    }
+    print(f"Cold-start import of {module}, median of {arguments.runs} fresh interpreters")
+    if missing:
+        print(f"Not installed, left out of the eager variant: {', '.join(missing)} "
+              "(the eager import used to fail outright without psycopg2)")
+
+    medians = {}
+    for name, statement in variants.items():
+        medians[name] = statistics.median(time_import(statement, arguments.runs))
+        print(f"  {name:<42} {medians[name] * 1000:8.2f} ms")
+
+    lazy, eager = medians.values()
+    print(f"  {'saved per process':<42} {(eager - lazy) * 1000:8.2f} ms "
+          f"({eager / lazy if lazy else 0:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+""" Set-based bulk upserts through a temporary staging table """
+
+# Import the required modules
+
+import time
+from typing import Iterable, Optional
+from .constants import Constants
+from .dialects import get_dialect
+from .sql_utilities import SQLUtilities
+from .table_copy import TableCopy
+
+
+class BulkUpsert:
+    """Inserts new rows and updates existing ones with one merge statement per batch"""
+
+    # Null-safe equality of a staged and a target column, per database
+    NULL_SAFE_EQUALS: dict = {Constants.POSTGRES: "{0} IS NOT DISTINCT FROM {1}",
+                              Constants.MYSQL: "{0} <=> {1}",
+                              Constants.SQLITE: "{0} IS {1}"}
+
+    @staticmethod
+    def upsert(table_name: str, column_names: list[str], rows: Iterable[tuple],
+               cursor_object: object, key_columns: Optional[list[str]] = None,
+               batch_size: int = 10000) -> dict:
+        """
+        Upserts rows into a table: rows whose key is new are inserted, rows whose key exists
+        are updated, and rows identical to the stored ones are left alone.
+
+        Each batch is loaded into a temporary staging table with the fastest load path
+        (`TableCopy.bulk_insert`: COPY on PostgreSQL), counted against the table with one
+        join, and applied with a single set-based statement, all in one transaction:
+
+        - PostgreSQL and SQLite: `INSERT ... SELECT ... ON CONFLICT (key) DO UPDATE`, only
+          for rows that differ from the stored ones
+        - MySQL: `INSERT ... SELECT ... ON DUPLICATE KEY UPDATE`
+
+        The key columns need a primary key or unique constraint. When a batch holds the
+        same key more than once, the last row wins.
+
+        Example:
+            BulkUpsert.upsert("tbl_products", ["product_id", "name", "price"],
+                              [(4, "Headphones", 59.99), (11, "Keyboard", 25.00)], cursor)
+
+        Args:
+            table_name (str): The table to upsert into.
+            column_names (list[str]): The columns the row values belong to.
+            rows (Iterable[tuple]): The incoming rows, e.g. a generator.
+            cursor_object (object): A database cursor object used to execute SQL queries.
+            key_columns (list[str], optional): The columns identifying a row. Defaults to
+                                               the primary key of the table.
+            batch_size (int): The number of rows staged and merged at a time.
+
+        Returns:
+            dict: The rows received, inserted, updated and unchanged, the batches, seconds
+                  and rows per second.
+
+        Raises:
+            ValueError: If the table name is empty, batch_size is not positive, the table has
+                        no key, a key column is not among the columns, or the database type
+                        is not supported.
+        """
+        if not table_name.strip():
+            raise ValueError(Constants.INVALID_TABLE_ARGUMENT)
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer.")
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        if cursor_type not in BulkUpsert.NULL_SAFE_EQUALS:
+            raise ValueError(f"Unsupported cursor type: {cursor_type}")
+        if not key_columns:
+            key_columns = [column[0] for column in
+                           SQLUtilities.get_columns(table_name, cursor_object) if column[3]]
+        if not key_columns:
+            raise ValueError(f"Table '{table_name}' has no primary key; pass key_columns.")
+        missing = [column for column in key_columns if column not in column_names]
+        if missing:
+            raise ValueError(f"Key columns {missing} are not among the upserted columns.")
+
+        dialect = get_dialect(cursor_type)
+        connection = SQLUtilities._get_connection(cursor_object)
+        stage_name = f"{table_name}_upsert_stage"
+        statements = BulkUpsert.__build_statements(cursor_type, table_name, stage_name,
+                                                   column_names, key_columns)
+        key_positions = [column_names.index(column) for column in key_columns]
+
+        start_time = time.perf_counter()
+        report = {"rows": 0, "inserted": 0, "updated": 0, "unchanged": 0, "batches": 0}
+        batch: dict = {}
+
+        def merge_batch() -> None:
+            dialect.begin_transaction(connection, cursor_object)
+            try:
+                cursor_object.execute(statements["clear"])
+                TableCopy.bulk_insert(stage_name, column_names, list(batch.values()),
+                                      cursor_object)
+                cursor_object.execute(statements["count"])
+                staged, inserted, unchanged = (value or 0 for value in cursor_object.fetchone())
+                cursor_object.execute(statements["merge"])
+                dialect.commit(connection, cursor_object)
+            except Exception:
+                dialect.rollback(connection, cursor_object)
+                raise
+            report["inserted"] += inserted
+            report["unchanged"] += unchanged
+            report["updated"] += staged - inserted - unchanged
+            report["batches"] += 1
+            batch.clear()
+
+        cursor_object.execute(statements["drop"])
+        cursor_object.execute(statements["create"])
+        try:
+            for row in rows:
+                report["rows"] += 1
+                batch[tuple(row[position] for position in key_positions)] = tuple(row)
+                if len(batch) >= batch_size:
+                    merge_batch()
+            if batch:
+                merge_batch()
+        finally:
+            cursor_object.execute(statements["drop"])
+            connection.commit()
+
+        elapsed = time.perf_counter() - start_time
+        report["seconds"] = round(elapsed, 3)
+        report["rows_per_second"] = round(report["rows"] / elapsed) if elapsed else report["rows"]
+        print(f"Upserted {report['rows']} rows into '{table_name}': {report['inserted']} "
+              f"inserted, {report['updated']} updated, {report['unchanged']} unchanged "
+              f"in time: ({report['seconds']} sec)")
+        return report
+
+    @staticmethod
+    def __build_statements(cursor_type: str, table_name: str, stage_name: str,
+                           column_names: list[str], key_columns: list[str]) -> dict:
+        """The staging, counting and merge statements of an upsert"""
+        columns = ", ".join(column_names)
+        value_columns = [column for column in column_names if column not in key_columns]
+        equals = BulkUpsert.NULL_SAFE_EQUALS[cursor_type]
+        join = " AND ".join(f"t.{column} = s.{column}" for column in key_columns)
+        unchanged = " AND ".join([f"t.{key_columns[0]} IS NOT NULL"] + [
+            equals.format(f"t.{column}", f"s.{column}") for column in value_columns])
+        temporary = "TEMPORARY" if cursor_type == Constants.MYSQL else "TEMP"
+
+        statements = {
+            "drop": f"DROP {'TEMPORARY ' if cursor_type == Constants.MYSQL else ''}"
+                    f"TABLE IF EXISTS {stage_name};",
+            # The staging columns take the types of the target columns
+            "create": f"CREATE {temporary} TABLE {stage_name} AS "
+                      f"SELECT {columns} FROM {table_name} LIMIT 0;",
+            # MySQL's TRUNCATE commits implicitly, which would end the upsert's transaction
+            "clear": f"TRUNCATE TABLE {stage_name};" if cursor_type == Constants.POSTGRES
+                     else f"DELETE FROM {stage_name};",
+            "count": f"SELECT COUNT(*), "
+                     f"SUM(CASE WHEN t.{key_columns[0]} IS NULL THEN 1 ELSE 0 END), "
+                     f"SUM(CASE WHEN {unchanged} THEN 1 ELSE 0 END) "
+                     f"FROM {stage_name} s LEFT JOIN {table_name} t ON {join};",
+        }
+
+        if cursor_type == Constants.MYSQL:
+            # MySQL does not write rows whose values are unchanged
+            assignments = ", ".join(f"{column} = staged.{column}"
+                                    for column in value_columns or key_columns[:1])
+            statements["merge"] = (f"INSERT INTO {table_name} ({columns}) "
+                                   f"SELECT * FROM (SELECT {columns} FROM {stage_name}) AS staged "
+                                   f"ON DUPLICATE KEY UPDATE {assignments};")
+            return statements
+
+        conflict = f"ON CONFLICT ({', '.join(key_columns)}) DO NOTHING"
+        if value_columns:
+            assignments = ", ".join(f"{column} = excluded.{column}" for column in value_columns)
+            changed = " OR ".join(
+                f"NOT ({equals.format(f'{table_name}.{column}', f'excluded.{column}')})"
+                for column in value_columns)
+            conflict = (f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {assignments} "
+                        f"WHERE {changed}")
+        # "WHERE true" keeps SQLite from reading ON CONFLICT as a join constraint
+        statements["merge"] = (f"INSERT INTO {table_name} ({columns}) "
+                               f"SELECT {columns} FROM {stage_name} WHERE true {conflict};")
+        return statements
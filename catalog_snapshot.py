@@ -0,0 +1,410 @@
+""" Persisted catalog snapshot serving the introspection methods without catalog queries """
+
+# Import the required modules
+
+import json
+import os
+import time
+from typing import Optional
+from .constants import Constants
+from .dialects import get_dialect
+from .renderers import AsciiRenderer, Renderer
+from .sql_utilities import SQLUtilities
+
+
+class CatalogSnapshot:
+    """
+    A local copy of the catalog metadata shown by `show_databases`,
+    `display_all_tables_in_database`, `display_all_views_from_database`,
+    `display_all_procedures_from_database` and `show_columns`.
+
+    The metadata is collected with a handful of bulk catalog queries and saved as compact
+    JSON, so tools can start from the file without any catalog round trips. Each schema
+    (a MySQL database, a Postgres schema, or the SQLite "main" database) carries a change
+    marker; `refresh` compares the markers and only collects the schemas that changed.
+
+    Change markers:
+    - MySQL: object counts, the latest create_time/last_altered and a CRC32 sum over the
+      column definitions of the schema
+    - PostgreSQL: an md5 of the oid and xmin of the schema's pg_class, pg_attribute,
+      pg_index and pg_proc rows (any DDL rewrites those rows)
+    - SQLite: `PRAGMA schema_version`
+
+    Example:
+        snapshot = CatalogSnapshot("catalog.json")
+        snapshot.refresh(cursor_object)        # only collects schemas whose markers changed
+        snapshot.display_all_tables_in_database()
+        snapshot.show_columns("tbl_orders")
+    """
+
+    FORMAT_VERSION: int = 1
+
+    # Column headers of the displayed tables, matching the SQLUtilities methods
+    DATABASE_HEADERS: dict = {"mysql": ["Database"], "postgres": ["datname"],
+                              "sqlite": ["seq", "name", "file"]}
+    COLUMN_HEADERS: dict = {
+        "mysql": ["Field", "Type", "Null", "Key", "Default", "Extra"],
+        "postgres": ["column_name", "data_type", "is_nullable", "is_identity",
+                     "column_default", "primary_key"],
+        "sqlite": ["cid", "name", "type", "notnull", "dflt_value", "pk"],
+    }
+
+    MYSQL_MARKER_QUERY: str = """
+        SELECT s.schema_name, CONCAT_WS(':',
+            (SELECT CONCAT_WS(',', COUNT(*), MAX(t.create_time),
+                              SUM(CRC32(CONCAT_WS(',', t.table_name, t.table_type))))
+             FROM information_schema.tables t WHERE t.table_schema = s.schema_name),
+            (SELECT CONCAT_WS(',', COUNT(*),
+                              SUM(CRC32(CONCAT_WS(',', c.table_name, c.column_name, c.column_type,
+                                                  c.is_nullable, c.column_key, c.column_default,
+                                                  c.extra))))
+             FROM information_schema.columns c WHERE c.table_schema = s.schema_name),
+            (SELECT CONCAT_WS(',', COUNT(*), MAX(r.last_altered))
+             FROM information_schema.routines r WHERE r.routine_schema = s.schema_name))
+        FROM information_schema.schemata s WHERE s.schema_name IN ({});"""
+
+    POSTGRES_MARKER_QUERY: str = """
+        SELECT n.nspname, md5(concat_ws('|',
+            (SELECT string_agg(c.oid::text || ':' || c.xmin::text, ',' ORDER BY c.oid)
+             FROM pg_class c WHERE c.relnamespace = n.oid AND c.relkind IN ('r', 'p', 'v', 'm')),
+            (SELECT string_agg(a.attrelid::text || '.' || a.attnum || ':' || a.xmin::text, ','
+                               ORDER BY a.attrelid, a.attnum)
+             FROM pg_attribute a JOIN pg_class c ON c.oid = a.attrelid
+             WHERE c.relnamespace = n.oid AND c.relkind IN ('r', 'p', 'v', 'm') AND a.attnum > 0),
+            (SELECT string_agg(p.oid::text || ':' || p.xmin::text, ',' ORDER BY p.oid)
+             FROM pg_proc p WHERE p.pronamespace = n.oid),
+            (SELECT string_agg(i.indexrelid::text || ':' || i.xmin::text, ',' ORDER BY i.indexrelid)
+             FROM pg_index i JOIN pg_class c ON c.oid = i.indrelid WHERE c.relnamespace = n.oid)))
+        FROM pg_namespace n
+        WHERE n.nspname NOT IN ('pg_catalog', 'information_schema', 'pg_toast')
+        AND n.nspname NOT LIKE {0} AND n.nspname NOT LIKE {0}"""
+    # Bound, not inlined: a literal % would be read as a psycopg2 format directive
+    POSTGRES_TEMP_SCHEMA_PATTERNS: tuple = ("pg\\_temp\\_%", "pg\\_toast\\_temp\\_%")
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): The snapshot file. It is loaded when it exists.
+        """
+        self.path = path
+        self.__catalog: dict = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as snapshot_file:
+                catalog = json.load(snapshot_file)
+            if catalog.get("format") == CatalogSnapshot.FORMAT_VERSION:
+                self.__catalog = catalog
+
+    @property
+    def backend(self) -> Optional[str]:
+        """The backend the snapshot was taken from, None for an empty snapshot"""
+        return self.__catalog.get("backend")
+
+    @property
+    def schemas(self) -> list[str]:
+        """The names of the schemas in the snapshot"""
+        return list(self.__catalog.get("schemas", {}))
+
+    def refresh(self, cursor_object: object, schemas: Optional[list[str]] = None,
+                force: bool = False) -> dict:
+        """
+        Brings the snapshot up to date and saves it.
+
+        One query reads the change markers of the schemas; only the schemas whose marker
+        differs from the saved one (or all of them with `force`) are collected again, with
+        one bulk query per kind of object. Schemas that no longer exist are dropped.
+
+        Args:
+            cursor_object (object): A database cursor object used to execute SQL queries.
+            schemas (list[str], optional): The schemas to cover. Defaults to the current
+                                           database on MySQL, every user schema on Postgres
+                                           and "main" on SQLite.
+            force (bool): Collect every schema regardless of its change marker.
+
+        Returns:
+            dict: The "changed" and "unchanged" schema names and the "seconds" taken.
+
+        Raises:
+            ValueError: If the database type is not supported.
+        """
+        start_time = time.perf_counter()
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        backend = get_dialect(cursor_type).NAME
+        if backend not in CatalogSnapshot.COLUMN_HEADERS:
+            raise ValueError(f"Unsupported database type: {cursor_type}")
+
+        database = CatalogSnapshot.__current_database(backend, cursor_object)
+        if self.backend != backend or self.__catalog.get("database") != database:
+            self.__catalog = {}
+        saved_schemas = self.__catalog.get("schemas", {})
+
+        markers = CatalogSnapshot.__read_markers(backend, cursor_object, schemas or (
+            [database] if backend == "mysql" else None))
+        changed = [schema for schema, marker in markers.items()
+                   if force or saved_schemas.get(schema, {}).get("marker") != marker]
+
+        collected = CatalogSnapshot.__collect(backend, cursor_object, changed)
+        for schema in changed:
+            collected[schema]["marker"] = markers[schema]
+        cursor_object.execute(CatalogSnapshot.__database_list_query(backend))
+        databases = [CatalogSnapshot.__json_row(row) for row in cursor_object.fetchall()]
+
+        self.__catalog = {
+            "format": CatalogSnapshot.FORMAT_VERSION, "backend": backend, "database": database,
+            "refreshed": time.time(), "databases": databases,
+            "schemas": {schema: collected.get(schema) or saved_schemas[schema]
+                        for schema in markers},
+        }
+        self.save()
+
+        report = {"changed": changed,
+                  "unchanged": [schema for schema in markers if schema not in changed],
+                  "seconds": round(time.perf_counter() - start_time, 3)}
+        print(f"Catalog snapshot refreshed: {len(changed)} of {len(markers)} schema(s) "
+              f"collected in time: ({report['seconds']} sec)")
+        return report
+
+    def save(self) -> None:
+        """Writes the snapshot to its file, replacing the previous one atomically"""
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as snapshot_file:
+            json.dump(self.__catalog, snapshot_file, separators=(",", ":"), default=str)
+        os.replace(temporary_path, self.path)
+
+    def show_databases(self, renderer: Optional[Renderer] = None) -> None:
+        """Displays the databases, like `SQLUtilities.show_databases`"""
+        catalog = self.__require_catalog()
+        (renderer or AsciiRenderer()).render(
+            CatalogSnapshot.DATABASE_HEADERS[catalog["backend"]], catalog["databases"])
+
+    def display_all_tables_in_database(self, database_name: Optional[str] = None,
+                                       renderer: Optional[Renderer] = None) -> None:
+        """Displays the tables, like `SQLUtilities.display_all_tables_in_database`"""
+        self.__display_tables(("BASE TABLE", "table"), database_name, renderer)
+
+    def display_all_views_from_database(self, database_name: Optional[str] = None,
+                                        renderer: Optional[Renderer] = None) -> None:
+        """Displays the views, like `SQLUtilities.display_all_views_from_database`"""
+        self.__display_tables(("VIEW", "view"), database_name, renderer)
+
+    def display_all_procedures_from_database(self, database_name: Optional[str] = None,
+                                             renderer: Optional[Renderer] = None) -> None:
+        """Displays the procedures, like `SQLUtilities.display_all_procedures_from_database`"""
+        backend = self.__require_catalog()["backend"]
+        if backend == "sqlite":
+            headers = ["name"]
+        else:
+            headers = ["routine_name", "DATABASE NAME", "routine_catalog"]
+        rows = [[name, schema, catalog] if backend != "sqlite" else [name]
+                for schema, entry in self.__selected_schemas(database_name)
+                for name, catalog in entry["procedures"]]
+        (renderer or AsciiRenderer()).render(headers, rows)
+
+    def show_columns(self, table_name: str, renderer: Optional[Renderer] = None) -> None:
+        """
+        Displays the columns of a table, like `SQLUtilities.show_columns`.
+
+        Args:
+            table_name (str): The table name, optionally qualified as "schema.table".
+            renderer (Renderer, optional): The renderer used to display the columns.
+
+        Raises:
+            ValueError: If the table is not in the snapshot.
+        """
+        backend = self.__require_catalog()["backend"]
+        width = len(CatalogSnapshot.COLUMN_HEADERS[backend])
+        (renderer or AsciiRenderer()).render(
+            CatalogSnapshot.COLUMN_HEADERS[backend],
+            [row[:width] for row in self.__find_columns(table_name)])
+
+    def get_columns(self, table_name: str) -> list[tuple]:
+        """
+        Returns the column metadata of a table in the layout of `SQLUtilities.get_columns`.
+
+        Args:
+            table_name (str): The table name, optionally qualified as "schema.table".
+
+        Returns:
+            list[tuple]: One `(column_name, declared_type, is_nullable, is_primary_key)` tuple
+            per column.
+
+        Raises:
+            ValueError: If the table is not in the snapshot.
+        """
+        rows = self.__find_columns(table_name)
+        match self.backend:
+            case "mysql":
+                return [(row[0], row[1], row[2] == "YES", row[3] == "PRI") for row in rows]
+            case "postgres":
+                return [(row[0], row[6], row[2] == "YES", row[5] == "YES") for row in rows]
+            case _:
+                return [(row[1], row[2], not row[3], row[5] > 0) for row in rows]
+
+    def __require_catalog(self) -> dict:
+        if not self.__catalog:
+            raise ValueError("The catalog snapshot is empty; call refresh() first.")
+        return self.__catalog
+
+    def __selected_schemas(self, database_name: Optional[str]) -> list[tuple]:
+        """The (schema, entry) pairs a display covers, mirroring the SQLUtilities methods"""
+        catalog = self.__require_catalog()
+        if catalog["backend"] != "mysql":
+            if database_name and database_name != catalog["database"]:
+                raise ValueError(f"The snapshot was taken from database '{catalog['database']}'.")
+            return list(catalog["schemas"].items())
+        database_name = database_name or catalog["database"]
+        if database_name not in catalog["schemas"]:
+            raise ValueError(f"Database '{database_name}' is not in the catalog snapshot.")
+        return [(database_name, catalog["schemas"][database_name])]
+
+    def __display_tables(self, table_types: tuple, database_name: Optional[str],
+                         renderer: Optional[Renderer]) -> None:
+        backend = self.__require_catalog()["backend"]
+        selected = self.__selected_schemas(database_name)
+        if backend == "sqlite":
+            headers = ["name"]
+        elif backend == "postgres" and table_types[0] == "BASE TABLE":
+            headers = ["table_name", "table_schema"]
+        else:
+            headers = ["table_name", "DATABASE NAME", "table_catalog"]
+        rows = [[name, schema, catalog][:len(headers)]
+                for schema, entry in selected
+                for name, table_type, catalog in entry["tables"] if table_type in table_types]
+        (renderer or AsciiRenderer()).render(headers, rows)
+
+    def __find_columns(self, table_name: str) -> list[list]:
+        if not table_name.strip():
+            raise ValueError(Constants.INVALID_TABLE_ARGUMENT)
+        catalog = self.__require_catalog()
+        schema_name, _, name = table_name.rpartition(".")
+        if schema_name:
+            candidates = [catalog["schemas"].get(schema_name, {})]
+        elif catalog["backend"] == "mysql":
+            candidates = [catalog["schemas"].get(catalog["database"], {})]
+        else:
+            candidates = list(catalog["schemas"].values())
+        for entry in candidates:
+            if name in entry.get("columns", {}):
+                return entry["columns"][name]
+        raise ValueError(f"Table '{table_name}' is not in the catalog snapshot.")
+
+    @staticmethod
+    def __current_database(backend: str, cursor_object: object) -> str:
+        match backend:
+            case "mysql":
+                cursor_object.execute("SELECT DATABASE();")
+            case "postgres":
+                cursor_object.execute("SELECT current_database();")
+            case _:
+                cursor_object.execute("SELECT file FROM pragma_database_list WHERE name = 'main';")
+        return cursor_object.fetchone()[0]
+
+    @staticmethod
+    def __database_list_query(backend: str) -> str:
+        return {"mysql": "SHOW DATABASES;", "postgres": "SELECT datname FROM pg_database;",
+                "sqlite": "PRAGMA database_list;"}[backend]
+
+    @staticmethod
+    def __read_markers(backend: str, cursor_object: object,
+                       schemas: Optional[list[str]]) -> dict:
+        """Returns the change marker of every covered schema"""
+        placeholder = get_dialect(SQLUtilities._get_cursor_type_name(cursor_object)).PLACEHOLDER
+        match backend:
+            case "mysql":
+                cursor_object.execute(CatalogSnapshot.MYSQL_MARKER_QUERY.format(
+                    ", ".join([placeholder] * len(schemas))), tuple(schemas))
+            case "postgres":
+                query = CatalogSnapshot.POSTGRES_MARKER_QUERY.format(placeholder)
+                if schemas:
+                    query += " AND n.nspname IN (" + ", ".join([placeholder] * len(schemas)) + ")"
+                cursor_object.execute(query + ";", CatalogSnapshot.POSTGRES_TEMP_SCHEMA_PATTERNS
+                                      + tuple(schemas or ()))
+            case _:
+                cursor_object.execute("PRAGMA schema_version;")
+                return {"main": str(cursor_object.fetchone()[0])}
+        return {schema: marker for schema, marker in cursor_object.fetchall()}
+
+    @staticmethod
+    def __collect(backend: str, cursor_object: object, schemas: list[str]) -> dict:
+        """Reads the tables, views, procedures and columns of the given schemas"""
+        collected = {schema: {"tables": [], "procedures": [], "columns": {}}
+                     for schema in schemas}
+        if not schemas:
+            return collected
+
+        if backend == "sqlite":
+            cursor_object.execute("""SELECT name, type FROM sqlite_schema
+                                     WHERE type IN ('table', 'view')
+                                     AND name NOT LIKE 'sqlite_%' ORDER BY name;""")
+            collected["main"]["tables"] = [[name, table_type, None]
+                                           for name, table_type in cursor_object.fetchall()]
+            cursor_object.execute("""SELECT m.name, p.cid, p.name, p.type, p."notnull",
+                                            p.dflt_value, p.pk
+                                     FROM sqlite_schema m JOIN pragma_table_info(m.name) p
+                                     WHERE m.type IN ('table', 'view')
+                                     AND m.name NOT LIKE 'sqlite_%'
+                                     ORDER BY m.name, p.cid;""")
+            for table_name, *column in cursor_object.fetchall():
+                collected["main"]["columns"].setdefault(table_name, []).append(column)
+            return collected
+
+        placeholders = ", ".join(
+            [get_dialect(SQLUtilities._get_cursor_type_name(cursor_object)).PLACEHOLDER]
+            * len(schemas))
+        parameters = tuple(schemas)
+
+        cursor_object.execute(f"""SELECT table_schema, table_name, table_type, table_catalog
+                                  FROM information_schema.tables
+                                  WHERE table_schema IN ({placeholders})
+                                  ORDER BY table_schema, table_name;""", parameters)
+        for schema, *table in cursor_object.fetchall():
+            collected[schema]["tables"].append(CatalogSnapshot.__json_row(table))
+
+        cursor_object.execute(f"""SELECT routine_schema, routine_name, routine_catalog
+                                  FROM information_schema.routines
+                                  WHERE routine_type = 'PROCEDURE'
+                                  AND routine_schema IN ({placeholders})
+                                  ORDER BY routine_schema, routine_name;""", parameters)
+        for schema, *routine in cursor_object.fetchall():
+            collected[schema]["procedures"].append(CatalogSnapshot.__json_row(routine))
+
+        if backend == "mysql":
+            cursor_object.execute(f"""SELECT table_schema, table_name, column_name, column_type,
+                                             is_nullable, column_key, column_default, extra
+                                      FROM information_schema.columns
+                                      WHERE table_schema IN ({placeholders})
+                                      ORDER BY table_schema, table_name, ordinal_position;""",
+                                  parameters)
+        else:
+            # The last value is the declared type returned by SQLUtilities.get_columns
+            cursor_object.execute(f"""
+                SELECT c.table_schema, c.table_name, c.column_name, c.data_type, c.is_nullable,
+                    c.is_identity, c.column_default,
+                    CASE WHEN pk.column_name IS NOT NULL THEN 'YES' ELSE 'NO' END,
+                    CASE WHEN c.character_maximum_length IS NOT NULL
+                        THEN c.data_type || '(' || c.character_maximum_length || ')'
+                        WHEN c.data_type = 'numeric' AND c.numeric_precision IS NOT NULL
+                        THEN 'numeric(' || c.numeric_precision || ',' || c.numeric_scale || ')'
+                        ELSE c.data_type END
+                FROM information_schema.columns c
+                LEFT JOIN (
+                    SELECT kcu.table_schema, kcu.table_name, kcu.column_name
+                    FROM information_schema.table_constraints tc
+                    JOIN information_schema.key_column_usage kcu
+                    ON tc.constraint_name = kcu.constraint_name
+                    AND tc.table_schema = kcu.table_schema
+                    WHERE tc.constraint_type = 'PRIMARY KEY'
+                ) pk
+                ON c.table_schema = pk.table_schema AND c.table_name = pk.table_name
+                AND c.column_name = pk.column_name
+                WHERE c.table_schema IN ({placeholders})
+                ORDER BY c.table_schema, c.table_name, c.ordinal_position;""", parameters)
+        for schema, table_name, *column in cursor_object.fetchall():
+            collected[schema]["columns"].setdefault(table_name, []).append(
+                CatalogSnapshot.__json_row(column))
+        return collected
+
+    @staticmethod
+    def __json_row(row) -> list:
+        """Converts a catalog row to JSON friendly values (MySQL may return bytes)"""
+        return [value.decode() if isinstance(value, (bytes, bytearray)) else value
+                for value in row]
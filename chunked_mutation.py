@@ -0,0 +1,259 @@
+""" Throttled UPDATE / DELETE in primary key chunks, with resumable checkpoints """
+
+# Import the required modules
+
+import json
+import os
+import re
+import time
+from typing import Optional
+from .constants import Constants
+from .dialects import get_dialect
+from .sql_utilities import SQLUtilities
+
+
+class ChunkedMutation:
+    """
+    Runs a large UPDATE or DELETE as many small transactions over primary key ranges.
+
+    Each chunk covers the next `chunk_size` keys that match the filter and is committed on
+    its own, so locks are held briefly and the transaction log is recycled as the work
+    progresses. The chunk size follows a target latency per chunk, and the work pauses while
+    replication lag or lock waits are above their thresholds.
+    """
+
+    # Bounds of the chunk size adjustment after each chunk, to smooth out outliers
+    MAX_GROWTH: float = 2.0
+    MAX_SHRINK: float = 0.5
+    PROGRESS_EVERY: int = 10
+
+    POSTGRES_LAG_QUERY: str = ("SELECT COALESCE(MAX(EXTRACT(EPOCH FROM replay_lag)), 0) "
+                               "FROM pg_stat_replication;")
+    POSTGRES_REPLICA_LAG_QUERY: str = ("SELECT COALESCE(EXTRACT(EPOCH FROM now() - "
+                                       "pg_last_xact_replay_timestamp()), 0);")
+    LOCK_WAITS_QUERIES: dict = {
+        Constants.POSTGRES: "SELECT COUNT(*) FROM pg_stat_activity WHERE wait_event_type = 'Lock';",
+        Constants.MYSQL: "SELECT COUNT(*) FROM performance_schema.data_lock_waits;",
+    }
+
+    @staticmethod
+    def execute(statement: str, table_name: str, cursor_object: object,
+                where: Optional[str] = None, parameters: tuple = (),
+                where_parameters: tuple = (), key_column: Optional[str] = None,
+                target_seconds: float = 0.5, chunk_size: int = 1000,
+                min_chunk_size: int = 100, max_chunk_size: int = 100000,
+                max_replication_lag: Optional[float] = None,
+                max_lock_waits: Optional[int] = None, pause_seconds: float = 5.0,
+                replica_cursors: Optional[list] = None,
+                checkpoint_path: Optional[str] = None) -> dict:
+        """
+        Runs an UPDATE or DELETE chunk by chunk.
+
+        Example:
+            ChunkedMutation.execute("DELETE FROM tbl_orders", "tbl_orders", cursor,
+                                    where="order_timestamp < %s",
+                                    where_parameters=("2021-01-01",),
+                                    max_replication_lag=5, checkpoint_path="purge.json")
+
+        The filter goes in `where`, not in the statement; the key range of each chunk is
+        added to it. The statement must not change the key column.
+
+        Replication lag is read from `pg_stat_replication` on a PostgreSQL primary, or from
+        `replica_cursors` (`SHOW REPLICA STATUS` on MySQL replicas, the replay delay on
+        PostgreSQL standbys). Lock waits are the sessions waiting for a lock.
+
+        With a `checkpoint_path` the last committed key is saved after every chunk and a
+        later call with the same statement resumes after it. A completed run is recorded in
+        the checkpoint and not repeated; delete the file to run the statement again.
+
+        Args:
+            statement (str): The UPDATE or DELETE statement, without a WHERE clause.
+            table_name (str): The table the statement changes.
+            cursor_object (object): A database cursor object used to execute SQL queries.
+            where (str, optional): The filter of the rows to change.
+            parameters (tuple): Values bound to the placeholders of the statement.
+            where_parameters (tuple): Values bound to the placeholders of `where`.
+            key_column (str, optional): The key the chunks are cut on. Defaults to the
+                                        single column primary key.
+            target_seconds (float): The time each chunk should take.
+            chunk_size (int): The number of rows of the first chunk.
+            min_chunk_size (int): The smallest chunk size.
+            max_chunk_size (int): The largest chunk size.
+            max_replication_lag (float, optional): Pause while replicas lag more seconds.
+            max_lock_waits (int, optional): Pause while more sessions wait for locks.
+            pause_seconds (float): How long to wait before checking the thresholds again.
+            replica_cursors (list, optional): Cursors on the replicas to read the lag from.
+            checkpoint_path (str, optional): The JSON file progress is saved to.
+
+        Returns:
+            dict: The rows changed, chunks, pauses, final chunk size, seconds, last key and
+                  whether the run resumed from a checkpoint.
+
+        Raises:
+            ValueError: If the statement is not an UPDATE or DELETE, has a WHERE clause, the
+                        table has no single column key, a size is not positive, or the
+                        checkpoint belongs to another statement.
+        """
+        if not re.match(r"^\s*(UPDATE|DELETE)\b", statement, re.IGNORECASE):
+            raise ValueError("Only UPDATE and DELETE statements can be run in chunks.")
+        if re.search(r"\bWHERE\b", statement, re.IGNORECASE):
+            raise ValueError("Pass the filter as `where`; the statement must not have a "
+                             "WHERE clause.")
+        if min(chunk_size, min_chunk_size, max_chunk_size) < 1 or target_seconds <= 0:
+            raise ValueError("Chunk sizes and target_seconds must be positive.")
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        dialect = get_dialect(cursor_type)
+        placeholder = dialect.PLACEHOLDER
+        connection = SQLUtilities._get_connection(cursor_object)
+        if key_column is None:
+            primary_key = [column[0] for column in
+                           SQLUtilities.get_columns(table_name, cursor_object) if column[3]]
+            if len(primary_key) != 1:
+                raise ValueError(f"Table '{table_name}' has no single column primary key; "
+                                 f"pass key_column.")
+            key_column = primary_key[0]
+
+        identity = {"statement": statement, "table": table_name, "where": where,
+                    "parameters": [str(value) for value in parameters + where_parameters]}
+        checkpoint = ChunkedMutation.__read_checkpoint(checkpoint_path, identity)
+        if checkpoint.get("completed"):
+            print(f"Already completed according to '{checkpoint_path}'")
+            return {"rows": checkpoint["rows"], "chunks": checkpoint["chunks"], "pauses": 0,
+                    "chunk_size": chunk_size, "seconds": 0.0, "last_key": checkpoint["last_key"],
+                    "resumed": True}
+        last_key = checkpoint.get("last_key")
+        total_rows, chunks = checkpoint.get("rows", 0), checkpoint.get("chunks", 0)
+        resumed = bool(checkpoint)
+        if resumed:
+            print(f"Resuming after {key_column} = {last_key} ({total_rows} rows done)")
+
+        filter_clause = f" AND ({where})" if where else ""
+        chunk_size = max(min_chunk_size, min(chunk_size, max_chunk_size))
+        pauses = 0
+        start_time = time.perf_counter()
+        while True:
+            pauses += ChunkedMutation.__wait_for_capacity(
+                cursor_object, cursor_type, max_replication_lag, max_lock_waits,
+                pause_seconds, replica_cursors)
+
+            # The upper key of the chunk: the chunk_size-th matching key after the last one
+            lower = f"{key_column} > {placeholder}" if last_key is not None else "1 = 1"
+            lower_parameters = (last_key,) if last_key is not None else ()
+            cursor_object.execute(
+                f"SELECT {key_column} FROM {table_name} WHERE {lower}{filter_clause} "
+                f"ORDER BY {key_column} LIMIT 1 OFFSET {chunk_size - 1};",
+                lower_parameters + where_parameters)
+            row = cursor_object.fetchone()
+            upper_key = row[0] if row else None
+            upper = f" AND {key_column} <= {placeholder}" if upper_key is not None else ""
+            upper_parameters = (upper_key,) if upper_key is not None else ()
+
+            chunk_start = time.perf_counter()
+            dialect.begin_transaction(connection, cursor_object)
+            try:
+                cursor_object.execute(f"{statement} WHERE {lower}{upper}{filter_clause};",
+                                      parameters + lower_parameters + upper_parameters
+                                      + where_parameters)
+                changed = max(cursor_object.rowcount, 0)
+                dialect.commit(connection, cursor_object)
+            except Exception:
+                dialect.rollback(connection, cursor_object)
+                raise
+            chunk_seconds = time.perf_counter() - chunk_start
+            total_rows += changed
+            chunks += 1
+
+            if upper_key is None:
+                ChunkedMutation.__write_checkpoint(checkpoint_path, identity, last_key,
+                                                   total_rows, chunks, completed=True)
+                break
+            last_key = upper_key
+            ChunkedMutation.__write_checkpoint(checkpoint_path, identity, last_key,
+                                               total_rows, chunks)
+            # Aim the next chunk at the target latency
+            factor = target_seconds / chunk_seconds if chunk_seconds > 0 else \
+                ChunkedMutation.MAX_GROWTH
+            factor = max(ChunkedMutation.MAX_SHRINK, min(ChunkedMutation.MAX_GROWTH, factor))
+            chunk_size = max(min_chunk_size, min(max_chunk_size, int(chunk_size * factor)))
+            if chunks % ChunkedMutation.PROGRESS_EVERY == 0:
+                print(f"{chunks} chunks, {total_rows} rows, {key_column} up to {last_key}, "
+                      f"chunk size {chunk_size}")
+
+        exec_time = round(time.perf_counter() - start_time, 3)
+        print(f"Changed {total_rows} rows of '{table_name}' in {chunks} chunks "
+              f"({pauses} pauses) in time: ({exec_time} sec)")
+        return {"rows": total_rows, "chunks": chunks, "pauses": pauses,
+                "chunk_size": chunk_size, "seconds": exec_time, "last_key": last_key,
+                "resumed": resumed}
+
+    @staticmethod
+    def __wait_for_capacity(cursor_object: object, cursor_type: str,
+                            max_replication_lag: Optional[float], max_lock_waits: Optional[int],
+                            pause_seconds: float, replica_cursors: Optional[list]) -> int:
+        """Sleeps while a threshold is crossed; returns the number of pauses"""
+        pauses = 0
+        while True:
+            reasons = []
+            if max_replication_lag is not None:
+                lag = ChunkedMutation.__replication_lag(cursor_object, cursor_type,
+                                                        replica_cursors)
+                if lag > max_replication_lag:
+                    reasons.append(f"replication lag {lag:.1f} sec")
+            if max_lock_waits is not None and cursor_type in ChunkedMutation.LOCK_WAITS_QUERIES:
+                if cursor_type == Constants.POSTGRES:
+                    cursor_object.execute("SELECT pg_stat_clear_snapshot();")
+                cursor_object.execute(ChunkedMutation.LOCK_WAITS_QUERIES[cursor_type])
+                lock_waits = cursor_object.fetchone()[0]
+                if lock_waits > max_lock_waits:
+                    reasons.append(f"{lock_waits} sessions waiting for locks")
+            if not reasons:
+                return pauses
+            pauses += 1
+            print(f"Pausing {pause_seconds} sec: {', '.join(reasons)}")
+            time.sleep(pause_seconds)
+
+    @staticmethod
+    def __replication_lag(cursor_object: object, cursor_type: str,
+                          replica_cursors: Optional[list]) -> float:
+        """The largest replication lag in seconds"""
+        lags = [0.0]
+        if not replica_cursors:
+            if cursor_type == Constants.POSTGRES:
+                cursor_object.execute(ChunkedMutation.POSTGRES_LAG_QUERY)
+                lags.append(float(cursor_object.fetchone()[0]))
+            return max(lags)
+        for replica_cursor in replica_cursors:
+            if SQLUtilities._get_cursor_type_name(replica_cursor) == Constants.POSTGRES:
+                replica_cursor.execute(ChunkedMutation.POSTGRES_REPLICA_LAG_QUERY)
+                lags.append(float(replica_cursor.fetchone()[0]))
+                continue
+            replica_cursor.execute("SHOW REPLICA STATUS;")
+            row = replica_cursor.fetchone()
+            if row is not None:
+                names = [description[0] for description in replica_cursor.description]
+                lag = row[names.index("Seconds_Behind_Source")]
+                # NULL means replication is stopped: treat it as unbounded lag
+                lags.append(float("inf") if lag is None else float(lag))
+        return max(lags)
+
+    @staticmethod
+    def __read_checkpoint(checkpoint_path: Optional[str], identity: dict) -> dict:
+        if not checkpoint_path or not os.path.exists(checkpoint_path):
+            return {}
+        with open(checkpoint_path, encoding="utf-8") as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+        if checkpoint.get("identity") != identity:
+            raise ValueError(f"The checkpoint '{checkpoint_path}' belongs to another statement.")
+        return checkpoint
+
+    @staticmethod
+    def __write_checkpoint(checkpoint_path: Optional[str], identity: dict, last_key: object,
+                           rows: int, chunks: int, completed: bool = False) -> None:
+        """Saves the progress, replacing the previous checkpoint atomically"""
+        if not checkpoint_path:
+            return
+        temporary_path = f"{checkpoint_path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as checkpoint_file:
+            json.dump({"identity": identity, "last_key": last_key, "rows": rows,
+                       "chunks": chunks, "completed": completed}, checkpoint_file, default=str)
+        os.replace(temporary_path, checkpoint_path)
@@ -0,0 +1,284 @@
+""" Deterministic scale-factor data generator for the notebook's online store schema """
+
+# Import the required modules
+
+import datetime
+import json
+import random
+import time
+from typing import Callable, Iterator, Optional
+from .constants import Constants
+from .renderers import AsciiRenderer, Renderer
+from .sql_utilities import SQLUtilities
+from .table_copy import TableCopy
+
+
+CATEGORY_NAMES: list = [
+    "Electronics", "Clothing", "Home and Kitchen", "Books", "Sports and Outdoors",
+    "Beauty", "Toys and Games", "Grocery", "Health", "Automotive", "Garden",
+    "Office Supplies", "Pet Supplies", "Music", "Movies", "Jewelry", "Shoes",
+    "Baby", "Tools", "Furniture",
+]
+PRODUCT_ADJECTIVES: list = ["Compact", "Deluxe", "Wireless", "Classic", "Smart", "Portable",
+                            "Ergonomic", "Organic", "Premium", "Eco", "Ultra", "Vintage"]
+PRODUCT_NOUNS: list = ["Laptop", "Headphones", "Backpack", "Coffee Maker", "Fitness Tracker",
+                       "Jacket", "Blender", "Desk Lamp", "Running Shoes", "Notebook",
+                       "Water Bottle", "Speaker", "Chair", "Watch", "Camera", "Kettle"]
+PRODUCT_TAGS: list = ["electronics", "portable", "tech", "audio", "accessories", "fashion",
+                      "travel", "home", "kitchen", "fitness", "wearables", "outdoor", "gift",
+                      "office", "eco-friendly", "bestseller"]
+FIRST_NAMES: list = ["Alice", "Bob", "Charlie", "David", "Eva", "Frank", "Grace", "Hannah",
+                     "Ivan", "Julia", "Kevin", "Laura", "Mohammed", "Nina", "Oscar", "Priya",
+                     "Quentin", "Rosa", "Samuel", "Tara", "Umar", "Vera", "William", "Yuki"]
+LAST_NAMES: list = ["Johnson", "Smith", "Brown", "White", "Black", "Green", "Garcia", "Miller",
+                    "Davis", "Martinez", "Lopez", "Wilson", "Anderson", "Thomas", "Taylor",
+                    "Moore", "Jackson", "Lee", "Perez", "Thompson", "Harris", "Clark", "Lewis"]
+STREET_NAMES: list = ["Main", "Oak", "Pine", "Maple", "Cedar", "Elm", "Washington", "Lake",
+                      "Hill", "Park", "River", "Sunset"]
+STREET_SUFFIXES: list = ["St", "Ave", "Ln", "Dr", "Rd", "Blvd"]
+CITIES: list = ["New York", "Los Angeles", "Chicago", "Houston", "Phoenix", "Philadelphia",
+                "San Antonio", "San Diego", "Dallas", "Austin", "Cityville", "Townsville",
+                "Gotham City", "Springfield", "Riverside", "Fairview"]
+
+
+class DataGenerator:
+    """
+    Generates and loads `tbl_categories`, `tbl_products`, `tbl_customers` and `tbl_orders`
+    at a scale factor.
+
+    Scale factor 1 holds 10,000 products, 1 million customers and 50 million orders (the
+    20 categories do not scale); fractional scale factors give smaller data sets. Rows are
+    generated in chunks, each from its own seeded random generator, so the same seed and
+    scale factor always produce the same rows on every backend.
+    """
+
+    # Rows per table at scale factor 1
+    BASE_ROW_COUNTS: dict = {"tbl_categories": len(CATEGORY_NAMES), "tbl_products": 10_000,
+                             "tbl_customers": 1_000_000, "tbl_orders": 50_000_000}
+    TABLE_COLUMNS: dict = {
+        "tbl_categories": ["category_id", "name"],
+        "tbl_products": ["product_id", "name", "price", "description", "tags", "category_id",
+                         "supplier"],
+        "tbl_customers": ["customer_id", "customer_name", "email", "phone_number", "address",
+                          "city"],
+        "tbl_orders": ["order_id", "customer_id", "product_id", "total_quantity", "total_amount",
+                       "order_rating", "length", "width", "order_timestamp",
+                       "delivery_timestamp"],
+    }
+    # The notebook's DDL; {} is the identity clause of each database
+    CREATE_TABLE_QUERIES: dict = {
+        "tbl_categories": """CREATE TABLE IF NOT EXISTS tbl_categories (
+            category_id INTEGER PRIMARY KEY {}, name VARCHAR(100) NOT NULL)""",
+        "tbl_products": """CREATE TABLE IF NOT EXISTS tbl_products (
+            product_id INTEGER PRIMARY KEY {}, name VARCHAR(100) NOT NULL,
+            price DECIMAL(10, 2), description VARCHAR(255), tags VARCHAR(255), category_id INT,
+            supplier VARCHAR(100),
+            FOREIGN KEY (category_id) REFERENCES tbl_categories (category_id))""",
+        "tbl_customers": """CREATE TABLE IF NOT EXISTS tbl_customers (
+            customer_id INTEGER PRIMARY KEY {}, customer_name VARCHAR(100) NOT NULL,
+            email VARCHAR(100) NOT NULL, phone_number VARCHAR(20), address VARCHAR(255),
+            city VARCHAR(255))""",
+        "tbl_orders": """CREATE TABLE IF NOT EXISTS tbl_orders (
+            order_id INTEGER PRIMARY KEY {}, customer_id INT, product_id INT,
+            total_quantity INT, total_amount DECIMAL(10, 2), order_rating DECIMAL(3, 1),
+            length DECIMAL(5, 2), width DECIMAL(5, 2), order_timestamp TIMESTAMP,
+            delivery_timestamp TIMESTAMP,
+            FOREIGN KEY (customer_id) REFERENCES tbl_customers (customer_id),
+            FOREIGN KEY (product_id) REFERENCES tbl_products (product_id))""",
+    }
+    # Explicit ids are loaded, so Postgres uses BY DEFAULT rather than ALWAYS
+    IDENTITY_CLAUSES: dict = {Constants.POSTGRES: "GENERATED BY DEFAULT AS IDENTITY",
+                              Constants.MYSQL: "AUTO_INCREMENT", Constants.SQLITE: ""}
+    ORDER_PERIOD: tuple = (datetime.datetime(2020, 1, 1), datetime.datetime(2025, 1, 1))
+
+    @staticmethod
+    def row_counts(scale_factor: float) -> dict:
+        """Returns the number of rows of each table at a scale factor"""
+        return {table_name: len(CATEGORY_NAMES) if table_name == "tbl_categories"
+                else max(1, round(base_count * scale_factor))
+                for table_name, base_count in DataGenerator.BASE_ROW_COUNTS.items()}
+
+    @staticmethod
+    def create_schema(cursor_object: object, drop_existing: bool = True) -> None:
+        """
+        Creates the four tables of the notebook schema.
+
+        Args:
+            cursor_object (object): A database cursor object used to execute SQL queries.
+            drop_existing (bool): Drop the tables first, as the notebook does.
+
+        Raises:
+            ValueError: If the database type is not supported.
+        """
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        if cursor_type not in DataGenerator.IDENTITY_CLAUSES:
+            raise ValueError(f"Unsupported cursor type: {cursor_type}")
+        if drop_existing:
+            if cursor_type == Constants.MYSQL:
+                cursor_object.execute("SET FOREIGN_KEY_CHECKS = 0;")
+            for table_name in reversed(DataGenerator.CREATE_TABLE_QUERIES):
+                cascade = " CASCADE" if cursor_type == Constants.POSTGRES else ""
+                cursor_object.execute(f"DROP TABLE IF EXISTS {table_name}{cascade};")
+            if cursor_type == Constants.MYSQL:
+                cursor_object.execute("SET FOREIGN_KEY_CHECKS = 1;")
+        for query in DataGenerator.CREATE_TABLE_QUERIES.values():
+            cursor_object.execute(query.format(DataGenerator.IDENTITY_CLAUSES[cursor_type]))
+        SQLUtilities._get_connection(cursor_object).commit()
+
+    @staticmethod
+    def generate(table_name: str, scale_factor: float, seed: int = 42,
+                 chunk_size: int = 10000) -> Iterator[list[tuple]]:
+        """
+        Yields the rows of one table in chunks of `chunk_size` rows.
+
+        Args:
+            table_name (str): One of the four schema tables.
+            scale_factor (float): The scale factor (1 = 1M customers and 50M orders).
+            seed (int): The seed the data is derived from.
+            chunk_size (int): The number of rows per chunk.
+
+        Raises:
+            ValueError: If the table is not part of the schema.
+        """
+        generators: dict[str, Callable] = {
+            "tbl_categories": DataGenerator.__category_rows,
+            "tbl_products": DataGenerator.__product_rows,
+            "tbl_customers": DataGenerator.__customer_rows,
+            "tbl_orders": DataGenerator.__order_rows,
+        }
+        if table_name not in generators:
+            raise ValueError(f"Unknown table '{table_name}'. Choose one of: "
+                             f"{', '.join(generators)}")
+        counts = DataGenerator.row_counts(scale_factor)
+        for first_id in range(1, counts[table_name] + 1, chunk_size):
+            last_id = min(first_id + chunk_size - 1, counts[table_name])
+            # Each chunk has its own generator, so a chunk does not depend on the ones before
+            rng = random.Random(f"{seed}:{table_name}:{first_id}")
+            yield [generators[table_name](rng, row_id, counts)
+                   for row_id in range(first_id, last_id + 1)]
+
+    @staticmethod
+    def load(cursor_object: object, scale_factor: float, seed: int = 42,
+             chunk_size: int = 10000, create_schema: bool = True,
+             results_path: Optional[str] = None, renderer: Optional[Renderer] = None) -> dict:
+        """
+        Generates the schema's data at a scale factor and loads it with the bulk path of
+        the database (`TableCopy.bulk_insert`: COPY on Postgres, executemany on MySQL and
+        SQLite), committing every chunk.
+
+        Tables are loaded parents first so the foreign keys hold, and on Postgres each
+        identity sequence is then advanced past the loaded ids. For the fastest SQLite
+        loads open the connection with `SQLiteConnectionFactory.connect(..., profile="bulk_load")`.
+
+        Args:
+            cursor_object (object): A database cursor object used to load the data.
+            scale_factor (float): The scale factor (1 = 1M customers and 50M orders).
+            seed (int): The seed the data is derived from.
+            chunk_size (int): The number of rows generated, loaded and committed at a time.
+            create_schema (bool): Drop and create the tables before loading.
+            results_path (str, optional): A JSON Lines file the throughput of the run is
+                                          appended to, to compare runs and backends.
+            renderer (Renderer, optional): The renderer used to display the throughput.
+
+        Returns:
+            dict: Per table, the rows loaded, seconds and rows per second.
+
+        Raises:
+            ValueError: If scale_factor or chunk_size is not positive.
+        """
+        if scale_factor <= 0 or chunk_size < 1:
+            raise ValueError("scale_factor and chunk_size must be positive.")
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        if create_schema:
+            DataGenerator.create_schema(cursor_object)
+        connection = SQLUtilities._get_connection(cursor_object)
+
+        throughput = {}
+        for table_name, column_names in DataGenerator.TABLE_COLUMNS.items():
+            start_time = time.perf_counter()
+            row_count = 0
+            for rows in DataGenerator.generate(table_name, scale_factor, seed, chunk_size):
+                TableCopy.bulk_insert(table_name, column_names, rows, cursor_object)
+                connection.commit()
+                row_count += len(rows)
+            if cursor_type == Constants.POSTGRES:
+                # The ids were loaded explicitly: move the identity sequence past them so
+                # later INSERTs without an id do not collide
+                cursor_object.execute(
+                    f"SELECT setval(pg_get_serial_sequence(%s, %s), MAX({column_names[0]})) "
+                    f"FROM {table_name};", (table_name, column_names[0]))
+                connection.commit()
+            elapsed = time.perf_counter() - start_time
+            throughput[table_name] = {
+                "rows": row_count, "seconds": round(elapsed, 3),
+                "rows_per_second": round(row_count / elapsed) if elapsed else row_count}
+
+        if results_path:
+            with open(results_path, "a", encoding="utf-8") as results_file:
+                results_file.write(json.dumps({
+                    "timestamp": time.time(), "backend": cursor_type,
+                    "scale_factor": scale_factor, "seed": seed, "chunk_size": chunk_size,
+                    "tables": throughput}) + "\n")
+        (renderer or AsciiRenderer(row_limit=None)).render(
+            ["table", "rows", "seconds", "rows/sec"],
+            ([table_name, *values.values()] for table_name, values in throughput.items()))
+        return throughput
+
+    @staticmethod
+    def __skewed_id(rng: random.Random, count: int, skew: float) -> int:
+        """An id in 1..count where low ids are much more frequent (power law)"""
+        return min(count, int(count * rng.random() ** skew) + 1)
+
+    @staticmethod
+    def __category_rows(rng: random.Random, row_id: int, counts: dict) -> tuple:  # pylint: disable=unused-argument
+        return (row_id, CATEGORY_NAMES[row_id - 1])
+
+    @staticmethod
+    def __product_rows(rng: random.Random, row_id: int, counts: dict) -> tuple:
+        noun = rng.choice(PRODUCT_NOUNS)
+        # Prices are log-normal around $40; about 8% of the products have no price yet
+        price = None if rng.random() < 0.08 else round(min(rng.lognormvariate(3.7, 0.9),
+                                                          99_999_999.99), 2)
+        description = None if rng.random() < 0.1 else \
+            f"{rng.choice(PRODUCT_ADJECTIVES).lower()} {noun.lower()} for everyday use"
+        tags = ", ".join(rng.sample(PRODUCT_TAGS, rng.randint(1, 3)))
+        supplier = None if rng.random() < 0.2 else f"Supplier{chr(65 + int(rng.random() ** 2 * 26))}"
+        return (row_id, f"{rng.choice(PRODUCT_ADJECTIVES)} {noun}", price, description, tags,
+                DataGenerator.__skewed_id(rng, counts["tbl_categories"], 1.5), supplier)
+
+    @staticmethod
+    def __customer_rows(rng: random.Random, row_id: int, counts: dict) -> tuple:  # pylint: disable=unused-argument
+        first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        phone_number = None if rng.random() < 0.15 else \
+            f"{rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(0, 9999):04d}"
+        address = None if rng.random() < 0.05 else \
+            f"{rng.randint(1, 9999)} {rng.choice(STREET_NAMES)} {rng.choice(STREET_SUFFIXES)}"
+        city = CITIES[min(len(CITIES) - 1, int(len(CITIES) * rng.random() ** 2))]
+        return (row_id, f"{first_name} {last_name}",
+                f"{first_name.lower()}.{last_name.lower()}{row_id}@example.com",
+                phone_number, address, city)
+
+    @staticmethod
+    def __order_rows(rng: random.Random, row_id: int, counts: dict) -> tuple:
+        quantity = min(20, 1 + int(rng.expovariate(0.6)))
+        # Orders are placed in order_id order over the period, with some jitter
+        period_start, period_end = DataGenerator.ORDER_PERIOD
+        period_seconds = (period_end - period_start).total_seconds()
+        offset = min(period_seconds - 1, max(0.0, period_seconds * row_id / counts["tbl_orders"]
+                                             + rng.uniform(-3600, 3600)))
+        ordered_at = period_start + datetime.timedelta(seconds=int(offset))
+        # About 3% of the orders are not delivered yet
+        delivered_at = None if rng.random() < 0.03 else \
+            ordered_at + datetime.timedelta(seconds=int(rng.uniform(0.5, 1.0)
+                                                        * rng.expovariate(1 / 3) * 86400) + 3600)
+        rating = None if rng.random() < 0.3 else round(min(5.0, max(1.0, rng.gauss(4.1, 0.7))), 1)
+        return (row_id,
+                DataGenerator.__skewed_id(rng, counts["tbl_customers"], 2.0),
+                DataGenerator.__skewed_id(rng, counts["tbl_products"], 3.0),
+                quantity,
+                round(quantity * min(rng.lognormvariate(3.4, 0.8), 5000.0), 2),
+                rating,
+                round(rng.uniform(0.5, 99.0), 2),
+                round(rng.uniform(0.5, 99.0), 2),
+                ordered_at.strftime("%Y-%m-%d %H:%M:%S"),
+                delivered_at.strftime("%Y-%m-%d %H:%M:%S") if delivered_at else None)
@@ -0,0 +1,58 @@
+""" Dialect plugins for the supported databases.
+
+A dialect module holds everything that needs the database driver (its exception classes,
+parameter placeholder, ...). Dialects are only imported the first time a cursor of their
+type is used, so importing the package never pays for (or fails on) drivers that are not used.
+"""
+
+import importlib
+from types import ModuleType
+from ..constants import Constants
+
+
+_DIALECT_MODULES: dict = {
+    Constants.MYSQL: f"{__name__}.mysql",
+    Constants.POSTGRES: f"{__name__}.postgres",
+    Constants.SQLITE: f"{__name__}.sqlite",
+    Constants.SQLSERVER: f"{__name__}.sqlserver",
+}
+_LOADED_DIALECTS: dict = {}
+
+
+def register_dialect(cursor_type: str, module_name: str) -> None:
+    """
+    Registers the dialect module to load for a cursor type.
+
+    Args:
+        cursor_type (str): The lower-cased cursor class path, e.g. "sqlite3.cursor".
+        module_name (str): The absolute name of the module implementing the dialect.
+    """
+    _DIALECT_MODULES[cursor_type] = module_name
+    _LOADED_DIALECTS.pop(cursor_type, None)
+
+
+def is_registered(cursor_type: str) -> bool:
+    """Returns True if a dialect module is registered for the cursor type"""
+    return cursor_type in _DIALECT_MODULES
+
+
+def get_dialect(cursor_type: str) -> ModuleType:
+    """
+    Returns the dialect module for a cursor type, importing it on first use.
+
+    Args:
+        cursor_type (str): The cursor type name returned by `SQLUtilities._get_cursor_type_name`.
+
+    Returns:
+        ModuleType: The imported dialect module.
+
+    Raises:
+        ValueError: If no dialect is registered for the cursor type.
+    """
+    dialect = _LOADED_DIALECTS.get(cursor_type)
+    if dialect is None:
+        module_name = _DIALECT_MODULES.get(cursor_type)
+        if module_name is None:
+            raise ValueError(Constants.ASSERTION_ERROR_MESSAGE.format(cursor_type))
+        dialect = _LOADED_DIALECTS[cursor_type] = importlib.import_module(module_name)
+    return dialect
@@ -0,0 +1,110 @@
+""" MySQL dialect (mysql-connector-python) """
+
+import contextlib
+import re
+from typing import Callable, Iterator, Optional
+from mysql.connector import Error, ProgrammingError
+from mysql.connector.conversion import MySQLConverter
+from ..exceptions import QueryCancelledError, QueryTimeoutError
+from ..fast_types import decimal_to_float, timestamp_to_epoch
+
+NAME: str = "mysql"
+ERRORS: tuple = (ProgrammingError,)
+PLACEHOLDER: str = "%s"
+
+
+def begin_transaction(connection: object, cursor_object: object) -> None:
+    """Starts a transaction unless one is already open on the connection"""
+    if not connection.in_transaction:
+        cursor_object.execute("START TRANSACTION")
+
+
+def commit(connection: object, cursor_object: object) -> None:  # pylint: disable=unused-argument
+    """Commits the open transaction"""
+    connection.commit()
+
+
+def rollback(connection: object, cursor_object: object) -> None:  # pylint: disable=unused-argument
+    """Rolls back the open transaction"""
+    connection.rollback()
+
+
+def in_transaction(connection: object) -> bool:
+    """Whether a transaction is open on the connection"""
+    return connection.in_transaction
+
+
+# Error numbers of statements stopped by MAX_EXECUTION_TIME and by KILL QUERY
+ER_QUERY_TIMEOUT: int = 3024
+ER_QUERY_INTERRUPTED: int = 1317
+
+
+def set_statement_timeout(connection: object, cursor_object: object,  # pylint: disable=unused-argument
+                          seconds: Optional[float]) -> None:
+    """Sets the session MAX_EXECUTION_TIME (SELECT statements only); None or 0 removes it"""
+    cursor_object.execute(f"SET SESSION MAX_EXECUTION_TIME = {int((seconds or 0) * 1000)};")
+
+
+@contextlib.contextmanager
+def interruptible(connection: object, cursor_object: object,  # pylint: disable=unused-argument
+                  seconds: Optional[float], query: str) -> Iterator[str]:
+    """
+    Bounds a SELECT with a MAX_EXECUTION_TIME optimizer hint and raises QueryTimeoutError
+    or QueryCancelledError for statements stopped by the timeout or by KILL QUERY.
+
+    MySQL only applies execution time limits to read-only SELECT statements, so other
+    statements run without a limit.
+    """
+    if seconds is not None:
+        hint = f"/*+ MAX_EXECUTION_TIME({int(seconds * 1000)}) */"
+        query = re.sub(r"^(\s*SELECT)\b", rf"\1 {hint}", query, count=1, flags=re.IGNORECASE)
+    try:
+        yield query
+    except Error as error:
+        if error.errno == ER_QUERY_TIMEOUT:
+            raise QueryTimeoutError("Statement exceeded the maximum execution time") from error
+        if error.errno == ER_QUERY_INTERRUPTED:
+            raise QueryCancelledError("Statement cancelled") from error
+        raise
+
+
+def cancel(connection: object, connection_factory: Optional[Callable] = None) -> None:
+    """
+    Cancels the statement running on the connection with KILL QUERY, sent over a second
+    connection opened with `connection_factory`.
+    """
+    if connection_factory is None:
+        raise ValueError("Cancelling a MySQL query needs a connection_factory "
+                         "to send KILL QUERY over a second connection.")
+    kill_connection = connection_factory()
+    try:
+        kill_connection.cursor().execute(f"KILL QUERY {int(connection.connection_id)};")
+    finally:
+        kill_connection.close()
+
+
+class FastTypesConverter(MySQLConverter):
+    """Returns DECIMAL values as floats and DATE / DATETIME / TIMESTAMP values as epochs"""
+
+    def _DECIMAL_to_python(self, value: bytes, dsc: object = None) -> float:  # pylint: disable=invalid-name,unused-argument
+        return decimal_to_float(value)
+
+    def _DATETIME_to_python(self, value: bytes, dsc: object = None):  # pylint: disable=invalid-name,unused-argument
+        return timestamp_to_epoch(value)
+
+    _NEWDECIMAL_to_python = _DECIMAL_to_python
+    _TIMESTAMP_to_python = _DATETIME_to_python
+    _DATE_to_python = _DATETIME_to_python
+
+
+def enable_fast_types(connection: object, cursor_object: object) -> None:  # pylint: disable=unused-argument
+    """
+    Sets the fast types converter class on the connection. Cursors opened before keep the
+    converter they were created with.
+    """
+    connection.set_converter_class(FastTypesConverter)
+
+
+def disable_fast_types(connection: object, cursor_object: object) -> None:  # pylint: disable=unused-argument
+    """Sets mysql-connector's default converter class again"""
+    connection.set_converter_class(MySQLConverter)
@@ -0,0 +1,108 @@
+""" PostgreSQL dialect (psycopg2) """
+
+import contextlib
+from typing import Callable, Iterator, Optional
+from psycopg2 import ProgrammingError
+from psycopg2 import extensions
+from psycopg2.extensions import QueryCanceledError
+from ..exceptions import QueryCancelledError, QueryTimeoutError
+from ..fast_types import decimal_to_float, timestamp_to_epoch
+
+NAME: str = "postgres"
+ERRORS: tuple = (ProgrammingError,)
+PLACEHOLDER: str = "%s"
+
+# Type oids converted by fast types: numeric, and date, timestamp and timestamptz
+NUMERIC_OIDS: tuple = (1700,)
+TIMESTAMP_OIDS: tuple = (1082, 1114, 1184)
+
+
+def begin_transaction(connection: object, cursor_object: object) -> None:
+    """Starts a transaction; without autocommit psycopg2 opens one implicitly"""
+    if connection.autocommit:
+        cursor_object.execute("BEGIN")
+
+
+def commit(connection: object, cursor_object: object) -> None:
+    """Commits the open transaction"""
+    if connection.autocommit:
+        cursor_object.execute("COMMIT")
+    else:
+        connection.commit()
+
+
+def rollback(connection: object, cursor_object: object) -> None:
+    """Rolls back the open transaction"""
+    if connection.autocommit:
+        cursor_object.execute("ROLLBACK")
+    else:
+        connection.rollback()
+
+
+def in_transaction(connection: object) -> bool:
+    """Whether a transaction is open (or failed) on the connection"""
+    return connection.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE
+
+
+# SQLSTATE of statements stopped by statement_timeout or a cancel request
+QUERY_CANCELED: str = "57014"
+TRANSACTION_STATUS_INERROR: int = 3
+
+
+def set_statement_timeout(connection: object, cursor_object: object,  # pylint: disable=unused-argument
+                          seconds: Optional[float]) -> None:
+    """Sets the session statement_timeout; None or 0 removes it"""
+    cursor_object.execute(f"SET statement_timeout = {int((seconds or 0) * 1000)};")
+
+
+@contextlib.contextmanager
+def interruptible(connection: object, cursor_object: object,  # pylint: disable=unused-argument
+                  seconds: Optional[float], query: str) -> Iterator[str]:
+    """
+    Applies a statement_timeout for the duration of the block and raises QueryTimeoutError
+    or QueryCancelledError for statements stopped by a timeout or a cancel request.
+
+    The setting is changed and restored through a separate cursor so the results of the
+    statement are kept. When the statement fails inside a transaction, the transaction's
+    rollback reverts the setting.
+    """
+    settings_cursor, previous = None, None
+    if seconds is not None:
+        settings_cursor = connection.cursor()
+        settings_cursor.execute("SHOW statement_timeout;")
+        previous = settings_cursor.fetchone()[0]
+        settings_cursor.execute(f"SET statement_timeout = {int(seconds * 1000)};")
+    try:
+        yield query
+    except QueryCanceledError as error:
+        if getattr(error, "pgcode", QUERY_CANCELED) != QUERY_CANCELED:
+            raise
+        if "statement timeout" in str(error):
+            raise QueryTimeoutError("Statement exceeded the statement timeout") from error
+        raise QueryCancelledError("Statement cancelled") from error
+    finally:
+        if settings_cursor is not None:
+            if connection.get_transaction_status() != TRANSACTION_STATUS_INERROR:
+                settings_cursor.execute("SET statement_timeout = %s;", (previous,))
+            settings_cursor.close()
+
+
+def cancel(connection: object, connection_factory: Optional[Callable] = None) -> None:  # pylint: disable=unused-argument
+    """Cancels the statement running on the connection (safe to call from another thread)"""
+    connection.cancel()
+
+
+def enable_fast_types(connection: object, cursor_object: object) -> None:  # pylint: disable=unused-argument
+    """Registers typecasters returning numerics as floats and dates / timestamps as epochs"""
+    for oids, name, convert in ((NUMERIC_OIDS, "FAST_NUMERIC", decimal_to_float),
+                                (TIMESTAMP_OIDS, "FAST_TIMESTAMP", timestamp_to_epoch)):
+        extensions.register_type(extensions.new_type(
+            oids, name, lambda value, _cursor, convert=convert:
+            None if value is None else convert(value)), connection)
+
+
+def disable_fast_types(connection: object, cursor_object: object) -> None:  # pylint: disable=unused-argument
+    """Registers psycopg2's default typecasters again"""
+    for typecaster in (extensions.DECIMAL, extensions.PYDATE, extensions.PYDATETIME,
+                       extensions.PYDATETIMETZ):
+        extensions.register_type(typecaster, connection)
@@ -0,0 +1,134 @@
+""" SQLite dialect (sqlite3) """
+
+import contextlib
+import sqlite3
+import time
+from sqlite3 import OperationalError, ProgrammingError
+from typing import Callable, Iterator, Optional
+from ..exceptions import QueryCancelledError, QueryTimeoutError
+from ..fast_types import decimal_to_float, timestamp_to_epoch
+
+NAME: str = "sqlite"
+ERRORS: tuple = (ProgrammingError,)
+PLACEHOLDER: str = "?"
+
+# Declared column types converted by fast types
+FAST_TYPE_CONVERTERS: dict = {"DECIMAL": decimal_to_float, "NUMERIC": decimal_to_float,
+                              "DATE": timestamp_to_epoch, "DATETIME": timestamp_to_epoch,
+                              "TIMESTAMP": timestamp_to_epoch}
+
+# The number of virtual machine instructions between two timeout checks
+PROGRESS_HANDLER_INTERVAL: int = 10000
+# Connections are tracked by id(connection): sqlite3 connections cannot be weakly
+# referenced, and holding them would keep closed connections alive. An entry is removed
+# when the setting is reset or the connection released (SQLiteConnectionFactory
+# connections are on close).
+_STATEMENT_TIMEOUTS: dict = {}
+# The connections with fast types on, and the converters fast types replaced while any is
+_FAST_TYPE_CONNECTIONS: set = set()
+_REPLACED_CONVERTERS: dict = {}
+
+
+def begin_transaction(connection: object, cursor_object: object) -> None:
+    """Starts a transaction unless one is already open on the connection"""
+    if not connection.in_transaction:
+        cursor_object.execute("BEGIN")
+
+
+def commit(connection: object, cursor_object: object) -> None:  # pylint: disable=unused-argument
+    """Commits the open transaction"""
+    connection.commit()
+
+
+def rollback(connection: object, cursor_object: object) -> None:  # pylint: disable=unused-argument
+    """Rolls back the open transaction"""
+    connection.rollback()
+
+
+def in_transaction(connection: object) -> bool:
+    """Whether a transaction is open on the connection"""
+    return connection.in_transaction
+
+
+def set_statement_timeout(connection: object, cursor_object: object,  # pylint: disable=unused-argument
+                          seconds: Optional[float]) -> None:
+    """Sets the default statement timeout of the connection; None or 0 removes it"""
+    if seconds:
+        _STATEMENT_TIMEOUTS[id(connection)] = seconds
+    else:
+        _STATEMENT_TIMEOUTS.pop(id(connection), None)
+
+
+def release_connection(connection: object) -> None:
+    """
+    Forgets the settings kept for a connection that is being closed, so a later connection
+    reusing its id does not inherit them.
+    """
+    _STATEMENT_TIMEOUTS.pop(id(connection), None)
+    if id(connection) in _FAST_TYPE_CONNECTIONS:
+        disable_fast_types(connection, None)
+
+
+@contextlib.contextmanager
+def interruptible(connection: object, cursor_object: object,  # pylint: disable=unused-argument
+                  seconds: Optional[float], query: str) -> Iterator[str]:
+    """
+    Interrupts the statements of the block once the timeout (or the connection default)
+    has passed, through a progress handler, and raises QueryTimeoutError. Statements
+    stopped by `cancel` raise QueryCancelledError.
+
+    The block replaces any progress handler installed on the connection.
+    """
+    seconds = seconds if seconds is not None else _STATEMENT_TIMEOUTS.get(id(connection))
+    deadline = time.perf_counter() + seconds if seconds else None
+    if deadline is not None:
+        connection.set_progress_handler(lambda: time.perf_counter() > deadline,
+                                        PROGRESS_HANDLER_INTERVAL)
+    try:
+        yield query
+    except OperationalError as error:
+        if str(error) != "interrupted":
+            raise
+        if deadline is not None and time.perf_counter() > deadline:
+            raise QueryTimeoutError(f"Statement timed out after {seconds} sec") from error
+        raise QueryCancelledError("Statement cancelled") from error
+    finally:
+        if deadline is not None:
+            connection.set_progress_handler(None, PROGRESS_HANDLER_INTERVAL)
+
+
+def cancel(connection: object, connection_factory: Optional[Callable] = None) -> None:  # pylint: disable=unused-argument
+    """Interrupts the statement running on the connection (safe to call from another thread)"""
+    connection.interrupt()
+
+
+def enable_fast_types(connection: object, cursor_object: object) -> None:  # pylint: disable=unused-argument
+    """
+    Registers converters for the declared types of FAST_TYPE_CONVERTERS, saving the
+    converters they replace. sqlite3 converters are process-wide: while any connection has
+    fast types on, every connection opened with `detect_types=sqlite3.PARSE_DECLTYPES`
+    (and only those) gets them. Disable them before closing a connection not opened by
+    `SQLiteConnectionFactory`, which does it on close.
+    """
+    if not _FAST_TYPE_CONNECTIONS:
+        _REPLACED_CONVERTERS.update({declared_type: sqlite3.converters.get(declared_type)
+                                     for declared_type in FAST_TYPE_CONVERTERS})
+        for declared_type, convert in FAST_TYPE_CONVERTERS.items():
+            sqlite3.register_converter(declared_type, convert)
+    _FAST_TYPE_CONNECTIONS.add(id(connection))
+
+
+def disable_fast_types(connection: object, cursor_object: object) -> None:  # pylint: disable=unused-argument
+    """
+    Turns fast types off for the connection. Once no connection has them on, the
+    converters current when they were enabled are restored.
+    """
+    _FAST_TYPE_CONNECTIONS.discard(id(connection))
+    if _FAST_TYPE_CONNECTIONS:
+        return
+    for declared_type, convert in _REPLACED_CONVERTERS.items():
+        if convert is None:
+            sqlite3.converters.pop(declared_type, None)
+        else:
+            sqlite3.register_converter(declared_type, convert)
+    _REPLACED_CONVERTERS.clear()
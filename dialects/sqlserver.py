@@ -0,0 +1,7 @@
+""" SQL Server dialect (pyodbc) """
+
+from pyodbc import ProgrammingError
+
+NAME: str = "sqlserver"
+ERRORS: tuple = (ProgrammingError,)
+PLACEHOLDER: str = "?"
@@ -0,0 +1,9 @@
+""" Exceptions raised by the SQL utilities """
+
+
+class QueryTimeoutError(TimeoutError):
+    """Raised when a statement runs longer than its statement timeout"""
+
+
+class QueryCancelledError(Exception):
+    """Raised when a running statement is cancelled with `SQLUtilities.cancel_query`"""
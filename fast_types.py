@@ -0,0 +1,127 @@
+""" Opt-in fast type conversion: numerics as floats and timestamps as integer epochs """
+
+# Import the required modules
+
+import datetime
+import functools
+from typing import Optional, Union
+from .dialects import get_dialect
+from .sql_utilities import SQLUtilities
+
+
+EPOCH_ORDINAL: int = datetime.date(1970, 1, 1).toordinal()
+
+
+@functools.lru_cache(maxsize=65536)
+def _prefix_seconds(prefix: Union[str, bytes]) -> int:
+    """
+    The seconds between 1970-01-01 and a 'YYYY-MM-DD' date or 'YYYY-MM-DD HH' hour. Rows
+    share few distinct hours, so the cache answers most lookups.
+    """
+    if isinstance(prefix, bytes):
+        prefix = prefix.decode("ascii")
+    seconds = (datetime.date.fromisoformat(prefix[:10]).toordinal() - EPOCH_ORDINAL) * 86400
+    return seconds + int(prefix[11:13]) * 3600 if len(prefix) > 10 else seconds
+
+
+def decimal_to_float(text: Union[str, bytes]) -> float:
+    """Converts the text of a NUMERIC / DECIMAL value to a float"""
+    return float(text)
+
+
+def timestamp_to_epoch(text: Union[str, bytes]) -> Optional[Union[int, float]]:
+    """
+    Converts the text of a DATE, TIMESTAMP or DATETIME value to seconds since 1970-01-01
+    UTC, without building datetime objects. Values without a time zone are read as UTC;
+    fractions of a second are dropped. Integers (epochs stored by SQLite) pass through,
+    PostgreSQL's infinity values become float infinities and MySQL zero dates None.
+    """
+    # Fast path for the fixed-width 'YYYY-MM-DD' and 'YYYY-MM-DD HH:MM:SS' forms
+    try:
+        if len(text) == 19:
+            return _prefix_seconds(text[:13]) + int(text[14:16]) * 60 + int(text[17:])
+        if len(text) == 10:
+            return _prefix_seconds(text)
+    except ValueError:
+        pass
+
+    if isinstance(text, bytes):
+        text = text.decode("ascii")
+    text = text.strip()
+    if text.lstrip("-").isdigit():
+        return int(text)
+    if text in ("infinity", "-infinity"):
+        return float(text.replace("infinity", "inf"))
+    date_part, _, time_part = text.replace("T", " ", 1).partition(" ")
+    if date_part.startswith("0000-00-00"):
+        return None
+    seconds = _prefix_seconds(date_part)
+    if not time_part:
+        return seconds
+
+    offset = 0
+    if time_part.endswith("Z"):
+        time_part = time_part[:-1]
+    else:
+        for sign in "+-":
+            position = time_part.find(sign)
+            if position > 0:
+                parts = [int(part) for part in time_part[position + 1:].split(":")]
+                offset = parts[0] * 3600 + (parts[1] * 60 if len(parts) > 1 else 0) \
+                    + (parts[2] if len(parts) > 2 else 0)
+                offset = -offset if sign == "-" else offset
+                time_part = time_part[:position]
+                break
+    hours, minutes, second = time_part.split(":")
+    return seconds + int(hours) * 3600 + int(minutes) * 60 + int(second.split(".")[0]) - offset
+
+
+class FastTypes:
+    """
+    Registers driver-level converters that return NUMERIC / DECIMAL values as floats and
+    DATE / TIMESTAMP / DATETIME values as integer epochs (seconds, UTC), instead of Decimal
+    and datetime objects that are often converted to those afterwards anyway.
+
+    - PostgreSQL: psycopg2 typecasters registered on the connection.
+    - MySQL: a mysql-connector converter class set on the connection. It applies to the
+      pure Python protocol (`use_pure=True`); the C extension converts values in C.
+    - SQLite: converters for the DECIMAL, NUMERIC, DATE, DATETIME and TIMESTAMP declared
+      types, only used by connections opened with `detect_types=sqlite3.PARSE_DECLTYPES`.
+      sqlite3 has no per-connection converters (and does not expose declared types to a
+      row factory), so while any connection has fast types on they apply to every such
+      connection of the process; the replaced converters are restored once the last
+      connection disables them.
+
+    Floats lose precision beyond about 15 significant digits: do not use fast types for
+    exact money arithmetic.
+    """
+
+    @staticmethod
+    def enable(cursor_object: object) -> None:
+        """
+        Turns fast types on for the connection of the cursor.
+
+        Raises:
+            ValueError: If the database type does not support fast types.
+        """
+        FastTypes.__dialect_function(cursor_object, "enable_fast_types")(
+            SQLUtilities._get_connection(cursor_object), cursor_object)
+
+    @staticmethod
+    def disable(cursor_object: object) -> None:
+        """
+        Restores the driver's default conversions for the connection of the cursor.
+
+        Raises:
+            ValueError: If the database type does not support fast types.
+        """
+        FastTypes.__dialect_function(cursor_object, "disable_fast_types")(
+            SQLUtilities._get_connection(cursor_object), cursor_object)
+
+    @staticmethod
+    def __dialect_function(cursor_object: object, name: str):
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        dialect = get_dialect(cursor_type)
+        if not hasattr(dialect, name):
+            raise ValueError(f"Fast types are not supported for: {cursor_type}")
+        return getattr(dialect, name)
@@ -0,0 +1,301 @@
+""" Hash joins of tables living on different databases, spilling to SQLite when large """
+
+# Import the required modules
+
+import os
+import pickle
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
+from .renderers import AsciiRenderer, Renderer
+from .sqlite_connection import SQLiteConnectionFactory
+
+
+# Key hashes are stored as non-negative 64-bit SQLite integers
+HASH_MASK: int = 0x7FFFFFFFFFFFFFFF
+
+
+@dataclass
+class JoinSide:
+    """
+    One input of a federated join: the key columns and the other needed columns of a table,
+    read with the side's own cursor. `where` uses the placeholders of that database.
+    """
+    table_name: str
+    cursor_object: object
+    key_columns: list
+    columns: list = field(default_factory=list)
+    where: Optional[str] = None
+    parameters: tuple = ()
+
+
+class _SpillFile:
+    """Rows of both join sides, pickled into a temporary SQLite file with their key hash"""
+
+    TABLES: tuple = ("build_rows", "probe_rows")
+
+    def __init__(self, directory: Optional[str], batch_size: int):
+        self.directory = tempfile.TemporaryDirectory(prefix="federated_join_", dir=directory)
+        # Nothing to recover after a crash: no journal, no syncs
+        self.connection = SQLiteConnectionFactory.connect(
+            os.path.join(self.directory.name, "spill.db"), profile="bulk_load",
+            pragma_overrides={"journal_mode": "OFF"})
+        for table in self.TABLES:
+            self.connection.execute(f"CREATE TABLE {table} (key_hash INTEGER, row BLOB);")
+        self.batch_size = batch_size
+        self.pending: dict = {table: [] for table in self.TABLES}
+        self.rows = 0
+
+    def add(self, table: str, key_hash: int, row: tuple) -> None:
+        """Queues a row, writing the queue once it holds batch_size rows"""
+        self.pending[table].append((key_hash, pickle.dumps(row, pickle.HIGHEST_PROTOCOL)))
+        self.rows += 1
+        if len(self.pending[table]) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the queued rows"""
+        for table, rows in self.pending.items():
+            if rows:
+                self.connection.executemany(f"INSERT INTO {table} VALUES (?, ?);", rows)
+                rows.clear()
+        self.connection.commit()
+
+    def partition(self, table: str, partitions: int) -> None:
+        """Indexes the rows of a table by partition, once all of them are written"""
+        self.flush()
+        self.connection.execute(f"CREATE INDEX {table}_partition "
+                                f"ON {table} ((key_hash % {partitions}));")
+
+    def read(self, table: str, partitions: int, partition: int) -> Iterator[tuple]:
+        """Yields the rows of one partition"""
+        cursor = self.connection.execute(
+            f"SELECT row FROM {table} WHERE (key_hash % {partitions}) = ?;", (partition,))
+        while rows := cursor.fetchmany(self.batch_size):
+            for (row,) in rows:
+                yield pickle.loads(row)
+
+    def close(self) -> None:
+        """Closes and deletes the spill file"""
+        self.connection.close()
+        self.directory.cleanup()
+
+
+class FederatedJoin:
+    """
+    Joins two tables on different databases, e.g. orders on MySQL with customers on
+    PostgreSQL, without fetching both into Python.
+
+    Only the key columns and the requested columns of each side are read. The smaller
+    (build) side is streamed into a hash table keyed by the join columns; the larger
+    (probe) side is then streamed through it, and joined rows are yielded as they are
+    found. When the build side holds more than `max_memory_rows` rows, the join becomes a
+    hybrid hash join: the rows are partitioned by key hash into a temporary SQLite file,
+    one partition is kept in memory and joined while the probe side streams, the probe
+    rows of the other partitions are spilled too, and each remaining partition is then
+    joined in memory on its own.
+
+    Keys match when they compare equal in Python: 5 and Decimal("5") do, 5 and "5" do not.
+    Rows whose key contains NULL never match.
+
+    Example:
+        orders = JoinSide("tbl_orders", mysql_cursor, ["customer_id"],
+                          ["order_id", "total_amount"], where="order_status = %s",
+                          parameters=("shipped",))
+        customers = JoinSide("tbl_customers", postgres_cursor, ["customer_id"],
+                             ["first_name", "country"])
+        FederatedJoin.execute(orders, customers, join_type="left")
+    """
+
+    JOIN_TYPES: tuple = ("inner", "left")
+
+    @staticmethod
+    def iterate(left: JoinSide, right: JoinSide, join_type: str = "inner",
+                build_side: Optional[str] = None, max_memory_rows: int = 1000000,
+                fetch_size: int = 10000, spill_directory: Optional[str] = None,
+                statistics: Optional[dict] = None) -> tuple[list[str], Iterator[tuple]]:
+        """
+        Builds the hash table of the build side and returns the joined rows lazily.
+
+        Args:
+            left (JoinSide): The left input.
+            right (JoinSide): The right input.
+            join_type (str): "inner", or "left" to keep left rows without a match (their
+                             right columns are NULL).
+            build_side (str, optional): "left" or "right", the side loaded into the hash
+                                        table. Defaults to the side with fewer rows (counted
+                                        on each database) for inner joins and to the right
+                                        side for left joins.
+            max_memory_rows (int): The number of build rows held in memory before the join
+                                   spills to disk.
+            fetch_size (int): The number of rows fetched, and spilled, at a time.
+            spill_directory (str, optional): Where the spill file is created. Defaults to
+                                             the system's temporary directory.
+            statistics (dict, optional): Filled with the rows read and joined, the build
+                                         side and the spilled partitions.
+
+        Returns:
+            tuple[list[str], Iterator[tuple]]: The column names (the left keys and columns,
+            then the right columns) and the joined rows.
+
+        Raises:
+            ValueError: If the join type or build side is unknown, the sides have no key
+                        columns or a different number of them, max_memory_rows or fetch_size
+                        is not positive, or a left join builds on the left side.
+        """
+        if join_type not in FederatedJoin.JOIN_TYPES:
+            raise ValueError(f"Unknown join type '{join_type}'. Choose one of: "
+                             f"{', '.join(FederatedJoin.JOIN_TYPES)}")
+        if not left.key_columns or len(left.key_columns) != len(right.key_columns):
+            raise ValueError("Both sides need the same, non-zero number of key columns.")
+        if max_memory_rows < 1 or fetch_size < 1:
+            raise ValueError("max_memory_rows and fetch_size must be positive integers.")
+        if build_side not in (None, "left", "right"):
+            raise ValueError("build_side must be 'left' or 'right'.")
+        if join_type == "left" and build_side == "left":
+            raise ValueError("A left join keeps the left rows: build on the right side.")
+        if build_side is None:
+            build_side = "right"
+            if join_type == "inner" and FederatedJoin.__count(left) < FederatedJoin.__count(right):
+                build_side = "left"
+
+        build, probe = (left, right) if build_side == "left" else (right, left)
+        key_width = len(left.key_columns)
+        column_names = list(left.key_columns) + list(left.columns) + list(right.columns)
+        statistics = statistics if statistics is not None else {}
+        statistics.update({"build_side": build_side, "build_rows": 0, "probe_rows": 0,
+                           "rows": 0, "partitions": 0, "spilled_rows": 0})
+
+        table: dict = {}
+        spill: Optional[_SpillFile] = None
+        for row in FederatedJoin.__fetch(build, fetch_size):
+            key = row[:key_width]
+            if None in key:
+                continue
+            statistics["build_rows"] += 1
+            if spill is not None:
+                spill.add("build_rows", hash(key) & HASH_MASK, row)
+                continue
+            table.setdefault(key, []).append(row)
+            if statistics["build_rows"] > max_memory_rows:
+                spill = _SpillFile(spill_directory, fetch_size)
+                for key_rows in table.values():
+                    for key_row in key_rows:
+                        spill.add("build_rows", hash(key_row[:key_width]) & HASH_MASK, key_row)
+                table = {}
+
+        partitions = 1
+        if spill is not None:
+            # One partition per max_memory_rows, plus one for skew, each loaded on its own
+            partitions = -(-statistics["build_rows"] // max_memory_rows) + 1
+            spill.partition("build_rows", partitions)
+            table = FederatedJoin.__hash_table(spill.read("build_rows", partitions, 0),
+                                               key_width)
+            statistics["partitions"] = partitions
+
+        def combine(probe_row: tuple, build_row: tuple) -> tuple:
+            if build_side == "left":
+                return build_row + probe_row[key_width:]
+            return probe_row + build_row[key_width:]
+
+        missing = (None,) * len(right.columns)
+
+        def join(probe_rows: Iterable[tuple], hash_table: dict) -> Iterator[tuple]:
+            for probe_row in probe_rows:
+                matches = hash_table.get(probe_row[:key_width])
+                if matches:
+                    statistics["rows"] += len(matches)
+                    for build_row in matches:
+                        yield combine(probe_row, build_row)
+                elif join_type == "left":
+                    statistics["rows"] += 1
+                    yield probe_row + missing
+
+        def probe_stream() -> Iterator[tuple]:
+            for probe_row in FederatedJoin.__fetch(probe, fetch_size):
+                statistics["probe_rows"] += 1
+                if spill is not None and None not in probe_row[:key_width]:
+                    key_hash = hash(probe_row[:key_width]) & HASH_MASK
+                    if key_hash % partitions:
+                        spill.add("probe_rows", key_hash, probe_row)
+                        continue
+                yield probe_row
+
+        def joined_rows() -> Iterator[tuple]:
+            nonlocal table
+            try:
+                yield from join(probe_stream(), table)
+                if spill is None:
+                    return
+                spill.partition("probe_rows", partitions)
+                for partition in range(1, partitions):
+                    table = FederatedJoin.__hash_table(
+                        spill.read("build_rows", partitions, partition), key_width)
+                    yield from join(spill.read("probe_rows", partitions, partition), table)
+            finally:
+                if spill is not None:
+                    statistics["spilled_rows"] = spill.rows
+                    spill.close()
+
+        return column_names, joined_rows()
+
+    @staticmethod
+    def execute(left: JoinSide, right: JoinSide, join_type: str = "inner",
+                build_side: Optional[str] = None, max_memory_rows: int = 1000000,
+                fetch_size: int = 10000, spill_directory: Optional[str] = None,
+                renderer: Optional[Renderer] = None) -> dict:
+        """
+        Joins two tables on different databases and streams the joined rows to a renderer
+        (see `iterate`).
+
+        Returns:
+            dict: The rows read and joined, the build side, the spilled partitions and rows,
+                  and the seconds taken.
+        """
+        start_time = time.perf_counter()
+        statistics: dict = {}
+        column_names, rows = FederatedJoin.iterate(left, right, join_type, build_side,
+                                                   max_memory_rows, fetch_size,
+                                                   spill_directory, statistics)
+        build_time = round(time.perf_counter() - start_time, 3)
+        (renderer or AsciiRenderer()).render(column_names, rows, build_time)
+        statistics["seconds"] = round(time.perf_counter() - start_time, 3)
+
+        build, probe = (left, right) if statistics["build_side"] == "left" else (right, left)
+        spilled = (f", spilled {statistics['spilled_rows']} rows in "
+                   f"{statistics['partitions']} partitions" if statistics["partitions"] else "")
+        print(f"Joined {statistics['probe_rows']} rows of '{probe.table_name}' with "
+              f"{statistics['build_rows']} rows of '{build.table_name}' into "
+              f"{statistics['rows']} rows{spilled} in time: ({statistics['seconds']} sec)")
+        return statistics
+
+    @staticmethod
+    def __projection(side: JoinSide, select: str) -> str:
+        """The query reading a side, filtered by its where clause"""
+        where = f" WHERE {side.where}" if side.where else ""
+        return f"SELECT {select} FROM {side.table_name}{where};"
+
+    @staticmethod
+    def __count(side: JoinSide) -> int:
+        """The number of rows of a side"""
+        side.cursor_object.execute(FederatedJoin.__projection(side, "COUNT(*)"),
+                                   side.parameters)
+        return side.cursor_object.fetchone()[0]
+
+    @staticmethod
+    def __fetch(side: JoinSide, fetch_size: int) -> Iterator[tuple]:
+        """Yields the key columns and the columns of a side, fetching fetch_size rows at a time"""
+        select = ", ".join(list(side.key_columns) + list(side.columns))
+        side.cursor_object.execute(FederatedJoin.__projection(side, select), side.parameters)
+        while rows := side.cursor_object.fetchmany(fetch_size):
+            for row in rows:
+                yield tuple(row)
+
+    @staticmethod
+    def __hash_table(rows: Iterable[tuple], key_width: int) -> dict:
+        """The rows grouped by their key"""
+        table: dict = {}
+        for row in rows:
+            table.setdefault(row[:key_width], []).append(row)
+        return table
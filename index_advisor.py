@@ -0,0 +1,361 @@
+""" Index advisor built from captured query plans and index usage statistics """
+
+# Import the required modules
+
+import re
+from dataclasses import dataclass
+from typing import Optional
+from .constants import Constants
+from .renderers import AsciiRenderer, Renderer
+from .sql_utilities import SQLUtilities
+
+
+@dataclass
+class IndexSuggestion:
+    """A suggested index to create (kind "missing") or drop (kind "unused")"""
+    kind: str
+    table_name: str
+    columns: tuple
+    estimated_benefit: float
+    benefit_unit: str
+    executions: int
+    reason: str
+    statement: str
+
+
+class IndexAdvisor:
+    """
+    Records the queries run through `SQLUtilities` and suggests missing and unused indexes.
+
+    Example:
+        advisor = IndexAdvisor()
+        advisor.attach()
+        ... run queries with SQLUtilities.execute_display_query_results ...
+        advisor.display_suggestions(cursor_object)
+    """
+
+    ANALYZED_STATEMENTS: tuple = ("select", "update", "delete", "with")
+    PREDICATE_PATTERN = re.compile(
+        r"(?:\b(\w+)\.)?\b(\w+)\s*(?:=|<>|!=|<=|>=|<|>|\bNOT\s+LIKE\b|\bLIKE\b|\bNOT\s+IN\b"
+        r"|\bIN\b|\bBETWEEN\b|\bIS\b)", re.IGNORECASE)
+    TABLE_PATTERN = re.compile(
+        r"\b(?:FROM|JOIN|UPDATE)\s+(?:\w+\.)?(\w+)(?:\s+(?:AS\s+)?(?!ON\b|USING\b|WHERE\b|"
+        r"JOIN\b|INNER\b|LEFT\b|RIGHT\b|FULL\b|CROSS\b|NATURAL\b|GROUP\b|ORDER\b|LIMIT\b|"
+        r"SET\b)(\w+))?", re.IGNORECASE)
+    CLAUSE_END_PATTERN = re.compile(r"\b(?:GROUP\s+BY|ORDER\s+BY|LIMIT|HAVING|UNION|WINDOW)\b",
+                                    re.IGNORECASE)
+
+    def __init__(self):
+        # (cursor type, normalized query) -> [query, executions, total seconds]
+        self.__queries: dict = {}
+
+    def attach(self) -> None:
+        """Starts recording the queries run through `SQLUtilities`"""
+        SQLUtilities.add_query_listener(self.record)
+
+    def detach(self) -> None:
+        """Stops recording queries"""
+        SQLUtilities.remove_query_listener(self.record)
+
+    def record(self, query: str, cursor_object: object, exec_time: float = 0.0,
+               parameters: object = None, **_) -> None:
+        """
+        Records one execution of a query. Only SELECT, UPDATE and DELETE statements
+        without bind parameters are kept, since only those can be explained as is.
+
+        Args:
+            query (str): The SQL query that was executed.
+            cursor_object (object): The cursor the query was executed with.
+            exec_time (float): The time the query took, in seconds.
+            parameters (object): The bind parameters of the query, if any.
+        """
+        normalized = " ".join(query.split()).rstrip(";")
+        if parameters or not normalized.lower().startswith(IndexAdvisor.ANALYZED_STATEMENTS):
+            return
+        key = (SQLUtilities._get_cursor_type_name(cursor_object), normalized)
+        entry = self.__queries.setdefault(key, [normalized, 0, 0.0])
+        entry[1] += 1
+        entry[2] += exec_time or 0.0
+
+    def clear(self) -> None:
+        """Forgets the recorded queries"""
+        self.__queries.clear()
+
+    def analyze(self, cursor_object: object) -> list[IndexSuggestion]:
+        """
+        Explains the recorded queries of the cursor's database type and combines the plans
+        with the index usage catalog into ranked suggestions.
+
+        Missing indexes are suggested for tables that a plan reads with a full scan while
+        the query filters (or joins) them on columns that do not lead an existing index.
+        Their benefit is the estimated number of rows read that the index avoids:
+        executions x table rows. Unused indexes are non-unique indexes without scans in
+        the usage catalog (`pg_stat_user_indexes`, `sys.schema_unused_indexes`) or, on
+        SQLite, indexes from `index_list` that none of the recorded plans used. Their
+        benefit is the space reclaimed in bytes (dropping them also speeds up writes).
+
+        Args:
+            cursor_object (object): A database cursor object used to explain the queries.
+
+        Returns:
+            list[IndexSuggestion]: Missing indexes by benefit, then unused indexes by size.
+
+        Raises:
+            ValueError: If the database type is not supported.
+        """
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        if cursor_type not in (Constants.MYSQL, Constants.POSTGRES, Constants.SQLITE):
+            raise ValueError(f"Unsupported cursor type: {cursor_type}")
+
+        explain = {Constants.MYSQL: IndexAdvisor.__explain_mysql,
+                   Constants.POSTGRES: IndexAdvisor.__explain_postgres,
+                   Constants.SQLITE: IndexAdvisor.__explain_sqlite}[cursor_type]
+
+        # table -> {columns: [executions, reason, sample query]}, table -> row estimate
+        candidates: dict = {}
+        table_rows: dict = {}
+        used_indexes: set = set()
+        columns_cache: dict = {}
+        leading_columns_cache: dict = {}
+
+        for (query_type, _), (query, executions, _) in self.__queries.items():
+            if query_type != cursor_type:
+                continue
+            try:
+                scans, indexes = explain(query, cursor_object)
+            except Exception as error:  # pylint: disable=broad-except
+                print(f"Could not explain the query '{query[:60]}': {error}")
+                continue
+            used_indexes.update(indexes)
+            aliases = IndexAdvisor.__get_table_aliases(query)
+            where_columns, join_columns = IndexAdvisor.__get_predicate_columns(query)
+
+            for scanned_name, estimated_rows in scans:
+                table_name = aliases.get(scanned_name, scanned_name)
+                if table_name not in columns_cache:
+                    columns_cache[table_name] = {column[0].lower() for column in
+                                                 SQLUtilities.get_columns(table_name,
+                                                                          cursor_object)}
+                    leading_columns_cache[table_name] = IndexAdvisor.__get_leading_columns(
+                        table_name, cursor_object, cursor_type)
+                table_columns = columns_cache[table_name]
+                indexed = leading_columns_cache[table_name]
+
+                def owned(columns: list) -> list:
+                    # Unqualified columns belong to this table if it has a column of that name
+                    return [column for qualifier, column in columns
+                            if column.lower() in table_columns
+                            and (qualifier is None or aliases.get(qualifier, qualifier)
+                                 == table_name)
+                            and column.lower() not in indexed]
+
+                columns, reason = owned(where_columns), "full scan filtered on"
+                if not columns:
+                    columns, reason = owned(join_columns), "full scan joined on"
+                if not columns:
+                    continue
+                columns = tuple(dict.fromkeys(column.lower() for column in columns))
+                table_rows[table_name] = max(table_rows.get(table_name, 0), estimated_rows or 0)
+                entry = candidates.setdefault(table_name, {}).setdefault(
+                    columns, [0, reason, query])
+                entry[0] += executions
+
+        suggestions = []
+        for table_name, column_sets in candidates.items():
+            rows = table_rows[table_name] or IndexAdvisor.__count_rows(table_name, cursor_object)
+            for columns, (executions, reason, query) in column_sets.items():
+                suggestions.append(IndexSuggestion(
+                    kind="missing", table_name=table_name, columns=columns,
+                    estimated_benefit=float(executions * rows), benefit_unit="rows read",
+                    executions=executions,
+                    reason=f"{reason} {', '.join(columns)}: {query[:80]}",
+                    statement=f"CREATE INDEX idx_{table_name}_{'_'.join(columns)} "
+                              f"ON {table_name} ({', '.join(columns)});"))
+        suggestions.sort(key=lambda suggestion: suggestion.estimated_benefit, reverse=True)
+
+        unused = IndexAdvisor.__get_unused_indexes(cursor_object, cursor_type, used_indexes)
+        unused.sort(key=lambda suggestion: suggestion.estimated_benefit, reverse=True)
+        return suggestions + unused
+
+    def display_suggestions(self, cursor_object: object,
+                            renderer: Optional[Renderer] = None) -> list[IndexSuggestion]:
+        """
+        Analyzes the recorded queries and displays the ranked suggestions.
+
+        Args:
+            cursor_object (object): A database cursor object used to explain the queries.
+            renderer (Renderer, optional): The renderer to write the table with.
+
+        Returns:
+            list[IndexSuggestion]: The suggestions that were displayed.
+        """
+        suggestions = self.analyze(cursor_object)
+        (renderer or AsciiRenderer(row_limit=None)).render(
+            ["kind", "table", "columns", "estimated benefit", "executions", "statement"],
+            [(suggestion.kind, suggestion.table_name, ", ".join(suggestion.columns),
+              f"{suggestion.estimated_benefit:,.0f} {suggestion.benefit_unit}",
+              suggestion.executions, suggestion.statement) for suggestion in suggestions])
+        return suggestions
+
+    @staticmethod
+    def __explain_sqlite(query: str, cursor_object: object) -> tuple[list, set]:
+        """Returns the full scans (name, None) and the indexes used in a SQLite plan"""
+        cursor_object.execute(f"EXPLAIN QUERY PLAN {query}")
+        scans, indexes = [], set()
+        for *_, detail in cursor_object.fetchall():
+            index = re.search(r"USING (?:COVERING )?INDEX (\w+)", detail)
+            if index:
+                indexes.add(index.group(1))
+            # A scan through an index (e.g. to avoid a sort) still reads every row
+            scan = re.match(r"SCAN (?:TABLE )?(\w+)(?: AS (\w+))?"
+                            r"(?: USING (?:COVERING )?INDEX \w+)?$", detail)
+            if scan:
+                scans.append((scan.group(2) or scan.group(1), None))
+        return scans, indexes
+
+    @staticmethod
+    def __explain_mysql(query: str, cursor_object: object) -> tuple[list, set]:
+        """Returns the full scans (name, rows) and the indexes used in a MySQL plan"""
+        cursor_object.execute(f"EXPLAIN {query}")
+        column_names = [name.lower() for name in cursor_object.column_names]
+        scans, indexes = [], set()
+        for row in cursor_object.fetchall():
+            plan = dict(zip(column_names, row))
+            if plan.get("key"):
+                indexes.add(plan["key"])
+            if plan.get("type") == "ALL" and plan.get("table"):
+                scans.append((plan["table"], plan.get("rows")))
+        return scans, indexes
+
+    @staticmethod
+    def __explain_postgres(query: str, cursor_object: object) -> tuple[list, set]:
+        """Returns the sequential scans (alias, rows) and the indexes used in a Postgres plan"""
+        cursor_object.execute(f"EXPLAIN (FORMAT JSON) {query}")
+        plan = cursor_object.fetchone()[0]
+        scans, indexes = [], set()
+        nodes = [plan[0]["Plan"]]
+        while nodes:
+            node = nodes.pop()
+            nodes.extend(node.get("Plans", []))
+            if node.get("Index Name"):
+                indexes.add(node["Index Name"])
+            if node.get("Node Type") == "Seq Scan":
+                scans.append((node.get("Alias") or node.get("Relation Name"),
+                              node.get("Plan Rows")))
+        return scans, indexes
+
+    @staticmethod
+    def __get_table_aliases(query: str) -> dict:
+        """Maps the aliases (and names) used in FROM/JOIN/UPDATE clauses to table names"""
+        aliases = {}
+        for table_name, alias in IndexAdvisor.TABLE_PATTERN.findall(query):
+            aliases[table_name] = table_name
+            if alias:
+                aliases[alias] = table_name
+        return aliases
+
+    @staticmethod
+    def __get_predicate_columns(query: str) -> tuple[list, list]:
+        """Returns the (qualifier, column) pairs compared in WHERE and in JOIN clauses"""
+        where_columns, join_columns = [], []
+        for clause in re.split(r"\bWHERE\b", query, flags=re.IGNORECASE)[1:]:
+            clause = IndexAdvisor.CLAUSE_END_PATTERN.split(clause)[0]
+            # Strip string literals so their contents are not taken for columns
+            clause = re.sub(r"'(?:[^']|'')*'", "''", clause)
+            where_columns.extend((qualifier or None, column) for qualifier, column
+                                 in IndexAdvisor.PREDICATE_PATTERN.findall(clause)
+                                 if not column.isdigit())
+        for condition in re.findall(r"\bON\b(.*?)(?=\bJOIN\b|\bWHERE\b|\bGROUP\b|\bORDER\b|$)",
+                                    query, flags=re.IGNORECASE):
+            join_columns.extend((qualifier or None, column) for qualifier, column
+                                in re.findall(r"(?:\b(\w+)\.)?\b(\w+)\s*=", condition)
+                                + re.findall(r"=\s*(?:\b(\w+)\.)?\b(\w+)", condition))
+        for columns in re.findall(r"\bUSING\s*\(([^)]*)\)", query, flags=re.IGNORECASE):
+            join_columns.extend((None, column.strip()) for column in columns.split(","))
+        return where_columns, join_columns
+
+    @staticmethod
+    def __get_leading_columns(table_name: str, cursor_object: object, cursor_type: str) -> set:
+        """Returns the lower-cased first column of every existing index on the table"""
+        match cursor_type:
+            case Constants.SQLITE:
+                cursor_object.execute(f"""SELECT info.name FROM pragma_index_list('{table_name}')
+                                          AS list, pragma_index_info(list.name) AS info
+                                          WHERE info.seqno = 0;""")
+                columns = {row[0].lower() for row in cursor_object.fetchall() if row[0]}
+                # The rowid alias (INTEGER PRIMARY KEY) is indexed without an index entry
+                columns.update(column[0].lower() for column in
+                               SQLUtilities.get_columns(table_name, cursor_object)
+                               if column[3])
+                return columns
+            case Constants.POSTGRES:
+                cursor_object.execute(f"""SELECT a.attname FROM pg_index i
+                                          JOIN pg_attribute a ON a.attrelid = i.indrelid
+                                          AND a.attnum = i.indkey[0]
+                                          WHERE i.indrelid = '{table_name}'::regclass;""")
+            case Constants.MYSQL:
+                cursor_object.execute(f"""SELECT COLUMN_NAME FROM information_schema.STATISTICS
+                                          WHERE TABLE_SCHEMA = DATABASE()
+                                          AND TABLE_NAME = '{table_name}'
+                                          AND SEQ_IN_INDEX = 1;""")
+        return {row[0].lower() for row in cursor_object.fetchall()}
+
+    @staticmethod
+    def __count_rows(table_name: str, cursor_object: object) -> int:
+        cursor_object.execute(f"SELECT COUNT(*) FROM {table_name};")
+        return cursor_object.fetchone()[0]
+
+    @staticmethod
+    def __get_unused_indexes(cursor_object: object, cursor_type: str,
+                             used_indexes: set) -> list[IndexSuggestion]:
+        """Returns drop suggestions for the indexes the usage catalog reports as unused"""
+        match cursor_type:
+            case Constants.POSTGRES:
+                cursor_object.execute("""SELECT s.relname, s.indexrelname,
+                                         pg_relation_size(s.indexrelid)
+                                         FROM pg_stat_user_indexes s
+                                         JOIN pg_index i ON i.indexrelid = s.indexrelid
+                                         WHERE s.idx_scan = 0 AND NOT i.indisunique
+                                         AND NOT i.indisprimary;""")
+                unused = cursor_object.fetchall()
+                reason = "no scans recorded in pg_stat_user_indexes"
+            case Constants.MYSQL:
+                cursor_object.execute("""SELECT u.object_name, u.index_name,
+                                         COALESCE(s.stat_value * @@innodb_page_size, 0)
+                                         FROM sys.schema_unused_indexes u
+                                         LEFT JOIN mysql.innodb_index_stats s
+                                         ON s.database_name = u.object_schema
+                                         AND s.table_name = u.object_name
+                                         AND s.index_name = u.index_name
+                                         AND s.stat_name = 'size'
+                                         WHERE u.object_schema = DATABASE();""")
+                unused = cursor_object.fetchall()
+                reason = "listed in sys.schema_unused_indexes"
+            case _:
+                cursor_object.execute("""SELECT list.name, m.name FROM sqlite_schema AS m,
+                                         pragma_index_list(m.name) AS list
+                                         WHERE m.type = 'table' AND list.origin = 'c'
+                                         AND list."unique" = 0;""")
+                indexes = [(table_name, index_name) for index_name, table_name
+                           in cursor_object.fetchall() if index_name not in used_indexes]
+                unused = [(table_name, index_name,
+                           IndexAdvisor.__get_sqlite_index_size(index_name, cursor_object))
+                          for table_name, index_name in indexes]
+                reason = "not used by any recorded query plan"
+
+        return [IndexSuggestion(kind="unused", table_name=table_name, columns=(index_name,),
+                                estimated_benefit=float(size or 0), benefit_unit="bytes",
+                                executions=0, reason=reason,
+                                statement=(f"DROP INDEX {index_name} ON {table_name};"
+                                           if cursor_type == Constants.MYSQL
+                                           else f"DROP INDEX {index_name};"))
+                for table_name, index_name, size in unused if index_name not in used_indexes]
+
+    @staticmethod
+    def __get_sqlite_index_size(index_name: str, cursor_object: object) -> int:
+        """Returns the size of an index from the dbstat table, or 0 when it is not compiled in"""
+        try:
+            cursor_object.execute(f"SELECT SUM(pgsize) FROM dbstat WHERE name = '{index_name}';")
+            return cursor_object.fetchone()[0] or 0
+        except Exception:  # pylint: disable=broad-except
+            return 0
@@ -0,0 +1,268 @@
+""" Streaming reads and previews of large BLOB/bytea/TEXT values """
+
+# Import the required modules
+
+import codecs
+import time
+from dataclasses import dataclass
+from typing import Iterator, Optional, Union
+from .constants import Constants
+from .dialects import get_dialect
+from .renderers import AsciiRenderer, Renderer
+from .sql_utilities import SQLUtilities
+from .table_copy import TableCopy
+
+
+@dataclass
+class LargeValuePreview:
+    """The first bytes (or characters) of a large value and its full size"""
+    head: Union[bytes, str]
+    size: int
+
+    def __str__(self) -> str:
+        if isinstance(self.head, (bytes, bytearray, memoryview)):
+            return f"0x{bytes(self.head).hex()}... ({self.size:,} bytes)"
+        return f"{self.head}... ({self.size:,} chars)"
+
+
+class LargeObjects:
+    """Reads large values in chunks and displays tables without fetching them in full"""
+
+    DEFAULT_CHUNK_SIZE: int = 1024 * 1024
+    # Type families whose values can be large
+    LARGE_FAMILIES: tuple = ("binary", "text", "json")
+
+    @staticmethod
+    def read_chunks(table_name: str, column_name: str, key_column: str, key_value: object,
+                    cursor_object: object,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Union[bytes, str]]:
+        """
+        Yields one value of a row in chunks, never holding the whole value in memory.
+
+        - SQLite: an incremental blob handle (`Connection.blobopen`); text is decoded
+          incrementally from its UTF-8 bytes.
+        - PostgreSQL: `oid` columns are read as large objects (`connection.lobject`, which
+          needs a transaction, i.e. no autocommit); bytea and text with `substring` reads.
+          Compressed TOAST values are decompressed by every read; store large columns with
+          `ALTER TABLE ... ALTER COLUMN ... SET STORAGE EXTERNAL` to read only each slice.
+        - MySQL: `SUBSTRING` reads.
+
+        Binary values are yielded as bytes, text as str (chunk_size then counts characters
+        on PostgreSQL and MySQL).
+
+        Args:
+            table_name (str): The table holding the value.
+            column_name (str): The column holding the value.
+            key_column (str): The column identifying the row, e.g. its primary key.
+            key_value (object): The key of the row.
+            cursor_object (object): A database cursor object used to read the value.
+            chunk_size (int): The number of bytes (or characters) read at a time.
+
+        Raises:
+            ValueError: If the row or column does not exist, chunk_size is not positive
+                        or the database type is not supported.
+        """
+        if not table_name.strip():
+            raise ValueError(Constants.INVALID_TABLE_ARGUMENT)
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer.")
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        placeholder = get_dialect(cursor_type).PLACEHOLDER
+        key_condition = f"{key_column} = {placeholder}"
+
+        match cursor_type:
+            case Constants.SQLITE:
+                yield from LargeObjects.__read_sqlite_chunks(
+                    table_name, column_name, key_condition, key_value, cursor_object, chunk_size)
+            case Constants.POSTGRES:
+                declared_type = LargeObjects.__declared_type(table_name, column_name,
+                                                             cursor_object)
+                if declared_type.lower() == "oid":
+                    cursor_object.execute(f"SELECT {column_name} FROM {table_name} "
+                                          f"WHERE {key_condition};", (key_value,))
+                    oid = LargeObjects.__fetch_value(cursor_object, table_name, key_value)
+                    if oid is None:
+                        return
+                    large_object = SQLUtilities._get_connection(cursor_object).lobject(oid, "rb")
+                    try:
+                        while chunk := large_object.read(chunk_size):
+                            yield chunk
+                    finally:
+                        large_object.close()
+                    return
+                yield from LargeObjects.__read_substrings(
+                    f"SELECT substring({column_name} FROM {placeholder} FOR {placeholder}) "
+                    f"FROM {table_name} WHERE {key_condition};",
+                    table_name, key_value, cursor_object, chunk_size)
+            case Constants.MYSQL:
+                yield from LargeObjects.__read_substrings(
+                    f"SELECT SUBSTRING({column_name}, {placeholder}, {placeholder}) "
+                    f"FROM {table_name} WHERE {key_condition};",
+                    table_name, key_value, cursor_object, chunk_size)
+            case _:
+                raise ValueError(f"Unsupported cursor type: {cursor_type}")
+
+    @staticmethod
+    def export_value(table_name: str, column_name: str, key_column: str, key_value: object,
+                     cursor_object: object, path: str,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        Streams one value into a file (text is written UTF-8 encoded) with `read_chunks`.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        start_time = time.perf_counter()
+        written = 0
+        with open(path, "wb") as output_file:
+            for chunk in LargeObjects.read_chunks(table_name, column_name, key_column,
+                                                  key_value, cursor_object, chunk_size):
+                written += output_file.write(chunk.encode("utf-8") if isinstance(chunk, str)
+                                             else bytes(chunk))
+        exec_time = round(time.perf_counter() - start_time, 3)
+        print(f"Exported {written:,} bytes of '{table_name}.{column_name}' to '{path}' "
+              f"in time: ({exec_time} sec)")
+        return written
+
+    @staticmethod
+    def display_table(table_name: str, cursor_object: object, where: Optional[str] = None,
+                      parameters: Optional[tuple] = None, limit: Optional[int] = 50,
+                      preview_size: int = 16, renderer: Optional[Renderer] = None) -> int:
+        """
+        Displays the rows of a table with only a preview and the size of its binary, text
+        and JSON columns read from the server, so large values are never transferred.
+
+        Args:
+            table_name (str): The table to display.
+            cursor_object (object): A database cursor object used to execute SQL queries.
+            where (str, optional): A filter for the rows.
+            parameters (tuple, optional): Values bound to the placeholders of `where`.
+            limit (int, optional): The maximum number of rows read, None for all rows.
+            preview_size (int): The number of bytes (or characters) of each large value read.
+            renderer (Renderer, optional): The renderer used to display the rows.
+
+        Returns:
+            int: The number of rows displayed.
+
+        Raises:
+            ValueError: If the table does not exist or the database type is not supported.
+        """
+        if not table_name.strip():
+            raise ValueError(Constants.INVALID_TABLE_ARGUMENT)
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        columns = SQLUtilities.get_columns(table_name, cursor_object)
+        if not columns:
+            raise ValueError(f"Table '{table_name}' does not exist or has no columns.")
+
+        expressions, large_columns = [], []
+        for index, (column_name, declared_type, _, _) in enumerate(columns):
+            family = TableCopy.get_type_family(declared_type)[0]
+            if family not in LargeObjects.LARGE_FAMILIES:
+                expressions.append(column_name)
+                continue
+            large_columns.append(index)
+            expressions.extend(LargeObjects.__preview_expressions(
+                cursor_type, column_name, family, preview_size))
+
+        query = f"SELECT {', '.join(expressions)} FROM {table_name}"
+        if where:
+            query += f" WHERE {where}"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        start_time = time.perf_counter()
+        if parameters is None:
+            cursor_object.execute(query + ";")
+        else:
+            cursor_object.execute(query + ";", parameters)
+        exec_time = round(time.perf_counter() - start_time, 3)
+
+        def rows() -> Iterator[tuple]:
+            while fetched := cursor_object.fetchmany(1000):
+                for row in fetched:
+                    values, position = [], 0
+                    for index in range(len(columns)):
+                        if index in large_columns:
+                            head, size = row[position], row[position + 1]
+                            values.append(LargeValuePreview(head, size)
+                                          if size is not None and size > preview_size
+                                          else head)
+                            position += 2
+                        else:
+                            values.append(row[position])
+                            position += 1
+                    yield tuple(values)
+
+        return (renderer or AsciiRenderer(row_limit=None)).render(
+            [column[0] for column in columns], rows(), exec_time)
+
+    @staticmethod
+    def __preview_expressions(cursor_type: str, column_name: str, family: str,
+                              preview_size: int) -> list[str]:
+        """The SQL reading the first `preview_size` bytes/characters and the size of a column"""
+        match cursor_type:
+            case Constants.SQLITE:
+                # length() counts bytes for blobs and characters for text
+                return [f"substr({column_name}, 1, {preview_size})", f"length({column_name})"]
+            case Constants.POSTGRES:
+                value = f"{column_name}::text" if family == "json" else column_name
+                size = "octet_length" if family == "binary" else "char_length"
+                return [f"substring({value} FROM 1 FOR {preview_size})", f"{size}({value})"]
+            case Constants.MYSQL:
+                value = f"CAST({column_name} AS CHAR)" if family == "json" else column_name
+                size = "LENGTH" if family == "binary" else "CHAR_LENGTH"
+                return [f"SUBSTRING({value}, 1, {preview_size})", f"{size}({value})"]
+            case _:
+                raise ValueError(f"Unsupported cursor type: {cursor_type}")
+
+    @staticmethod
+    def __read_sqlite_chunks(table_name: str, column_name: str, key_condition: str,
+                             key_value: object, cursor_object: object,
+                             chunk_size: int) -> Iterator[Union[bytes, str]]:
+        cursor_object.execute(f"SELECT rowid, typeof({column_name}) FROM {table_name} "
+                              f"WHERE {key_condition};", (key_value,))
+        row = cursor_object.fetchone()
+        if row is None:
+            raise ValueError(f"No row of '{table_name}' has the key {key_value!r}.")
+        rowid, value_type = row
+        if value_type == "null":
+            return
+        if value_type not in ("blob", "text"):
+            raise ValueError(f"'{table_name}.{column_name}' holds a {value_type}, "
+                             f"not a blob or text.")
+        connection = SQLUtilities._get_connection(cursor_object)
+        decoder = codecs.getincrementaldecoder("utf-8")() if value_type == "text" else None
+        with connection.blobopen(table_name, column_name, rowid, readonly=True) as blob:
+            while chunk := blob.read(chunk_size):
+                yield decoder.decode(chunk) if decoder else chunk
+        if decoder:
+            if tail := decoder.decode(b"", final=True):
+                yield tail
+
+    @staticmethod
+    def __read_substrings(query: str, table_name: str, key_value: object, cursor_object: object,
+                          chunk_size: int) -> Iterator[Union[bytes, str]]:
+        offset = 1
+        while True:
+            cursor_object.execute(query, (offset, chunk_size, key_value))
+            chunk = LargeObjects.__fetch_value(cursor_object, table_name, key_value)
+            if not chunk:
+                return
+            chunk = bytes(chunk) if isinstance(chunk, (bytearray, memoryview)) else chunk
+            yield chunk
+            if len(chunk) < chunk_size:
+                return
+            offset += chunk_size
+
+    @staticmethod
+    def __fetch_value(cursor_object: object, table_name: str, key_value: object) -> object:
+        row = cursor_object.fetchone()
+        if row is None:
+            raise ValueError(f"No row of '{table_name}' has the key {key_value!r}.")
+        return row[0]
+
+    @staticmethod
+    def __declared_type(table_name: str, column_name: str, cursor_object: object) -> str:
+        for name, declared_type, _, _ in SQLUtilities.get_columns(table_name, cursor_object):
+            if name == column_name:
+                return declared_type
+        raise ValueError(f"Column '{column_name}' does not exist in '{table_name}'.")
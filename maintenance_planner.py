@@ -0,0 +1,408 @@
+""" Plans and runs ANALYZE / VACUUM / OPTIMIZE from per-table health signals """
+
+# Import the required modules
+
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+from .constants import Constants
+from .dialects import get_dialect
+from .renderers import AsciiRenderer, Renderer
+from .sql_utilities import SQLUtilities
+
+
+@dataclass
+class TableHealth:
+    """The maintenance signals of a table (or, for SQLite file space, of the database)"""
+    table_name: str
+    size_bytes: Optional[int]
+    rows: Optional[int]
+    dead_rows: Optional[int]
+    free_bytes: Optional[int]
+    modified_rows: Optional[int]
+    seconds_since_analyze: Optional[float]
+    analyzed: bool
+    scope: str = "table"
+
+
+@dataclass
+class MaintenanceTask:
+    """A maintenance statement scheduled for a table"""
+    table_name: str
+    operation: str
+    statement: str
+    reason: str
+    priority: float
+    estimated_seconds: float
+
+
+class MaintenancePlanner:
+    """
+    Reads health signals, plans maintenance and runs it within a time budget.
+
+    - PostgreSQL (`pg_stat_user_tables`): `VACUUM (ANALYZE)` for tables with many dead
+      tuples, `ANALYZE` for tables never analyzed, with many rows modified since, or with
+      old statistics. VACUUM cannot run in a transaction: the connection is switched to
+      autocommit while the task runs.
+    - MySQL (`information_schema.TABLES`): `OPTIMIZE TABLE` for tables with much free space
+      (`DATA_FREE`), `ANALYZE TABLE` for tables whose statistics are older than their data.
+    - SQLite: `VACUUM` when many pages are on the freelist, `ANALYZE` for tables without
+      statistics, and a final `PRAGMA optimize` (which re-analyzes where it helps).
+    """
+
+    # A table needs VACUUM / OPTIMIZE above this share of dead rows or free space
+    DEAD_RATIO: float = 0.2
+    MIN_DEAD_ROWS: int = 1000
+    FREE_RATIO: float = 0.2
+    MIN_FREE_BYTES: int = 16 * 1024 * 1024
+    # A table needs ANALYZE above this share of modified rows or when its statistics are older
+    MODIFIED_RATIO: float = 0.1
+    STALE_ANALYZE_SECONDS: float = 7 * 24 * 3600
+    # Throughputs used to estimate how long a task takes
+    REWRITE_BYTES_PER_SECOND: float = 50 * 1024 * 1024
+    ANALYZE_BYTES_PER_SECOND: float = 500 * 1024 * 1024
+
+    POSTGRES_HEALTH_QUERY: str = """
+        SELECT s.relname, pg_table_size(s.relid), s.n_live_tup, s.n_dead_tup,
+               s.n_mod_since_analyze,
+               EXTRACT(EPOCH FROM now() - GREATEST(s.last_analyze, s.last_autoanalyze))
+        FROM pg_stat_user_tables s WHERE s.schemaname = current_schema()"""
+    MYSQL_HEALTH_QUERY: str = """
+        SELECT t.TABLE_NAME, t.DATA_LENGTH + t.INDEX_LENGTH, t.TABLE_ROWS, t.DATA_FREE,
+               TIMESTAMPDIFF(SECOND, st.last_update, NOW()),
+               t.UPDATE_TIME > st.last_update
+        FROM information_schema.TABLES t
+        LEFT JOIN mysql.innodb_table_stats st
+               ON st.database_name = t.TABLE_SCHEMA AND st.table_name = t.TABLE_NAME
+        WHERE t.TABLE_SCHEMA = DATABASE() AND t.TABLE_TYPE = 'BASE TABLE'"""
+
+    @staticmethod
+    def read_health(cursor_object: object,
+                    table_names: Optional[list[str]] = None) -> list[TableHealth]:
+        """
+        Reads the health signals of the tables of the current database (or schema).
+
+        Args:
+            cursor_object (object): A database cursor object used to execute SQL queries.
+            table_names (list[str], optional): Only read these tables.
+
+        Returns:
+            list[TableHealth]: The health of every table, plus the file space of a SQLite
+                               database (scope "database").
+
+        Raises:
+            ValueError: If the database type is not supported.
+        """
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        placeholder = get_dialect(cursor_type).PLACEHOLDER
+        filter_clause, parameters = "", ()
+        if table_names:
+            parameters = tuple(table_names)
+            filter_clause = f" IN ({', '.join([placeholder] * len(table_names))})"
+
+        match cursor_type:
+            case Constants.POSTGRES:
+                # The statistics views are otherwise read once per transaction
+                cursor_object.execute("SELECT pg_stat_clear_snapshot();")
+                cursor_object.execute(MaintenancePlanner.POSTGRES_HEALTH_QUERY
+                                      + (f" AND s.relname{filter_clause}" if filter_clause
+                                         else "") + ";", parameters)
+                return [TableHealth(name, size, live, dead,
+                                    round(size * dead / (live + dead)) if live + dead else 0,
+                                    modified, float(age) if age is not None else None,
+                                    age is not None)
+                        for name, size, live, dead, modified, age in cursor_object.fetchall()]
+            case Constants.MYSQL:
+                # Read current values instead of the cached table statistics
+                cursor_object.execute("SET SESSION information_schema_stats_expiry = 0;")
+                cursor_object.execute(MaintenancePlanner.MYSQL_HEALTH_QUERY
+                                      + (f" AND t.TABLE_NAME{filter_clause}" if filter_clause
+                                         else "") + ";", parameters)
+                return [TableHealth(name, size, rows, None, free,
+                                    (rows or 0) if changed_since else 0,
+                                    float(age) if age is not None else None, age is not None)
+                        for name, size, rows, free, age, changed_since
+                        in cursor_object.fetchall()]
+            case Constants.SQLITE:
+                return MaintenancePlanner.__read_sqlite_health(cursor_object, table_names)
+            case _:
+                raise ValueError(f"Unsupported cursor type: {cursor_type}")
+
+    @staticmethod
+    def plan(cursor_object: object,
+             health: Optional[list[TableHealth]] = None) -> list[MaintenanceTask]:
+        """
+        Plans the maintenance the health signals call for, most urgent first.
+
+        Args:
+            cursor_object (object): A database cursor object used to execute SQL queries.
+            health (list[TableHealth], optional): The signals to plan from. Read with
+                                                  `read_health` when not given.
+
+        Returns:
+            list[MaintenanceTask]: The tasks by descending priority.
+        """
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        health = MaintenancePlanner.read_health(cursor_object) if health is None else health
+        planner = MaintenancePlanner
+        tasks = []
+        for table in health:
+            size = table.size_bytes or 0
+            rewrite_seconds = round(size / planner.REWRITE_BYTES_PER_SECOND, 3)
+            analyze_seconds = round(size / planner.ANALYZE_BYTES_PER_SECOND, 3)
+            rows = table.rows or 0
+            dead_rows = table.dead_rows or 0
+            dead_ratio = dead_rows / (rows + dead_rows) if rows + dead_rows else 0.0
+            free_ratio = (table.free_bytes or 0) / size if size else 0.0
+            modified_ratio = (table.modified_rows or 0) / rows if rows else 0.0
+
+            match cursor_type:
+                case Constants.POSTGRES:
+                    if dead_rows >= planner.MIN_DEAD_ROWS and dead_ratio >= planner.DEAD_RATIO:
+                        tasks.append(MaintenanceTask(
+                            table.table_name, "VACUUM", f"VACUUM (ANALYZE) {table.table_name};",
+                            f"{dead_ratio:.0%} dead rows", 1 + dead_ratio, rewrite_seconds))
+                        continue
+                case Constants.MYSQL:
+                    if (table.free_bytes or 0) >= planner.MIN_FREE_BYTES and \
+                            free_ratio >= planner.FREE_RATIO:
+                        tasks.append(MaintenanceTask(
+                            table.table_name, "OPTIMIZE", f"OPTIMIZE TABLE {table.table_name};",
+                            f"{free_ratio:.0%} free space", 1 + free_ratio, rewrite_seconds))
+                        continue
+                case Constants.SQLITE:
+                    if table.scope == "database":
+                        if (table.free_bytes or 0) >= planner.MIN_FREE_BYTES and \
+                                free_ratio >= planner.FREE_RATIO:
+                            tasks.append(MaintenanceTask(
+                                table.table_name, "VACUUM", "VACUUM;",
+                                f"{free_ratio:.0%} of the file on the freelist",
+                                1 + free_ratio, rewrite_seconds))
+                        continue
+
+            if not table.analyzed:
+                reason, priority = "never analyzed", 2.0
+            elif modified_ratio >= planner.MODIFIED_RATIO:
+                # MySQL only tells whether the data changed after the statistics were taken
+                reason = "data changed since ANALYZE" if cursor_type == Constants.MYSQL \
+                    else f"{modified_ratio:.0%} rows modified since ANALYZE"
+                priority = modified_ratio
+            elif table.seconds_since_analyze and \
+                    table.seconds_since_analyze >= planner.STALE_ANALYZE_SECONDS:
+                reason = f"statistics {table.seconds_since_analyze / 86400:.0f} days old"
+                priority = 0.1
+            else:
+                continue
+            statement = f"ANALYZE TABLE {table.table_name};" \
+                if cursor_type == Constants.MYSQL else f"ANALYZE {table.table_name};"
+            tasks.append(MaintenanceTask(table.table_name, "ANALYZE", statement, reason,
+                                         priority, analyze_seconds))
+
+        if cursor_type == Constants.SQLITE:
+            # Cheap (analysis_limit bounded) and only re-analyzes where statistics are off
+            tasks.append(MaintenanceTask("main", "OPTIMIZE", "PRAGMA optimize;",
+                                         "periodic statistics refresh", 0.0, 0.0))
+        return sorted(tasks, key=lambda task: task.priority, reverse=True)
+
+    @staticmethod
+    def run(cursor_object: object, tasks: Optional[list[MaintenanceTask]] = None,
+            time_budget: Optional[float] = None, concurrency: int = 1,
+            connection_factory: Optional[Callable[[], object]] = None,
+            renderer: Optional[Renderer] = None) -> list[dict]:
+        """
+        Runs planned maintenance tasks, most urgent first, and reports the health of each
+        table before and after.
+
+        A task is only started if its estimated time fits in what is left of `time_budget`;
+        running tasks are never interrupted. With a `connection_factory` up to `concurrency`
+        tasks run at once, each on its own connection (PostgreSQL and MySQL).
+
+        VACUUM cannot run inside a transaction and OPTIMIZE TABLE commits implicitly, so the
+        connection must not have one open: only the read-only transactions the health
+        queries open are ended by the planner.
+
+        Args:
+            cursor_object (object): A database cursor object used to execute SQL queries.
+            tasks (list[MaintenanceTask], optional): The tasks to run. Planned with `plan`
+                                                     when not given.
+            time_budget (float, optional): The number of seconds maintenance may take.
+            concurrency (int): The number of tasks run at once.
+            connection_factory (Callable, optional): Returns a new connection to the same
+                                                     database, for concurrent tasks.
+            renderer (Renderer, optional): The renderer used for the report.
+
+        Returns:
+            list[dict]: Per task: table, operation, status (done, failed or skipped),
+                        seconds, and the health before and after.
+
+        Raises:
+            ValueError: If concurrency is not positive or the connection has an open
+                        transaction.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be a positive integer.")
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        if get_dialect(cursor_type).in_transaction(SQLUtilities._get_connection(cursor_object)):
+            raise ValueError("The connection has an open transaction: commit or roll it back "
+                             "before running maintenance.")
+        start_time = time.perf_counter()
+        health = {table.table_name: table
+                  for table in MaintenancePlanner.read_health(cursor_object)}
+        MaintenancePlanner.__end_read_transaction(cursor_object, cursor_type)
+        tasks = MaintenancePlanner.plan(cursor_object, list(health.values())) \
+            if tasks is None else tasks
+        deadline = start_time + time_budget if time_budget is not None else None
+
+        work: queue.Queue = queue.Queue()
+        for index, task in enumerate(tasks):
+            work.put((index, task))
+        results: list = [None] * len(tasks)
+
+        def worker(worker_cursor: object) -> None:
+            while True:
+                try:
+                    index, task = work.get_nowait()
+                except queue.Empty:
+                    return
+                result = {"table": task.table_name, "operation": task.operation,
+                          "reason": task.reason, "status": "skipped", "seconds": 0.0,
+                          "before": health.get(task.table_name), "after": None}
+                if deadline is None or time.perf_counter() + task.estimated_seconds <= deadline:
+                    task_start = time.perf_counter()
+                    try:
+                        MaintenancePlanner.__execute_task(task, worker_cursor, cursor_type)
+                        result["status"] = "done"
+                        after = [table for table in MaintenancePlanner.read_health(
+                            worker_cursor, None if cursor_type == Constants.SQLITE
+                            else [task.table_name]) if table.table_name == task.table_name]
+                        result["after"] = after[0] if after else None
+                        MaintenancePlanner.__end_read_transaction(worker_cursor, cursor_type)
+                    except SQLUtilities._get_driver_errors(worker_cursor) + \
+                            (sqlite3.Error,) as error:
+                        result["status"] = f"failed: {error}"
+                    result["seconds"] = round(time.perf_counter() - task_start, 3)
+                results[index] = result
+
+        if connection_factory is None or concurrency == 1 or cursor_type == Constants.SQLITE:
+            worker(cursor_object)
+        else:
+            errors: list = []
+
+            def connected_worker() -> None:
+                connection = connection_factory()
+                try:
+                    worker(connection.cursor())
+                except Exception as error:  # pylint: disable=broad-except
+                    errors.append(error)
+                finally:
+                    connection.close()
+
+            threads = [threading.Thread(target=connected_worker,
+                                        name=f"maintenance-worker-{number}")
+                       for number in range(min(concurrency, len(tasks)))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            if errors:
+                raise errors[0]
+
+        exec_time = round(time.perf_counter() - start_time, 3)
+        done = sum(result["status"] == "done" for result in results)
+        print(f"Ran {done} of {len(tasks)} maintenance tasks in time: ({exec_time} sec)")
+        (renderer or AsciiRenderer(row_limit=None)).render(
+            ["table", "operation", "reason", "status", "seconds", "before", "after"],
+            ([result["table"], result["operation"], result["reason"], result["status"],
+              result["seconds"], MaintenancePlanner.__describe(result["before"]),
+              MaintenancePlanner.__describe(result["after"])] for result in results))
+        return results
+
+    @staticmethod
+    def display_health(cursor_object: object, renderer: Optional[Renderer] = None) -> None:
+        """Displays the health signals of every table"""
+        (renderer or AsciiRenderer(row_limit=None)).render(
+            ["table", "size (bytes)", "rows", "dead rows", "free (bytes)", "modified rows",
+             "analyzed (sec ago)"],
+            ([table.table_name, table.size_bytes, table.rows, table.dead_rows, table.free_bytes,
+              table.modified_rows,
+              round(table.seconds_since_analyze) if table.seconds_since_analyze is not None
+              else ("yes" if table.analyzed else "never")]
+             for table in MaintenancePlanner.read_health(cursor_object)))
+
+    @staticmethod
+    def __execute_task(task: MaintenanceTask, cursor_object: object, cursor_type: str) -> None:
+        """Runs a task's statement, outside of a transaction where the statement needs it"""
+        connection = SQLUtilities._get_connection(cursor_object)
+        match cursor_type:
+            case Constants.POSTGRES:
+                # psycopg2 can switch to autocommit as no transaction is open (see run)
+                autocommit = connection.autocommit
+                connection.autocommit = True
+                try:
+                    cursor_object.execute(task.statement)
+                finally:
+                    connection.autocommit = autocommit
+            case Constants.MYSQL:
+                cursor_object.execute(task.statement)
+                # OPTIMIZE and ANALYZE TABLE return a status result set
+                cursor_object.fetchall()
+            case _:
+                cursor_object.execute(task.statement)
+                cursor_object.fetchall()
+
+    @staticmethod
+    def __end_read_transaction(cursor_object: object, cursor_type: str) -> None:
+        """Ends the read-only transaction the health queries opened, if they opened one"""
+        connection = SQLUtilities._get_connection(cursor_object)
+        if get_dialect(cursor_type).in_transaction(connection):
+            get_dialect(cursor_type).rollback(connection, cursor_object)
+
+    @staticmethod
+    def __read_sqlite_health(cursor_object: object,
+                             table_names: Optional[list[str]]) -> list[TableHealth]:
+        cursor_object.execute("SELECT name FROM sqlite_schema WHERE type = 'table' "
+                              "AND name NOT LIKE 'sqlite_%';")
+        tables = [row[0] for row in cursor_object.fetchall()
+                  if not table_names or row[0] in table_names]
+        cursor_object.execute("SELECT name FROM sqlite_schema WHERE name = 'sqlite_stat1';")
+        statistics = {}
+        if cursor_object.fetchone():
+            cursor_object.execute("SELECT tbl, stat FROM sqlite_stat1;")
+            for table_name, stat in cursor_object.fetchall():
+                statistics[table_name] = int((stat or "0").split()[0])
+        sizes = {}
+        try:
+            # The dbstat virtual table is only available when SQLite is built with it
+            cursor_object.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name;")
+            sizes = dict(cursor_object.fetchall())
+        except sqlite3.OperationalError:
+            pass
+
+        health = [TableHealth(table_name, sizes.get(table_name), statistics.get(table_name),
+                              None, None, None, None, table_name in statistics)
+                  for table_name in tables]
+        if not table_names:
+            page_size = cursor_object.execute("PRAGMA page_size;").fetchone()[0]
+            page_count = cursor_object.execute("PRAGMA page_count;").fetchone()[0]
+            freelist = cursor_object.execute("PRAGMA freelist_count;").fetchone()[0]
+            health.append(TableHealth("main", page_count * page_size, None, None,
+                                      freelist * page_size, None, None, True, "database"))
+        return health
+
+    @staticmethod
+    def __describe(health: Optional[TableHealth]) -> Optional[str]:
+        """A short text of the signals a task acts on"""
+        if health is None:
+            return None
+        parts = []
+        if health.dead_rows is not None:
+            parts.append(f"dead={health.dead_rows}")
+        if health.free_bytes is not None:
+            parts.append(f"free={health.free_bytes / (1024 * 1024):.1f}MiB")
+        if health.modified_rows is not None:
+            parts.append(f"modified={health.modified_rows}")
+        parts.append("analyzed" if health.analyzed else "not analyzed")
+        return ", ".join(parts)
@@ -0,0 +1,321 @@
+""" Parallel scans of SQLite tables by rowid range in a process pool """
+
+# Import the required modules
+
+import concurrent.futures
+import math
+import os
+import sqlite3
+import time
+from typing import Optional, Union
+from .constants import Constants
+from .renderers import AsciiRenderer, Renderer
+from .sql_utilities import SQLUtilities
+from .sqlite_connection import SQLiteConnectionFactory
+
+
+class Reducer:
+    """
+    Base class of the mergeable aggregates computed by `ParallelScan`.
+
+    Every rowid range is reduced on its own, in a worker process, and the partial results
+    are merged afterwards. A reducer can work in SQL, in Python, or both:
+
+    - `sql` returns aggregate expressions SQLite evaluates per range; `finalize` receives
+      one tuple of their values per range.
+    - `columns` returns expressions selected row by row; each worker folds its rows with
+      `initial` and `accumulate`, the partial states are merged with `combine` and the
+      merged state is passed to `finalize`.
+
+    Reducers are sent to the worker processes, so subclasses must be picklable (defined at
+    module level).
+    """
+
+    def __init__(self, expression: str = "*"):
+        """
+        Args:
+            expression (str): The column or SQL expression the reducer aggregates.
+        """
+        self.expression = expression
+
+    def sql(self) -> list[str]:
+        """The aggregate expressions computed by SQLite for each range"""
+        return []
+
+    def columns(self) -> list[str]:
+        """The expressions whose values are passed row by row to `accumulate`"""
+        return []
+
+    def initial(self) -> object:
+        """The state a worker starts each range with"""
+        return None
+
+    def accumulate(self, state: object, values: tuple) -> object:  # pylint: disable=unused-argument
+        """Folds the values of one row (in `columns` order) into the state"""
+        return state
+
+    def combine(self, first: object, second: object) -> object:  # pylint: disable=unused-argument
+        """Merges the states of two ranges"""
+        return first
+
+    def finalize(self, partials: list[tuple], state: object) -> object:
+        """Returns the result from the per range SQL values and the merged state"""
+        raise NotImplementedError
+
+
+class Count(Reducer):
+    """COUNT(expression)"""
+
+    def sql(self) -> list[str]:
+        return [f"COUNT({self.expression})"]
+
+    def finalize(self, partials: list[tuple], state: object) -> object:
+        return sum(partial[0] for partial in partials)
+
+
+class Sum(Reducer):
+    """SUM(expression), None when every value is NULL"""
+
+    def sql(self) -> list[str]:
+        return [f"SUM({self.expression})"]
+
+    def finalize(self, partials: list[tuple], state: object) -> object:
+        values = [partial[0] for partial in partials if partial[0] is not None]
+        if not values:
+            return None
+        # fsum keeps float totals as exact as a single pass over the table
+        return sum(values) if all(isinstance(value, int) for value in values) else math.fsum(values)
+
+
+class Min(Reducer):
+    """MIN(expression)"""
+
+    def sql(self) -> list[str]:
+        return [f"MIN({self.expression})"]
+
+    def finalize(self, partials: list[tuple], state: object) -> object:
+        values = [partial[0] for partial in partials if partial[0] is not None]
+        return min(values) if values else None
+
+
+class Max(Reducer):
+    """MAX(expression)"""
+
+    def sql(self) -> list[str]:
+        return [f"MAX({self.expression})"]
+
+    def finalize(self, partials: list[tuple], state: object) -> object:
+        values = [partial[0] for partial in partials if partial[0] is not None]
+        return max(values) if values else None
+
+
+class Avg(Reducer):
+    """AVG(expression), merged from the per range sums and counts"""
+
+    def sql(self) -> list[str]:
+        return [f"TOTAL({self.expression})", f"COUNT({self.expression})"]
+
+    def finalize(self, partials: list[tuple], state: object) -> object:
+        count = sum(partial[1] for partial in partials)
+        return math.fsum(partial[0] for partial in partials) / count if count else None
+
+
+# The read-only connection of a worker process, opened by ParallelScan._init_worker
+_WORKER_CONNECTION: Optional[sqlite3.Connection] = None
+
+
+class ParallelScan:
+    """Aggregates SQLite tables with one read-only connection per core"""
+
+    @staticmethod
+    def aggregate(database: Union[str, object], table_name: str, reducers: dict[str, Reducer],
+                  workers: Optional[int] = None, ranges_per_worker: int = 4,
+                  where: Optional[str] = None, parameters: tuple = (),
+                  profile: str = "read_heavy_analytics") -> dict:
+        """
+        Computes aggregates over a table by scanning rowid ranges in parallel.
+
+        The rowid span of the table is split into `workers * ranges_per_worker` ranges.
+        A process pool with one read-only connection per worker process (opened with
+        `SQLiteConnectionFactory`) reduces the ranges, and the partial results are merged.
+        Several ranges per worker even out ranges of different density. Changes not yet
+        committed on other connections are not visible to the scan.
+
+        Example:
+            ParallelScan.aggregate("onlinestore.db", "tbl_orders",
+                                   {"orders": Count(), "revenue": Sum("amount"),
+                                    "average": Avg("amount")})
+
+        Args:
+            database (str | sqlite3.Cursor): The database file, or a cursor on it.
+            table_name (str): The table to scan. It must have a rowid.
+            reducers (dict[str, Reducer]): The result names mapped to their reducers.
+            workers (int, optional): The number of worker processes. Defaults to the
+                                     number of CPUs.
+            ranges_per_worker (int): The number of rowid ranges per worker.
+            where (str, optional): A filter applied to the rows of every range.
+            parameters (tuple): Values bound to the placeholders of `where`.
+            profile (str): The SQLiteConnectionFactory profile of the worker connections.
+
+        Returns:
+            dict: The result names mapped to the aggregated values.
+
+        Raises:
+            ValueError: If the table name is empty, there are no reducers, the database is
+                        in memory or workers/ranges_per_worker is not positive.
+        """
+        if not table_name.strip():
+            raise ValueError(Constants.INVALID_TABLE_ARGUMENT)
+        if not reducers:
+            raise ValueError("At least one reducer is required.")
+        workers = workers or os.cpu_count() or 1
+        if workers < 1 or ranges_per_worker < 1:
+            raise ValueError("workers and ranges_per_worker must be positive integers.")
+        database = ParallelScan.__database_file(database)
+
+        start_time = time.perf_counter()
+        connection = SQLiteConnectionFactory.connect(database, profile, read_only=True)
+        try:
+            low, high = connection.execute(
+                f"SELECT MIN(rowid), MAX(rowid) FROM {table_name};").fetchone()
+        finally:
+            connection.close()
+
+        ranges = []
+        if low is not None:
+            range_count = min(workers * ranges_per_worker, high - low + 1)
+            width = -(-(high - low + 1) // range_count)
+            ranges = [(start, min(start + width, high + 1))
+                      for start in range(low, high + 1, width)]
+
+        reducer_list = list(reducers.values())
+        results = []
+        if ranges:
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=min(workers, len(ranges)),
+                    initializer=ParallelScan._init_worker,
+                    initargs=(database, profile)) as executor:
+                results = list(executor.map(
+                    ParallelScan._scan_range,
+                    [(table_name, reducer_list, range_start, range_end, where, parameters)
+                     for range_start, range_end in ranges]))
+
+        aggregates = {}
+        for index, (name, reducer) in enumerate(reducers.items()):
+            partials = [partial_values[index] for partial_values, _ in results]
+            state = reducer.initial()
+            for _, states in results:
+                state = reducer.combine(state, states[index])
+            aggregates[name] = reducer.finalize(partials, state)
+
+        exec_time = round(time.perf_counter() - start_time, 3)
+        print(f"Scanned '{table_name}' in {len(ranges)} rowid ranges with "
+              f"{min(workers, len(ranges))} processes in time: ({exec_time} sec)")
+        return aggregates
+
+    @staticmethod
+    def summary_statistics(database: Union[str, object], table_name: str,
+                           column_names: Optional[list] = None, workers: Optional[int] = None,
+                           renderer: Optional[Renderer] = None) -> dict:
+        """
+        Displays Count, Min, Max, Avg and Sum of the numeric columns of a SQLite table,
+        like `SQLUtilities.summary_statistics`, computed in one parallel scan.
+
+        Args:
+            database (str | sqlite3.Cursor): The database file, or a cursor on it.
+            table_name (str): The table to summarise.
+            column_names (list, optional): Only summarise these columns.
+            workers (int, optional): The number of worker processes.
+            renderer (Renderer, optional): The renderer used to display the statistics.
+
+        Returns:
+            dict: The column names mapped to their statistics.
+        """
+        database = ParallelScan.__database_file(database)
+        connection = sqlite3.connect(database)
+        try:
+            columns = connection.execute(f"PRAGMA table_info({table_name});").fetchall()
+        finally:
+            connection.close()
+
+        # The same columns as SQLUtilities.summary_statistics: numeric, not keys or ids
+        numeric_columns = [
+            column_name for _, column_name, column_type, _, _, key in columns
+            if '_id' not in column_name and key != 1
+            and (not column_names or column_name in column_names)
+            and (column_type.lower() in Constants.NUMERIC_TYPES
+                 or 'decimal' in column_type.lower())]
+        reducers = {"rows": Count()}
+        for column_name in numeric_columns:
+            reducers.update({f"{column_name}.count": Count(column_name),
+                             f"{column_name}.max": Max(column_name),
+                             f"{column_name}.min": Min(column_name),
+                             f"{column_name}.avg": Avg(column_name),
+                             f"{column_name}.sum": Sum(column_name)})
+        aggregates = ParallelScan.aggregate(database, table_name, reducers, workers)
+
+        statistics = {column_name: {statistic: aggregates[f"{column_name}.{statistic}"]
+                                    for statistic in ("count", "max", "min", "avg", "sum")}
+                      for column_name in numeric_columns}
+        print(Constants.SUMMARY_MESSAGE.format(Constants.DASHES, table_name, Constants.DASHES))
+        (renderer or AsciiRenderer(row_limit=None)).render(
+            ["column", "COUNT", "MAX", "MIN", "AVG", "SUM"],
+            ([column_name, *values.values()] for column_name, values in statistics.items()))
+        return statistics
+
+    # The worker functions are pickled by name, so they cannot use name-mangled names
+
+    @staticmethod
+    def _init_worker(database: str, profile: str) -> None:
+        """Opens the read-only connection of a worker process"""
+        global _WORKER_CONNECTION  # pylint: disable=global-statement
+        _WORKER_CONNECTION = SQLiteConnectionFactory.connect(database, profile, read_only=True)
+
+    @staticmethod
+    def _scan_range(task: tuple) -> tuple[tuple, list]:
+        """Reduces one rowid range in a worker process"""
+        table_name, reducers, range_start, range_end, where, parameters = task
+        condition = f"rowid >= ? AND rowid < ?{f' AND ({where})' if where else ''}"
+        range_parameters = (range_start, range_end, *parameters)
+
+        expressions = [expression for reducer in reducers for expression in reducer.sql()]
+        values = ()
+        if expressions:
+            values = _WORKER_CONNECTION.execute(
+                f"SELECT {', '.join(expressions)} FROM {table_name} WHERE {condition};",
+                range_parameters).fetchone()
+        partial_values, position = [], 0
+        for reducer in reducers:
+            width = len(reducer.sql())
+            partial_values.append(tuple(values[position:position + width]))
+            position += width
+
+        states = [reducer.initial() for reducer in reducers]
+        row_columns = [reducer.columns() for reducer in reducers]
+        selected = [expression for columns in row_columns for expression in columns]
+        if selected:
+            rows = _WORKER_CONNECTION.execute(
+                f"SELECT {', '.join(selected)} FROM {table_name} WHERE {condition};",
+                range_parameters)
+            for row in rows:
+                position = 0
+                for index, reducer in enumerate(reducers):
+                    width = len(row_columns[index])
+                    if width:
+                        states[index] = reducer.accumulate(states[index],
+                                                           row[position:position + width])
+                    position += width
+        return tuple(partial_values), states
+
+    @staticmethod
+    def __database_file(database: Union[str, object]) -> str:
+        """Returns the file of a database path or SQLite cursor, rejecting in-memory ones"""
+        if not isinstance(database, str):
+            assert SQLUtilities._get_cursor_type_name(database) == Constants.SQLITE, \
+                "Please pass a sqlite cursor object"
+            database.execute("PRAGMA database_list;")
+            database = next((row[2] for row in database.fetchall() if row[1] == "main"), "")
+        if not database or database == ":memory:":
+            raise ValueError("Parallel scans need a database file; in-memory databases "
+                             "cannot be opened by other processes.")
+        return database
@@ -0,0 +1,216 @@
+""" Query log capture and concurrent replay for load testing """
+
+# Import the required modules
+
+import collections
+import json
+import queue
+import threading
+import time
+from typing import Callable, Iterable, Optional, Union
+from .dialects import get_dialect
+from .renderers import AsciiRenderer, Renderer
+from .sql_utilities import SQLUtilities
+
+
+class QueryRecorder:
+    """
+    Captures the queries run through `SQLUtilities.execute_query` and
+    `SQLUtilities.execute_display_query_results`.
+
+    Each entry holds the SQL, parameters, backend, start timestamp, duration and row
+    count. The most recent `capacity` entries are kept in a ring buffer; with a
+    `spill_path` every entry is also appended to a JSON Lines file through a write buffer.
+
+    Example:
+        with QueryRecorder(spill_path="queries.jsonl") as recorder:
+            ... run queries ...
+        QueryReplayer.replay("queries.jsonl", connection_factory, workers=8)
+    """
+
+    FIELDS: tuple = ("timestamp", "backend", "sql", "parameters", "seconds", "rows")
+
+    def __init__(self, capacity: int = 10000, spill_path: Optional[str] = None,
+                 spill_buffer_size: int = 1024 * 1024):
+        """
+        Args:
+            capacity (int): The number of entries kept in memory.
+            spill_path (str, optional): A JSON Lines file every entry is appended to.
+            spill_buffer_size (int): The size in bytes of the spill file write buffer.
+        """
+        self.__entries: collections.deque = collections.deque(maxlen=capacity)
+        self.__spill_path = spill_path
+        self.__spill_buffer_size = spill_buffer_size
+        self.__spill_file = None
+        self.__lock = threading.Lock()
+
+    def start(self) -> "QueryRecorder":
+        """Starts capturing queries"""
+        if self.__spill_path and self.__spill_file is None:
+            self.__spill_file = open(self.__spill_path, "a", encoding="utf-8",
+                                     buffering=self.__spill_buffer_size)
+        SQLUtilities.add_query_listener(self.record)
+        return self
+
+    def stop(self) -> None:
+        """Stops capturing queries and flushes the spill file"""
+        SQLUtilities.remove_query_listener(self.record)
+        with self.__lock:
+            if self.__spill_file is not None:
+                self.__spill_file.close()
+                self.__spill_file = None
+
+    def __enter__(self) -> "QueryRecorder":
+        return self.start()
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+    def record(self, query: str, cursor_object: object, parameters: object = None,
+               exec_time: float = 0.0, row_count: Optional[int] = None, **_) -> None:
+        """Records one executed query (called by `SQLUtilities` as a query listener)"""
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        # Entries are stored as tuples in FIELDS order; dicts are only built when read
+        entry = (time.time() - exec_time, get_dialect(cursor_type).NAME, query,
+                 list(parameters) if parameters is not None else None, exec_time, row_count)
+        with self.__lock:
+            self.__entries.append(entry)
+            if self.__spill_file is not None:
+                self.__spill_file.write(QueryRecorder.__encode(entry) + "\n")
+
+    @property
+    def entries(self) -> list[dict]:
+        """The entries currently in the ring buffer, oldest first"""
+        with self.__lock:
+            return [dict(zip(QueryRecorder.FIELDS, entry)) for entry in self.__entries]
+
+    def save(self, path: str) -> None:
+        """Writes the entries of the ring buffer to a JSON Lines file"""
+        with self.__lock:
+            entries = list(self.__entries)
+        with open(path, "w", encoding="utf-8") as log_file:
+            log_file.writelines(QueryRecorder.__encode(entry) + "\n" for entry in entries)
+
+    @staticmethod
+    def load(path: str) -> list[dict]:
+        """Reads the entries of a JSON Lines query log"""
+        with open(path, encoding="utf-8") as log_file:
+            return [json.loads(line) for line in log_file if line.strip()]
+
+    @staticmethod
+    def __encode(entry: tuple) -> str:
+        return json.dumps(dict(zip(QueryRecorder.FIELDS, entry)), default=str)
+
+
+class QueryReplayer:
+    """Replays captured query logs against a database with concurrent workers"""
+
+    @staticmethod
+    def replay(log: Union[str, Iterable[dict]], connection_factory: Callable[[], object],
+               workers: int = 4, speed: Optional[float] = 1.0, backend: Optional[str] = None,
+               renderer: Optional[Renderer] = None) -> dict:
+        """
+        Re-runs a captured query log and reports throughput and latency percentiles.
+
+        Every worker opens its own connection with `connection_factory`, takes the next
+        query from the log and, unless `speed` is None, waits until the query's original
+        start offset divided by `speed` (2.0 replays twice as fast). Result rows are fetched
+        and discarded, and each statement is committed.
+
+        Parameters pass through JSON, so values such as dates are replayed as strings.
+
+        Args:
+            log (str | Iterable[dict]): A JSON Lines file path or entries from a recorder.
+            connection_factory (Callable): Returns a new connection to the target database.
+            workers (int): The number of concurrent workers (and connections).
+            speed (float, optional): Replay rate relative to the capture; None for as
+                                     fast as possible.
+            backend (str, optional): Only replay entries captured on this backend
+                                     ("mysql", "postgres" or "sqlite").
+            renderer (Renderer, optional): The renderer used for the report.
+
+        Returns:
+            dict: Query and error counts, elapsed seconds, queries per second and
+                  latency percentiles in milliseconds.
+
+        Raises:
+            ValueError: If workers or speed is not positive, or the log has no entries.
+        """
+        if workers < 1:
+            raise ValueError("workers must be a positive integer.")
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be positive, or None for as fast as possible.")
+
+        entries = QueryRecorder.load(log) if isinstance(log, str) else list(log)
+        entries = sorted((entry for entry in entries
+                          if backend is None or entry.get("backend") == backend),
+                         key=lambda entry: entry["timestamp"])
+        if not entries:
+            raise ValueError("The query log has no entries to replay.")
+
+        first_timestamp = entries[0]["timestamp"]
+        work: queue.Queue = queue.Queue()
+        for entry in entries:
+            work.put(entry)
+        latencies: list = []
+        errors: list = []
+        lock = threading.Lock()
+        start_time = time.perf_counter()
+
+        def worker():
+            connection = connection_factory()
+            cursor_object = connection.cursor()
+            try:
+                while True:
+                    try:
+                        entry = work.get_nowait()
+                    except queue.Empty:
+                        return
+                    if speed is not None:
+                        delay = (start_time + (entry["timestamp"] - first_timestamp) / speed
+                                 - time.perf_counter())
+                        if delay > 0:
+                            time.sleep(delay)
+                    query_start = time.perf_counter()
+                    try:
+                        if entry.get("parameters") is None:
+                            cursor_object.execute(entry["sql"])
+                        else:
+                            cursor_object.execute(entry["sql"], tuple(entry["parameters"]))
+                        if cursor_object.description:
+                            while cursor_object.fetchmany(1000):
+                                pass
+                        connection.commit()
+                    except Exception as error:  # pylint: disable=broad-except
+                        with lock:
+                            errors.append(error)
+                        connection.rollback()
+                        continue
+                    with lock:
+                        latencies.append(time.perf_counter() - query_start)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, name=f"replay-worker-{number}")
+                   for number in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        elapsed = time.perf_counter() - start_time
+        latencies.sort()
+        report = {
+            "queries": len(latencies), "errors": len(errors), "seconds": round(elapsed, 3),
+            "queries_per_second": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        }
+        for percentile in (50, 90, 95, 99, 100):
+            index = max(0, -(-percentile * len(latencies) // 100) - 1)
+            report[f"p{percentile}_ms" if percentile < 100 else "max_ms"] = (
+                round(latencies[index] * 1000, 3) if latencies else None)
+
+        (renderer or AsciiRenderer(row_limit=None)).render(["metric", "value"],
+                                                            report.items())
+        if errors:
+            print(f"First error: {errors[0]}")
+        return report
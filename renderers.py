@@ -0,0 +1,326 @@
+""" Output renderers for query results: ASCII, Markdown, HTML, CSV and JSON Lines """
+
+# Import the required modules
+
+import io
+import sys
+from abc import ABC, abstractmethod
+from typing import Iterable, Optional, TextIO
+
+
+class Renderer(ABC):
+    """
+    Base class of the query result renderers.
+
+    A renderer writes a result set incrementally to a file-like sink (anything with a
+    `write(str)` method, `sys.stdout` by default). Output is collected in an in-memory
+    buffer and handed to the sink once `buffer_size` characters have accumulated, so large
+    results are neither built up as one giant string nor written with one call per row.
+
+    Subclasses implement `_write_header`, `_write_row` and `_write_footer`.
+    """
+
+    # The number of rows shown by default, None for no limit
+    DEFAULT_ROW_LIMIT: Optional[int] = None
+    # Binary values show their first PREVIEW_BYTES bytes, and text longer than
+    # LARGE_TEXT_CHARS its first PREVIEW_CHARS (None shows text in full)
+    PREVIEW_BYTES: int = 16
+    LARGE_TEXT_CHARS: Optional[int] = 4096
+    PREVIEW_CHARS: int = 64
+
+    def __init__(self, sink: Optional[TextIO] = None, row_limit: Optional[int] = -1,
+                 buffer_size: int = 64 * 1024):
+        """
+        Args:
+            sink (TextIO, optional): The file-like object to write to. Defaults to sys.stdout.
+            row_limit (int, optional): The maximum number of rows to write, None for all rows.
+                                       Defaults to the renderer's DEFAULT_ROW_LIMIT.
+            buffer_size (int): The number of characters buffered before writing to the sink.
+        """
+        self.sink = sink
+        self.row_limit = self.DEFAULT_ROW_LIMIT if row_limit == -1 else row_limit
+        self.buffer_size = buffer_size
+        self.__buffer: list = []
+        self.__buffered = 0
+
+    def render(self, column_names: list[str], rows: Iterable,
+               exec_time: Optional[float] = None) -> int:
+        """
+        Writes a result set to the sink.
+
+        All rows are consumed (so cursors are fully read and counted) but only the first
+        `row_limit` rows are written.
+
+        Args:
+            column_names (list[str]): The names of the columns in the result set.
+            rows (Iterable): The rows of the result set, e.g. a generator over `fetchmany`.
+            exec_time (float, optional): The time taken to execute the query.
+
+        Returns:
+            int: The number of rows in the result set.
+        """
+        row_count = 0
+        self._write_header(list(column_names))
+        for row in rows:
+            if self.row_limit is None or row_count < self.row_limit:
+                self._write_row(row)
+            row_count += 1
+        truncated = self.row_limit is not None and row_count > self.row_limit
+        self._write_footer(row_count, exec_time, truncated)
+        self.flush()
+        return row_count
+
+    def write(self, text: str) -> None:
+        """Buffers text for the sink, writing the buffer out once it is full"""
+        self.__buffer.append(text)
+        self.__buffered += len(text)
+        if self.__buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the buffered text to the sink"""
+        if self.__buffer:
+            sink = self.sink or sys.stdout
+            sink.write("".join(self.__buffer))
+            self.__buffer.clear()
+            self.__buffered = 0
+            if hasattr(sink, "flush"):
+                sink.flush()
+
+    @classmethod
+    def format_value(cls, value: object) -> str:
+        """
+        Returns the text shown for a value, NULL for None.
+
+        Binary values are shown in hex, followed by their size once they are cut, so a large
+        BLOB is neither copied nor decoded in full just to be displayed. Text longer than
+        LARGE_TEXT_CHARS is cut the same way; the CSV and JSON Lines exports set it to None
+        and keep text in full.
+        """
+        if value is None:
+            return "NULL"
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            head = memoryview(value)[:cls.PREVIEW_BYTES].hex()
+            size = memoryview(value).nbytes
+            return f"0x{head}" if size <= cls.PREVIEW_BYTES else f"0x{head}... ({size:,} bytes)"
+        if isinstance(value, str):
+            if cls.LARGE_TEXT_CHARS is None or len(value) <= cls.LARGE_TEXT_CHARS:
+                return value
+            return f"{value[:cls.PREVIEW_CHARS]}... ({len(value):,} chars)"
+        return str(value)
+
+    @staticmethod
+    def row_count_message(row_count: int, exec_time: Optional[float]) -> str:
+        """Returns the 'n rows returned' summary line"""
+        message = "row returned" if row_count == 1 else "rows returned"
+        timing = f" in time: ({exec_time} sec)" if exec_time is not None else ""
+        return f"{row_count} {message}{timing}"
+
+    @abstractmethod
+    def _write_header(self, column_names: list[str]) -> None:
+        """Writes what comes before the rows"""
+
+    @abstractmethod
+    def _write_row(self, row: tuple) -> None:
+        """Writes one row"""
+
+    @abstractmethod
+    def _write_footer(self, row_count: int, exec_time: Optional[float], truncated: bool) -> None:
+        """Writes what comes after the rows, e.g. the row count"""
+
+
+class AsciiRenderer(Renderer):
+    """
+    Renders results as the ASCII grid printed by `SQLUtilities.execute_display_query_results`.
+
+    Column widths are computed from the first rows (all written rows when a row limit is set,
+    otherwise the first `width_sample_rows` rows), which are held back until the widths are
+    known. Later rows are streamed with those widths and only widen their own line.
+    """
+
+    DEFAULT_ROW_LIMIT: Optional[int] = 50
+
+    def __init__(self, sink: Optional[TextIO] = None, row_limit: Optional[int] = -1,
+                 buffer_size: int = 64 * 1024, width_sample_rows: int = 1000):
+        super().__init__(sink, row_limit, buffer_size)
+        self.width_sample_rows = width_sample_rows
+        self.__column_names: list = []
+        self.__column_widths: list = []
+        self.__pending_rows: Optional[list] = None
+
+    def _write_header(self, column_names: list[str]) -> None:
+        self.__column_names = column_names
+        self.__column_widths = [len(name) for name in column_names]
+        self.__pending_rows = []
+
+    def _write_row(self, row: tuple) -> None:
+        values = [self.format_value(value) for value in row]
+        if self.__pending_rows is None:
+            self.__write_values(values)
+            return
+        for index, value in enumerate(values):
+            self.__column_widths[index] = max(self.__column_widths[index], len(value))
+        self.__pending_rows.append(values)
+        if len(self.__pending_rows) >= (self.row_limit or self.width_sample_rows):
+            self.__write_pending_rows()
+
+    def _write_footer(self, row_count: int, exec_time: Optional[float], truncated: bool) -> None:
+        self.__write_pending_rows()
+        self.__write_plus_dashes()
+        if truncated:
+            self.write(f"!!!Result Truncated. Showing only {self.row_limit} results!!!\n")
+        self.write(f"{self.row_count_message(row_count, exec_time)}\n\n\n")
+
+    def __write_pending_rows(self) -> None:
+        """Writes the header and the rows held back to compute the column widths"""
+        if self.__pending_rows is None:
+            return
+        pending_rows, self.__pending_rows = self.__pending_rows, None
+        self.__write_plus_dashes()
+        self.__write_values(self.__column_names)
+        self.__write_plus_dashes()
+        for values in pending_rows:
+            self.__write_values(values)
+
+    def __write_plus_dashes(self) -> None:
+        self.write("+" + "+".join("-" * (length + 2) for length in self.__column_widths) + "+\n")
+
+    def __write_values(self, values: list[str]) -> None:
+        self.write("|" + "|".join(f" {value:^{self.__column_widths[index]}} "
+                                  for index, value in enumerate(values)) + "|\n")
+
+
+class MarkdownRenderer(Renderer):
+    """Renders results as a Markdown (GitHub flavoured) table"""
+
+    DEFAULT_ROW_LIMIT: Optional[int] = 50
+
+    @staticmethod
+    def __escape(value: str) -> str:
+        return value.replace("|", "\\|").replace("\n", " ")
+
+    def _write_header(self, column_names: list[str]) -> None:
+        self.write("| " + " | ".join(self.__escape(name) for name in column_names) + " |\n")
+        self.write("|" + "|".join(" --- " for _ in column_names) + "|\n")
+
+    def _write_row(self, row: tuple) -> None:
+        self.write("| " + " | ".join(self.__escape(self.format_value(value))
+                                     for value in row) + " |\n")
+
+    def _write_footer(self, row_count: int, exec_time: Optional[float], truncated: bool) -> None:
+        if truncated:
+            self.write(f"\n_Result truncated. Showing only {self.row_limit} results._\n")
+        self.write(f"\n_{self.row_count_message(row_count, exec_time)}_\n\n")
+
+
+class HtmlRenderer(Renderer):
+    """
+    Renders results as an HTML table.
+
+    Without a sink the table is displayed as rich output in Jupyter, or printed
+    when IPython is not available.
+    """
+
+    DEFAULT_ROW_LIMIT: Optional[int] = 50
+
+    def __init__(self, sink: Optional[TextIO] = None, row_limit: Optional[int] = -1,
+                 buffer_size: int = 64 * 1024):
+        super().__init__(sink, row_limit, buffer_size)
+        # Imported on use so that importing the renderers stays cheap
+        import html  # pylint: disable=import-outside-toplevel
+        self.__escape = html.escape
+        self.__display_in_notebook = sink is None
+        if self.__display_in_notebook:
+            # Collect the (row limited) table so it can be displayed as one output
+            self.buffer_size = sys.maxsize
+
+    def _write_header(self, column_names: list[str]) -> None:
+        self.write("<table>\n<thead><tr>"
+                   + "".join(f"<th>{self.__escape(str(name))}</th>" for name in column_names)
+                   + "</tr></thead>\n<tbody>\n")
+
+    def _write_row(self, row: tuple) -> None:
+        self.write("<tr>" + "".join(f"<td>{self.__escape(self.format_value(value))}</td>"
+                                    for value in row) + "</tr>\n")
+
+    def _write_footer(self, row_count: int, exec_time: Optional[float], truncated: bool) -> None:
+        self.write("</tbody>\n</table>\n")
+        if truncated:
+            self.write(f"<p>Result truncated. Showing only {self.row_limit} results.</p>\n")
+        self.write(f"<p>{self.row_count_message(row_count, exec_time)}</p>\n")
+
+    def flush(self) -> None:
+        if not self.__display_in_notebook:
+            super().flush()
+            return
+        try:
+            from IPython.display import HTML, display  # pylint: disable=import-outside-toplevel
+        except ImportError:
+            super().flush()
+            return
+
+        collector = io.StringIO()
+        self.sink = collector
+        super().flush()
+        self.sink = None
+        if collector.getvalue():
+            display(HTML(collector.getvalue()))
+
+
+class CsvRenderer(Renderer):
+    """Renders results as CSV with a header row; NULL values are written as empty fields"""
+
+    # Exports are lossless: text is never cut to a preview
+    LARGE_TEXT_CHARS: Optional[int] = None
+
+    def __init__(self, sink: Optional[TextIO] = None, row_limit: Optional[int] = -1,
+                 buffer_size: int = 64 * 1024, **csv_options):
+        """
+        Args:
+            csv_options: Formatting options passed to `csv.writer` (delimiter, quoting, ...).
+        """
+        super().__init__(sink, row_limit, buffer_size)
+        import csv  # pylint: disable=import-outside-toplevel
+        csv_options.setdefault("lineterminator", "\n")
+        self.__writer = csv.writer(self, **csv_options)
+
+    def _write_header(self, column_names: list[str]) -> None:
+        self.__writer.writerow(column_names)
+
+    def _write_row(self, row: tuple) -> None:
+        self.__writer.writerow(row)
+
+    def _write_footer(self, row_count: int, exec_time: Optional[float], truncated: bool) -> None:
+        pass
+
+
+class JsonLinesRenderer(Renderer):
+    """Renders results as JSON Lines, one object per row keyed by column name"""
+
+    # Exports are lossless: text is never cut to a preview
+    LARGE_TEXT_CHARS: Optional[int] = None
+
+    def __init__(self, sink: Optional[TextIO] = None, row_limit: Optional[int] = -1,
+                 buffer_size: int = 64 * 1024):
+        super().__init__(sink, row_limit, buffer_size)
+        self.__column_names: list = []
+        import json  # pylint: disable=import-outside-toplevel
+        self.__encoder = json.JSONEncoder(default=str, ensure_ascii=False)
+
+    def _write_header(self, column_names: list[str]) -> None:
+        self.__column_names = column_names
+
+    def _write_row(self, row: tuple) -> None:
+        self.write(self.__encoder.encode(dict(zip(self.__column_names, row))) + "\n")
+
+    def _write_footer(self, row_count: int, exec_time: Optional[float], truncated: bool) -> None:
+        pass
+
+
+RENDERERS: dict = {
+    "ascii": AsciiRenderer,
+    "markdown": MarkdownRenderer,
+    "html": HtmlRenderer,
+    "csv": CsvRenderer,
+    "jsonl": JsonLinesRenderer,
+}
@@ -0,0 +1,361 @@
+""" Whole-database DDL export for MySQL, Postgres and Sqlite """
+
+# Import the required modules
+
+import queue
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional, TextIO, Union
+from .constants import Constants
+from .sql_utilities import SQLUtilities
+
+
+@dataclass
+class SchemaObject:
+    """One object of a schema dump and the objects it must be created after"""
+    kind: str
+    name: str
+    statement: str = ""
+    depends_on: list = field(default_factory=list)
+
+
+class SchemaDump:
+    """Exports the DDL of all tables, views and indexes of a database"""
+
+    # The order object kinds are written in; dependencies are resolved within each kind
+    KIND_ORDER: tuple = ("schema", "sequence", "table", "view", "index", "trigger")
+
+    USER_SCHEMA_FILTER: str = """n.nspname NOT IN ('pg_catalog', 'information_schema')
+                                 AND n.nspname NOT LIKE 'pg\\_%'"""
+
+    # A quoted ("", ``, []) or bare SQLite identifier
+    SQLITE_IDENTIFIER = re.compile(r'"((?:[^"]|"")+)"|`([^`]+)`|\[([^\]]+)\]|([A-Za-z_][\w$]*)')
+
+    @staticmethod
+    def dump_schema(cursor_object: object, sink: Union[str, TextIO],
+                    connection_factory: Optional[Callable[[], object]] = None,
+                    workers: int = 4, buffer_size: int = 1024 * 1024) -> dict:
+        """
+        Writes the DDL of every table, view and index of the current database.
+
+        - MySQL: `SHOW CREATE TABLE` / `SHOW CREATE VIEW` per object (indexes are part of
+          the table DDL). With a `connection_factory` the statements are fetched over
+          `workers` parallel connections.
+        - PostgreSQL: built from a few bulk catalog queries (`format_type`,
+          `pg_get_constraintdef`, `pg_get_indexdef`, `pg_get_viewdef`) for all user schemas,
+          including the sequences, partitioned tables and partitions.
+        - SQLite: the statements stored in `sqlite_schema`, including triggers.
+
+        Objects are written by kind (schemas, sequences, tables, views, indexes, triggers)
+        and, within a kind, after the objects they depend on: tables after the tables their
+        foreign keys reference and views after the views they select from. Objects in a
+        dependency cycle are written in their original order.
+
+        Args:
+            cursor_object (object): A database cursor object used to execute SQL queries.
+            sink (str | TextIO): The file path or file-like object to write the DDL to.
+            connection_factory (Callable, optional): Returns a new connection to the same
+                                                     MySQL database, for parallel fetching.
+            workers (int): The number of parallel MySQL connections.
+            buffer_size (int): The size of the file write buffer when `sink` is a path.
+
+        Returns:
+            dict: The number of objects written per kind and the elapsed seconds.
+
+        Raises:
+            ValueError: If workers is not positive or the database type is not supported.
+        """
+        if workers < 1:
+            raise ValueError("workers must be a positive integer.")
+        start_time = time.perf_counter()
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        match cursor_type:
+            case Constants.MYSQL:
+                objects = SchemaDump.__collect_mysql(cursor_object, connection_factory, workers)
+                header = "SET FOREIGN_KEY_CHECKS = 0;\n\n"
+                footer = "SET FOREIGN_KEY_CHECKS = 1;\n"
+            case Constants.POSTGRES:
+                objects = SchemaDump.__collect_postgres(cursor_object)
+                header, footer = "", ""
+            case Constants.SQLITE:
+                objects = SchemaDump.__collect_sqlite(cursor_object)
+                header, footer = "PRAGMA foreign_keys = OFF;\n\n", ""
+            case _:
+                raise ValueError(f"Unsupported cursor type: {cursor_type}")
+
+        dump_file = open(sink, "w", encoding="utf-8", buffering=buffer_size) \
+            if isinstance(sink, str) else sink
+        counts: dict = {}
+        try:
+            dump_file.write(header)
+            for schema_object in SchemaDump.order_objects(objects):
+                dump_file.write(f"-- {schema_object.kind}: {schema_object.name}\n"
+                                f"{schema_object.statement.strip().rstrip(';')};\n\n")
+                counts[schema_object.kind] = counts.get(schema_object.kind, 0) + 1
+            dump_file.write(footer)
+        finally:
+            if isinstance(sink, str):
+                dump_file.close()
+
+        report = {**counts, "seconds": round(time.perf_counter() - start_time, 3)}
+        print(f"Dumped {sum(counts.values())} objects "
+              f"({', '.join(f'{count} {kind}' for kind, count in counts.items())}) "
+              f"in time: ({report['seconds']} sec)")
+        return report
+
+    @staticmethod
+    def order_objects(objects: list[SchemaObject]) -> list[SchemaObject]:
+        """
+        Orders schema objects by kind, then so that each object follows the objects it
+        depends on. The original order is kept wherever the dependencies allow it.
+
+        Args:
+            objects (list[SchemaObject]): The objects to order.
+
+        Returns:
+            list[SchemaObject]: The objects in creation order.
+        """
+        ordered: list = []
+        for kind in SchemaDump.KIND_ORDER:
+            pending = [schema_object for schema_object in objects if schema_object.kind == kind]
+            names = {schema_object.name for schema_object in pending}
+            emitted: set = set()
+            while pending:
+                ready = [schema_object for schema_object in pending
+                         if all(name in emitted or name not in names or name == schema_object.name
+                                for name in schema_object.depends_on)]
+                # A dependency cycle: write the first remaining object as is
+                ready = ready or pending[:1]
+                ordered.extend(ready)
+                emitted.update(schema_object.name for schema_object in ready)
+                pending = [schema_object for schema_object in pending
+                           if schema_object.name not in emitted]
+        return ordered
+
+    @staticmethod
+    def __collect_mysql(cursor_object: object, connection_factory: Optional[Callable],
+                        workers: int) -> list[SchemaObject]:
+        """Lists the tables and views with their dependencies and fetches their DDL"""
+        cursor_object.execute("SELECT DATABASE();")
+        database_name = cursor_object.fetchone()[0]
+        cursor_object.execute("""SELECT table_name, table_type FROM information_schema.tables
+                                 WHERE table_schema = DATABASE() ORDER BY table_name;""")
+        objects = {name: SchemaObject("view" if table_type == "VIEW" else "table", name)
+                   for name, table_type in cursor_object.fetchall()}
+
+        cursor_object.execute("""SELECT table_name, referenced_table_name
+                                 FROM information_schema.referential_constraints
+                                 WHERE constraint_schema = DATABASE();""")
+        dependencies = cursor_object.fetchall()
+        try:
+            # information_schema.view_table_usage is available from MySQL 8.0.13
+            cursor_object.execute("""SELECT view_name, table_name
+                                     FROM information_schema.view_table_usage
+                                     WHERE view_schema = DATABASE();""")
+            dependencies += cursor_object.fetchall()
+        except SQLUtilities._get_driver_errors(cursor_object):
+            pass
+        for name, referenced_name in dependencies:
+            if name in objects:
+                objects[name].depends_on.append(referenced_name)
+
+        def fetch_statement(fetch_cursor: object, schema_object: SchemaObject) -> None:
+            statement_kind = "VIEW" if schema_object.kind == "view" else "TABLE"
+            fetch_cursor.execute(f"SHOW CREATE {statement_kind} `{schema_object.name}`;")
+            schema_object.statement = fetch_cursor.fetchone()[1]
+
+        if connection_factory is None or workers == 1:
+            for schema_object in objects.values():
+                fetch_statement(cursor_object, schema_object)
+            return list(objects.values())
+
+        work: queue.Queue = queue.Queue()
+        for schema_object in objects.values():
+            work.put(schema_object)
+        errors: list = []
+
+        def worker():
+            connection = connection_factory()
+            try:
+                worker_cursor = connection.cursor()
+                worker_cursor.execute(f"USE `{database_name}`;")
+                while not errors:
+                    try:
+                        schema_object = work.get_nowait()
+                    except queue.Empty:
+                        return
+                    fetch_statement(worker_cursor, schema_object)
+            except Exception as error:  # pylint: disable=broad-except
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, name=f"schema-dump-worker-{number}")
+                   for number in range(min(workers, len(objects)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return list(objects.values())
+
+    @staticmethod
+    def __collect_postgres(cursor_object: object) -> list[SchemaObject]:
+        """Builds the DDL of the user schemas from bulk catalog queries"""
+        user_schemas = SchemaDump.USER_SCHEMA_FILTER
+        objects: list = []
+
+        cursor_object.execute(f"""SELECT format('%I', n.nspname) FROM pg_namespace n
+                                  WHERE {user_schemas} AND n.nspname <> 'public'
+                                  ORDER BY n.nspname;""")
+        objects += [SchemaObject("schema", name, f"CREATE SCHEMA IF NOT EXISTS {name}")
+                    for name, in cursor_object.fetchall()]
+
+        # Sequences owned by identity columns are created with their column
+        cursor_object.execute(f"""SELECT format('%I.%I', n.nspname, c.relname)
+                                  FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+                                  WHERE c.relkind = 'S' AND {user_schemas}
+                                  AND NOT EXISTS (SELECT 1 FROM pg_depend d
+                                                  WHERE d.objid = c.oid AND d.deptype = 'i')
+                                  ORDER BY 1;""")
+        objects += [SchemaObject("sequence", name, f"CREATE SEQUENCE IF NOT EXISTS {name}")
+                    for name, in cursor_object.fetchall()]
+
+        cursor_object.execute(f"""
+            SELECT c.oid, format('%I.%I', n.nspname, c.relname), c.relkind = 'p',
+                   pg_get_partkeydef(c.oid), c.relispartition, pg_get_expr(c.relpartbound, c.oid),
+                   (SELECT format('%I.%I', pn.nspname, p.relname) FROM pg_inherits i
+                    JOIN pg_class p ON p.oid = i.inhparent
+                    JOIN pg_namespace pn ON pn.oid = p.relnamespace
+                    WHERE i.inhrelid = c.oid LIMIT 1)
+            FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relkind IN ('r', 'p') AND {user_schemas}
+            ORDER BY 2;""")
+        tables = {}
+        for oid, name, is_partitioned, partition_key, is_partition, bound, parent in \
+                cursor_object.fetchall():
+            tables[oid] = {"name": name, "lines": [], "depends_on": [parent] if parent else [],
+                           "partition_key": partition_key if is_partitioned else None,
+                           "partition_of": (parent, bound) if is_partition else None}
+
+        cursor_object.execute(f"""
+            SELECT a.attrelid, format('%I', a.attname), format_type(a.atttypid, a.atttypmod),
+                   a.attnotnull, pg_get_expr(d.adbin, d.adrelid), a.attidentity, a.attgenerated
+            FROM pg_attribute a
+            JOIN pg_class c ON c.oid = a.attrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+            WHERE c.relkind IN ('r', 'p') AND {user_schemas}
+            AND a.attnum > 0 AND NOT a.attisdropped AND a.attislocal
+            ORDER BY a.attrelid, a.attnum;""")
+        for oid, column_name, column_type, not_null, default, identity, generated in \
+                cursor_object.fetchall():
+            line = f"{column_name} {column_type}"
+            if generated:
+                line += f" GENERATED ALWAYS AS ({default}) STORED"
+            elif identity:
+                line += (" GENERATED ALWAYS AS IDENTITY" if identity == "a"
+                         else " GENERATED BY DEFAULT AS IDENTITY")
+            elif default is not None:
+                line += f" DEFAULT {default}"
+            if not_null:
+                line += " NOT NULL"
+            tables[oid]["lines"].append(line)
+
+        cursor_object.execute(f"""
+            SELECT con.conrelid, format('%I', con.conname), pg_get_constraintdef(con.oid),
+                   format('%I.%I', rn.nspname, r.relname)
+            FROM pg_constraint con
+            JOIN pg_class c ON c.oid = con.conrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            LEFT JOIN pg_class r ON r.oid = con.confrelid
+            LEFT JOIN pg_namespace rn ON rn.oid = r.relnamespace
+            WHERE c.relkind IN ('r', 'p') AND {user_schemas} AND con.conislocal
+            AND con.contype IN ('p', 'u', 'c', 'f', 'x')
+            ORDER BY con.conrelid, con.contype DESC, con.conname;""")
+        for oid, constraint_name, definition, referenced_table in cursor_object.fetchall():
+            tables[oid]["lines"].append(f"CONSTRAINT {constraint_name} {definition}")
+            if referenced_table:
+                tables[oid]["depends_on"].append(referenced_table)
+
+        for table in tables.values():
+            if table["partition_of"]:
+                parent, bound = table["partition_of"]
+                body = (" (\n    " + ",\n    ".join(table["lines"]) + "\n)"
+                        if table["lines"] else "")
+                statement = f"CREATE TABLE {table['name']} PARTITION OF {parent}{body} {bound}"
+            else:
+                statement = (f"CREATE TABLE {table['name']} (\n    "
+                             + ",\n    ".join(table["lines"]) + "\n)")
+                if table["partition_key"]:
+                    statement += f" PARTITION BY {table['partition_key']}"
+            objects.append(SchemaObject("table", table["name"], statement, table["depends_on"]))
+
+        cursor_object.execute(f"""
+            SELECT c.oid, format('%I.%I', n.nspname, c.relname), c.relkind = 'm',
+                   pg_get_viewdef(c.oid)
+            FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relkind IN ('v', 'm') AND {user_schemas}
+            ORDER BY 2;""")
+        views = {oid: SchemaObject(
+                     "view", name,
+                     f"CREATE {'MATERIALIZED VIEW' if materialized else 'VIEW'} {name} AS\n"
+                     f"{definition.strip().rstrip(';')}")
+                 for oid, name, materialized, definition in cursor_object.fetchall()}
+        cursor_object.execute("""
+            SELECT DISTINCT r.ev_class, format('%I.%I', n.nspname, c.relname)
+            FROM pg_rewrite r
+            JOIN pg_depend d ON d.objid = r.oid AND d.classid = 'pg_rewrite'::regclass
+                             AND d.refclassid = 'pg_class'::regclass
+            JOIN pg_class c ON c.oid = d.refobjid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE d.refobjid <> r.ev_class;""")
+        for oid, referenced_name in cursor_object.fetchall():
+            if oid in views:
+                views[oid].depends_on.append(referenced_name)
+        objects += views.values()
+
+        # Indexes backing constraints are created with the constraint; partition indexes
+        # are created through the index on the partitioned table
+        cursor_object.execute(f"""
+            SELECT format('%I.%I', n.nspname, ic.relname), pg_get_indexdef(i.indexrelid)
+            FROM pg_index i
+            JOIN pg_class ic ON ic.oid = i.indexrelid
+            JOIN pg_namespace n ON n.oid = ic.relnamespace
+            WHERE {user_schemas} AND NOT ic.relispartition
+            AND NOT EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = i.indexrelid
+                            AND con.contype IN ('p', 'u', 'x'))
+            ORDER BY 1;""")
+        objects += [SchemaObject("index", name, statement)
+                    for name, statement in cursor_object.fetchall()]
+        return objects
+
+    @staticmethod
+    def __collect_sqlite(cursor_object: object) -> list[SchemaObject]:
+        """Reads the stored DDL from sqlite_schema in creation order"""
+        cursor_object.execute("""SELECT type, name, sql FROM sqlite_schema
+                                 WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'
+                                 ORDER BY rowid;""")
+        objects = {name: SchemaObject(kind, name, statement)
+                   for kind, name, statement in cursor_object.fetchall()}
+        cursor_object.execute("""SELECT m.name, f."table"
+                                 FROM sqlite_schema m JOIN pragma_foreign_key_list(m.name) f
+                                 WHERE m.type = 'table';""")
+        for name, referenced_name in cursor_object.fetchall():
+            objects[name].depends_on.append(referenced_name)
+        # SQLite records no view dependencies: match the identifiers of each view's SQL
+        # against the known tables and views (names are case-insensitive)
+        known = {name.lower(): name for name, schema_object in objects.items()
+                 if schema_object.kind in ("table", "view")}
+        for schema_object in objects.values():
+            if schema_object.kind == "view":
+                identifiers = {next(group for group in match if group).replace('""', '"').lower()
+                               for match in
+                               SchemaDump.SQLITE_IDENTIFIER.findall(schema_object.statement)}
+                schema_object.depends_on += [known[identifier] for identifier in sorted(identifiers)
+                                             if identifier in known
+                                             and known[identifier] != schema_object.name]
+        return list(objects.values())
@@ -0,0 +1,278 @@
+""" Queries fanned out over sharded SQLite database files, with merged results """
+
+# Import the required modules
+
+import concurrent.futures
+import heapq
+import itertools
+import os
+import time
+from typing import Iterator, Optional
+from .parallel_scan import Reducer
+from .renderers import AsciiRenderer, Renderer
+from .sqlite_connection import SQLiteConnectionFactory
+
+
+class _SortKey:
+    """Orders rows like SQLite: NULL < numbers < text < blobs, per column ASC or DESC"""
+
+    __slots__ = ("values", "descending")
+
+    def __init__(self, values: tuple, descending: tuple):
+        self.values = values
+        self.descending = descending
+
+    def __lt__(self, other: "_SortKey") -> bool:
+        for first, second, descending in zip(self.values, other.values, self.descending):
+            if first != second:
+                return first > second if descending else first < second
+        return False
+
+
+class ShardedQuery:
+    """
+    Runs one query over many SQLite shard files in parallel and merges the results.
+
+    A pool of read-only reader connections (one per shard, opened with
+    `SQLiteConnectionFactory`) is kept for the lifetime of the object. Each query runs on
+    every shard on a thread pool; sqlite3 releases the GIL while SQLite executes, so the
+    shards are searched and sorted concurrently. Rows are then fetched lazily while they
+    are merged, so a global LIMIT stops reading early.
+
+    Example:
+        with ShardedQuery(["orders_0.db", "orders_1.db", "orders_2.db"]) as shards:
+            shards.execute("SELECT order_id, total_amount FROM tbl_orders "
+                           "ORDER BY total_amount DESC LIMIT 10",
+                           order_by=["total_amount DESC"], limit=10)
+            shards.aggregate("tbl_orders", {"orders": Count(), "revenue": Sum("total_amount")},
+                             group_by=["customer_id"])
+    """
+
+    TYPE_RANKS: dict = {type(None): 0, bool: 1, int: 1, float: 1, str: 2, bytes: 3}
+
+    def __init__(self, shards: list[str], workers: Optional[int] = None,
+                 profile: str = "read_heavy_analytics", fetch_size: int = 1000):
+        """
+        Args:
+            shards (list[str]): The shard database files.
+            workers (int, optional): The number of shards queried at once.
+                                     Defaults to the number of CPUs.
+            profile (str): The SQLiteConnectionFactory profile of the reader connections.
+            fetch_size (int): The number of rows fetched from a shard at a time.
+
+        Raises:
+            ValueError: If there are no shards or workers is not positive.
+        """
+        if not shards:
+            raise ValueError("At least one shard is required.")
+        self.__workers = workers or os.cpu_count() or 1
+        if self.__workers < 1:
+            raise ValueError("workers must be a positive integer.")
+        self.__shards = list(shards)
+        self.__fetch_size = fetch_size
+        # Queries run on pool threads and are fetched on the calling thread
+        self.__connections = [SQLiteConnectionFactory.connect(shard, profile, read_only=True,
+                                                              check_same_thread=False)
+                              for shard in self.__shards]
+        self.__executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(self.__workers, len(self.__shards)),
+            thread_name_prefix="sharded-query")
+
+    def __enter__(self) -> "ShardedQuery":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def shards(self) -> list[str]:
+        """The shard database files"""
+        return list(self.__shards)
+
+    def close(self) -> None:
+        """Stops the thread pool and closes the reader connections"""
+        self.__executor.shutdown(wait=True)
+        for connection in self.__connections:
+            connection.close()
+
+    def iterate(self, query: str, parameters: tuple = (), order_by: Optional[list[str]] = None,
+                limit: Optional[int] = None) -> tuple[list[str], Iterator[tuple]]:
+        """
+        Runs a query on every shard and returns the column names and the merged rows.
+
+        With `order_by` the rows of each shard must already be sorted that way (the query
+        needs the same ORDER BY); they are combined with a k-way merge. Without it the rows
+        are returned shard by shard. `limit` caps the merged rows, so a query ending in
+        `ORDER BY ... LIMIT n` returns the global top n.
+
+        Args:
+            query (str): The query run on every shard.
+            parameters (tuple): Values bound to the placeholders of the query.
+            order_by (list[str], optional): The sort columns of the query, e.g.
+                                            ["total_amount DESC", "order_id"].
+            limit (int, optional): The maximum number of rows returned.
+
+        Returns:
+            tuple[list[str], Iterator[tuple]]: The column names and the merged rows.
+
+        Raises:
+            ValueError: If the shards return different columns or an order_by column
+                        is not in the result.
+        """
+        cursors = self.__run_on_shards(
+            lambda connection: connection.execute(query, parameters))
+        column_names = [description[0] for description in cursors[0].description or []]
+        for shard, cursor in zip(self.__shards, cursors):
+            if [description[0] for description in cursor.description or []] != column_names:
+                raise ValueError(f"Shard '{shard}' returns different columns.")
+
+        streams = [self.__fetch_rows(cursor) for cursor in cursors]
+        if order_by:
+            positions, descending = [], []
+            for term in order_by:
+                name, *direction = term.split()
+                if name not in column_names:
+                    raise ValueError(f"ORDER BY column '{name}' is not in the result.")
+                positions.append(column_names.index(name))
+                descending.append(bool(direction) and direction[0].upper() == "DESC")
+            descending = tuple(descending)
+            rows = heapq.merge(*streams, key=lambda row: _SortKey(
+                tuple((self.TYPE_RANKS.get(type(row[position]), 3), row[position])
+                      for position in positions), descending))
+        else:
+            rows = itertools.chain.from_iterable(streams)
+        return column_names, itertools.islice(rows, limit)
+
+    def execute(self, query: str, parameters: tuple = (), order_by: Optional[list[str]] = None,
+                limit: Optional[int] = None, renderer: Optional[Renderer] = None) -> int:
+        """
+        Runs a query on every shard and displays the merged rows (see `iterate`).
+
+        Returns:
+            int: The number of merged rows.
+        """
+        start_time = time.perf_counter()
+        column_names, rows = self.iterate(query, parameters, order_by, limit)
+        exec_time = round(time.perf_counter() - start_time, 3)
+        print(f"Queried {len(self.__shards)} shards")
+        return (renderer or AsciiRenderer(row_limit=None if limit else -1)).render(
+            column_names, rows, exec_time)
+
+    def aggregate(self, table_name: str, reducers: dict[str, Reducer],
+                  group_by: Optional[list[str]] = None, where: Optional[str] = None,
+                  parameters: tuple = (), order_by: Optional[list[str]] = None,
+                  limit: Optional[int] = None, renderer: Optional[Renderer] = None) -> list[tuple]:
+        """
+        Computes aggregates over a table split across the shards.
+
+        Every shard computes the partial aggregates of its groups (the `Reducer`s of
+        `parallel_scan`: Count, Sum, Min, Max, Avg, ...), which are merged per group; Avg is
+        merged from the sums and counts of the shards, not from their averages.
+
+        Args:
+            table_name (str): The table on every shard.
+            reducers (dict[str, Reducer]): The result names mapped to their reducers.
+            group_by (list[str], optional): The columns to group by.
+            where (str, optional): A filter applied on every shard.
+            parameters (tuple): Values bound to the placeholders of `where`.
+            order_by (list[str], optional): Sort the merged rows by these result columns.
+            limit (int, optional): The maximum number of merged rows displayed and returned.
+            renderer (Renderer, optional): The renderer used to display the result.
+
+        Returns:
+            list[tuple]: The merged rows: the group columns followed by the aggregates.
+
+        Raises:
+            ValueError: If there are no reducers.
+        """
+        if not reducers:
+            raise ValueError("At least one reducer is required.")
+        start_time = time.perf_counter()
+        group_by = list(group_by or [])
+        reducer_list = list(reducers.values())
+        condition = f" WHERE {where}" if where else ""
+        grouping = f" GROUP BY {', '.join(group_by)}" if group_by else ""
+
+        def reduce_shard(connection) -> dict:
+            """Returns the group keys mapped to the SQL partial values and the row states"""
+            groups: dict = {}
+            expressions = [expression for reducer in reducer_list for expression in reducer.sql()]
+            if expressions:
+                for row in connection.execute(
+                        f"SELECT {', '.join(group_by + expressions)} FROM {table_name}"
+                        f"{condition}{grouping};", parameters):
+                    groups[tuple(row[:len(group_by)])] = (row[len(group_by):], None)
+            row_columns = [reducer.columns() for reducer in reducer_list]
+            selected = [expression for columns in row_columns for expression in columns]
+            if selected:
+                for row in connection.execute(
+                        f"SELECT {', '.join(group_by + selected)} FROM {table_name}"
+                        f"{condition};", parameters):
+                    key = tuple(row[:len(group_by)])
+                    values, states = groups.get(key, ((), None))
+                    if states is None:
+                        states = [reducer.initial() for reducer in reducer_list]
+                    position = len(group_by)
+                    for index, reducer in enumerate(reducer_list):
+                        width = len(row_columns[index])
+                        if width:
+                            states[index] = reducer.accumulate(states[index],
+                                                               row[position:position + width])
+                        position += width
+                    groups[key] = (values, states)
+            return groups
+
+        merged: dict = {}
+        for groups in self.__run_on_shards(reduce_shard):
+            for key, partial in groups.items():
+                merged.setdefault(key, []).append(partial)
+
+        rows = []
+        for key, partials in merged.items():
+            aggregates = []
+            position = 0
+            for index, reducer in enumerate(reducer_list):
+                width = len(reducer.sql())
+                state = reducer.initial()
+                for _, states in partials:
+                    if states is not None:
+                        state = reducer.combine(state, states[index])
+                aggregates.append(reducer.finalize(
+                    [tuple(values[position:position + width]) for values, _ in partials
+                     if values], state))
+                position += width
+            rows.append(key + tuple(aggregates))
+
+        column_names = group_by + list(reducers)
+        if order_by:
+            # Sort by the last term first, so the first term decides
+            for term in reversed(order_by):
+                name, *direction = term.split()
+                position = column_names.index(name)
+                rows.sort(key=lambda row, position=position: (
+                    self.TYPE_RANKS.get(type(row[position]), 3), row[position]),
+                    reverse=bool(direction) and direction[0].upper() == "DESC")
+        rows = rows[:limit] if limit is not None else rows
+
+        exec_time = round(time.perf_counter() - start_time, 3)
+        print(f"Aggregated '{table_name}' over {len(self.__shards)} shards")
+        (renderer or AsciiRenderer(row_limit=None)).render(column_names, rows, exec_time)
+        return rows
+
+    def __run_on_shards(self, task) -> list:
+        """Runs task(connection) for every shard on the thread pool, in shard order"""
+        futures = [self.__executor.submit(task, connection) for connection in self.__connections]
+        results = []
+        for shard, future in zip(self.__shards, futures):
+            try:
+                results.append(future.result())
+            except Exception as error:
+                print(f"An error occurred on shard '{shard}': {error}")
+                for pending in futures:
+                    pending.cancel()
+                raise
+        return results
+
+    def __fetch_rows(self, cursor) -> Iterator[tuple]:
+        while rows := cursor.fetchmany(self.__fetch_size):
+            yield from rows
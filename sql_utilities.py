@@ -3,18 +3,57 @@ MySQL, Postgres and Sqlite """
 
 # Import the required modules
 
+import contextlib
 import time
-import pprint
-from typing import Optional
-from sqlite3 import ProgrammingError as sqlite_error
-from psycopg2 import ProgrammingError as postgres_error
+from typing import Callable, ContextManager, Iterable, Iterator, Optional
 from .constants import Constants
+from .dialects import get_dialect, is_registered
+from .renderers import AsciiRenderer, Renderer
 
 
 
 class SQLUtilities:
     """SQL Database Utilities Class"""
 
+    # Callables notified after every query run by execute_query/execute_display_query_results
+    _query_listeners: list = []
+
+    # The number of names sent in one existence check query
+    EXISTENCE_CHECK_CHUNK_SIZE: int = 500
+    # Leading keywords of the MySQL statements that commit implicitly (and end savepoints)
+    MYSQL_IMPLICIT_COMMIT_KEYWORDS: tuple = ("ALTER", "ANALYZE", "CREATE", "DROP", "GRANT",
+                                             "LOCK", "OPTIMIZE", "RENAME", "REPAIR", "REVOKE",
+                                             "TRUNCATE", "UNLOCK")
+
+    @staticmethod
+    def add_query_listener(listener: Callable) -> None:
+        """
+        Registers a callable that is notified after each successful query run through
+        `execute_query` or `execute_display_query_results`.
+
+        The listener is called with the keyword arguments `query`, `cursor_object`,
+        `parameters`, `exec_time` (seconds) and `row_count`, and should accept `**kwargs`
+        so new arguments can be added later.
+
+        Args:
+            listener (Callable): The callable to notify.
+        """
+        if listener not in SQLUtilities._query_listeners:
+            SQLUtilities._query_listeners.append(listener)
+
+    @staticmethod
+    def remove_query_listener(listener: Callable) -> None:
+        """Unregisters a listener added with `add_query_listener`"""
+        if listener in SQLUtilities._query_listeners:
+            SQLUtilities._query_listeners.remove(listener)
+
+    @staticmethod
+    def _notify_query_listeners(query: str, cursor_object: object, exec_time: float,
+                                row_count: Optional[int], parameters: object = None) -> None:
+        """Calls the registered query listeners"""
+        for listener in list(SQLUtilities._query_listeners):
+            listener(query=query, cursor_object=cursor_object, parameters=parameters,
+                     exec_time=exec_time, row_count=row_count)
 
     @staticmethod
     def _get_cursor_type_name(cursor_object):
@@ -48,11 +87,55 @@ class SQLUtilities:
         cursor_type = cursor_type.split("'")[1]  # Extract the type name from the string
 
         # Ensure the cursor type is valid
-        assert cursor_type in Constants.CURSOR_TYPES.values(), Constants.ASSERTION_ERROR_MESSAGE.format(cursor_type)
+        assert cursor_type in Constants.CURSOR_TYPES.values() or is_registered(cursor_type), \
+            Constants.ASSERTION_ERROR_MESSAGE.format(cursor_type)
 
         # Reverse lookup from CURSOR_TYPES to get the name of the cursor
         return cursor_type
-    
+
+    @staticmethod
+    def _get_connection(cursor_object):
+        """
+        Returns the connection object that owns the provided cursor object.
+
+        sqlite3 and psycopg2 expose the owner as `cursor.connection`, while
+        mysql-connector keeps it in a private attribute whose name differs between releases.
+
+        Args:
+            cursor_object (object): The cursor object whose connection is to be retrieved.
+
+        Returns:
+            object: The connection the cursor was created from.
+
+        Raises:
+            ValueError: If no connection can be found on the cursor object.
+        """
+        for attribute in ("connection", "_connection", "_cnx"):
+            connection = getattr(cursor_object, attribute, None)
+            if connection is not None:
+                return connection
+        raise ValueError("Could not find the connection that owns the cursor object.")
+
+    @staticmethod
+    def _get_driver_errors(cursor_object) -> tuple:
+        """
+        Returns the driver exception classes reported by the query helpers for a cursor.
+
+        The classes come from the dialect plugin of the cursor type, which imports the
+        driver the first time a cursor of that type is seen. Unknown cursor types have no
+        driver specific exceptions.
+
+        Args:
+            cursor_object (object): The cursor object the query is executed with.
+
+        Returns:
+            tuple: The exception classes to catch, suitable for an `except` clause.
+        """
+        cursor_type = str(type(cursor_object)).lower().split("'")[1]
+        if not is_registered(cursor_type):
+            return ()
+        return get_dialect(cursor_type).ERRORS
+
     @staticmethod
     def display_grants_for_user(user: str = 'root', host: str = 'localhost', cursor_object: object = None) -> None:
         """
@@ -108,6 +191,23 @@ class SQLUtilities:
             case _:
                 raise ValueError(f"Unsupported cursor type: {cursor_type}")
 
+    @staticmethod
+    def display_active_sessions(cursor_object: object, renderer: Optional[Renderer] = None) -> None:
+        """
+        Display the active sessions of the server: their state, running statement, wait event
+        and the sessions blocking them. Use `activity_monitor.ActivityMonitor` to sample them
+        over time. Supports MySQL and PostgreSQL.
+
+        Args:
+            cursor_object (object): The cursor object used to execute SQL queries.
+            renderer (Renderer, optional): The renderer used to display the sessions.
+
+        Returns:
+            None: This method does not return any value; it prints the results directly.
+        """
+        from .activity_monitor import ActivityMonitor  # pylint: disable=import-outside-toplevel
+        ActivityMonitor(cursor_object).display_sessions(renderer)
+
     @staticmethod
     def select_all_query(table_name: str, cursor_object):
         """
@@ -549,6 +649,8 @@ class SQLUtilities:
         result = cursor_object.fetchone()
 
         if result:
+            # pprint pulls in dataclasses/inspect, so only import it when it is needed
+            import pprint  # pylint: disable=import-outside-toplevel
             query = result[1].replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS")
             pprint.pprint(query)
 
@@ -641,40 +743,264 @@ class SQLUtilities:
             SQLUtilities.execute_display_query_results(query=query, cursor_object=cursor_object)
         else:
             raise ValueError(f"Unsupported database type: {cursor_type}")
-        
+
+    @staticmethod
+    def get_columns(table_name: str, cursor_object: object) -> list[tuple]:
+        """
+        Returns the column metadata of a table in a database independent layout.
+
+        This uses the same catalog sources as `show_columns` but returns the rows instead
+        of displaying them, so the metadata can drive other operations (e.g. mapping column
+        types when copying a table to another database).
+
+        Supported Databases:
+        - MySQL
+        - PostgreSQL
+        - SQLite
+
+        Args:
+            table_name (str): The name of the table whose columns are to be returned.
+            cursor_object (object): A database cursor object used to execute SQL queries.
+
+        Returns:
+            list[tuple]: One `(column_name, declared_type, is_nullable, is_primary_key)` tuple
+            per column, in the order the columns are defined in the table.
+
+        Raises:
+            ValueError: If the table name is empty or the database type is not supported.
+            AssertionError: If the provided cursor object is not valid.
+        """
+        if not table_name.strip():
+            raise ValueError(Constants.INVALID_TABLE_ARGUMENT)
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+
+        match cursor_type:
+            case Constants.MYSQL:
+                cursor_object.execute(f"SHOW COLUMNS FROM {table_name};")
+                return [(column_name,
+                         data_type.decode() if isinstance(data_type, (bytes, bytearray))
+                         else data_type,
+                         is_nullable == "YES", column_key == "PRI")
+                        for column_name, data_type, is_nullable, column_key, _, _
+                        in cursor_object.fetchall()]
+            case Constants.POSTGRES:
+                table_schema = SQLUtilities.__get_postgres_table_schema(table_name, cursor_object)
+                cursor_object.execute(f"""
+                    SELECT c.column_name,
+                        CASE WHEN c.character_maximum_length IS NOT NULL
+                            THEN c.data_type || '(' || c.character_maximum_length || ')'
+                            WHEN c.data_type = 'numeric' AND c.numeric_precision IS NOT NULL
+                            THEN 'numeric(' || c.numeric_precision || ',' || c.numeric_scale || ')'
+                            ELSE c.data_type END,
+                        c.is_nullable = 'YES', pk.column_name IS NOT NULL
+                    FROM information_schema.columns c
+                    LEFT JOIN (
+                        SELECT kcu.column_name
+                        FROM information_schema.table_constraints tc
+                        JOIN information_schema.key_column_usage kcu
+                        ON tc.constraint_name = kcu.constraint_name
+                        AND tc.table_schema = kcu.table_schema
+                        WHERE tc.constraint_type = 'PRIMARY KEY'
+                        AND tc.table_schema = '{table_schema}'
+                        AND tc.table_name = '{table_name}'
+                    ) pk
+                    ON c.column_name = pk.column_name
+                    WHERE c.table_name = '{table_name}' AND c.table_schema = '{table_schema}'
+                    ORDER BY c.ordinal_position;
+                """)
+                return [tuple(row) for row in cursor_object.fetchall()]
+            case Constants.SQLITE:
+                cursor_object.execute(f"PRAGMA table_info({table_name});")
+                return [(column_name, column_type, not not_null, key > 0)
+                        for _, column_name, column_type, not_null, _, key
+                        in cursor_object.fetchall()]
+            case _:
+                raise ValueError(f"Unsupported database type: {cursor_type}")
+
     @staticmethod
-    def execute_stored_procedure(procedure_name: str, parameters: tuple, cursor_object: object) -> None:
+    def execute_stored_procedure(procedure_name: str, parameters: tuple, cursor_object: object,
+                                 routine_type: str = "procedure",
+                                 result_limit: Optional[int] = 50, fetch_size: int = 1000,
+                                 renderer: Optional[Renderer] = None) -> dict:
         """
-        Executes a stored procedure using the given cursor and displays the result set.
+        Executes a stored procedure (or a set returning function) and displays every
+        result set it produces, in order.
+
+        Rows are streamed to the display `fetch_size` rows at a time, so memory use does
+        not grow with the size of a result set.
+
+        - MySQL: `callproc`, then each of `stored_results()`. The connector reads the
+          result sets of a CALL before returning, so only the display side is streamed.
+          OUT and INOUT values are taken from the sequence returned by `callproc`, at the
+          positions `information_schema.PARAMETERS` lists for the procedure.
+        - PostgreSQL procedures: `CALL name(...)`. The returned row holds the OUT/INOUT
+          values; refcursor values among them are fetched as result sets.
+        - PostgreSQL functions: `SELECT * FROM name(...)` through a server-side cursor,
+          or each returned refcursor when the function returns refcursors.
+          PostgreSQL result sets are read inside a transaction that is committed at the end.
 
         Args:
-            procedure_name (str): Name of the stored procedure to execute.
+            procedure_name (str): Name of the stored procedure or function to execute.
             parameters (tuple): Tuple of parameters to pass to the stored procedure.
                                 Pass an empty tuple or None if no parameters are needed.
             cursor_object (object): Database cursor object capable of executing stored procedures.
+            routine_type (str): "procedure" or "function" (PostgreSQL only).
+            result_limit (int, optional): The maximum number of rows displayed per result set,
+                                          None for all rows. Defaults to 50.
+            fetch_size (int): The number of rows fetched at a time.
+            renderer (Renderer, optional): The renderer used to display the result sets.
+
+        Returns:
+            dict: "out_parameters" (tuple of OUT/INOUT values), "exec_time" (seconds for
+            the call) and "result_sets" (one dict per result set with its "columns",
+            "rows" and "seconds" taken to fetch it).
 
         Raises:
-            ValueError: If `parameters` is not a tuple and is not None.
+            ValueError: If `parameters` is not a tuple and is not None, or the routine type
+                        or database type is not supported.
         """
         print(f"Calling the Procedure '{procedure_name}' with parameters {parameters}")
-        start_time = time.perf_counter()
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
 
         if parameters is None:
             parameters = ()
 
         if not isinstance(parameters, tuple):
             raise ValueError("Parameters should be passed as a tuple.")
-        
-        cursor_object.callproc(procedure_name, parameters)
-        execution_time = round(time.perf_counter() - start_time, 3)
+        if routine_type not in ("procedure", "function"):
+            raise ValueError("routine_type should be 'procedure' or 'function'.")
+
+        result_sets: list = []
+
+        def display_result_set(column_names: list, rows: Iterator, start_time: float) -> None:
+            """Streams one result set to the display and records its timing"""
+            print(f"Result set {len(result_sets) + 1}:")
+            row_count = SQLUtilities.__display_results(
+                table_column_names=column_names, results=rows,
+                exec_time=round(time.perf_counter() - start_time, 3),
+                result_limit=result_limit,
+                renderer=renderer)
+            result_sets.append({"columns": list(column_names), "rows": row_count,
+                                "seconds": round(time.perf_counter() - start_time, 3)})
+
+        match cursor_type:
+            case Constants.MYSQL:
+                out_positions = SQLUtilities.__mysql_out_positions(procedure_name, cursor_object)
+                start_time = time.perf_counter()
+                call_result = tuple(cursor_object.callproc(procedure_name, parameters) or ())
+                execution_time = round(time.perf_counter() - start_time, 3)
+                # callproc returns every argument; only OUT and INOUT values were set
+                out_parameters = tuple(call_result[position] for position in out_positions
+                                       if position < len(call_result))
+                for results in cursor_object.stored_results():
+                    display_result_set(results.column_names,
+                                       SQLUtilities.__iterate_rows(results, fetch_size),
+                                       time.perf_counter())
+            case Constants.POSTGRES:
+                out_parameters, execution_time = SQLUtilities.__execute_postgres_routine(
+                    procedure_name, parameters, cursor_object, routine_type, fetch_size,
+                    display_result_set)
+            case _:
+                raise ValueError(f"Unsupported cursor type: {cursor_type}")
+
+        print(f"Procedure '{procedure_name}' returned {len(result_sets)} result set(s) "
+              f"in time: ({execution_time} sec)")
+        if out_parameters:
+            print(f"OUT parameters: {out_parameters}")
+        return {"out_parameters": out_parameters, "exec_time": execution_time,
+                "result_sets": result_sets}
+
+    @staticmethod
+    def __mysql_out_positions(procedure_name: str, cursor_object: object) -> list[int]:
+        """The 0-based positions of the OUT and INOUT parameters of a MySQL procedure"""
+        schema, _, name = procedure_name.rpartition(".")
+        cursor_object.execute("""SELECT ORDINAL_POSITION FROM information_schema.PARAMETERS
+                                 WHERE SPECIFIC_SCHEMA = COALESCE(%s, DATABASE())
+                                 AND SPECIFIC_NAME = %s AND ROUTINE_TYPE = 'PROCEDURE'
+                                 AND PARAMETER_MODE IN ('OUT', 'INOUT')
+                                 ORDER BY ORDINAL_POSITION;""", (schema or None, name))
+        return [position - 1 for (position,) in cursor_object.fetchall()]
 
-        results=next(cursor_object.stored_results())
-        SQLUtilities.__display_results(
-            table_column_names=results.column_names,
-            results=results.fetchall(),
-            exec_time=execution_time,
-            result_limit=50
-        )
+    @staticmethod
+    def __execute_postgres_routine(procedure_name: str, parameters: tuple,
+                                   cursor_object: object, routine_type: str, fetch_size: int,
+                                   display_result_set: Callable) -> tuple:
+        """
+        Calls a PostgreSQL procedure or function and streams its result sets through
+        server-side cursors. Returns the OUT parameters and the call time.
+        """
+        refcursor_type_code = 1790
+        dialect = get_dialect(Constants.POSTGRES)
+        connection = SQLUtilities._get_connection(cursor_object)
+        placeholders = ", ".join(["%s"] * len(parameters))
+
+        def fetch_cursor(cursor_name: str) -> None:
+            """Streams the rows of an open server-side cursor"""
+            start_time = time.perf_counter()
+            fetch_query = f'FETCH FORWARD {fetch_size} FROM "{cursor_name}";'
+            cursor_object.execute(fetch_query)
+            column_names = [description[0] for description in cursor_object.description]
+            first_rows = cursor_object.fetchall()
+
+            def rows() -> Iterator[tuple]:
+                batch = first_rows
+                while batch:
+                    yield from batch
+                    if len(batch) < fetch_size:
+                        return
+                    cursor_object.execute(fetch_query)
+                    batch = cursor_object.fetchall()
+
+            display_result_set(column_names, rows(), start_time)
+            cursor_object.execute(f'CLOSE "{cursor_name}";')
+
+        dialect.begin_transaction(connection, cursor_object)
+        try:
+            out_parameters: tuple = ()
+            cursor_names: list = []
+            returns_refcursors = False
+            if routine_type == "procedure":
+                call = f"CALL {procedure_name}({placeholders});"
+            else:
+                # Resolve the name like the call will: in its schema, or else in the first
+                # schema of the search path that has a routine of that name
+                schema, _, name = procedure_name.rpartition(".")
+                cursor_object.execute("""
+                    SELECT bool_or(p.prorettype = 'refcursor'::regtype)
+                    FROM pg_proc p JOIN pg_namespace n ON n.oid = p.pronamespace
+                    WHERE p.proname = %s AND n.nspname = COALESCE(%s, (
+                        SELECT s.nspname
+                        FROM unnest(current_schemas(true)) WITH ORDINALITY AS s(nspname, position)
+                        WHERE EXISTS (SELECT 1 FROM pg_proc sp
+                                      JOIN pg_namespace sn ON sn.oid = sp.pronamespace
+                                      WHERE sn.nspname = s.nspname AND sp.proname = %s)
+                        ORDER BY s.position LIMIT 1));""", (name, schema or None, name))
+                returns_refcursors = bool(cursor_object.fetchone()[0])
+                call = f"SELECT * FROM {procedure_name}({placeholders});" if returns_refcursors \
+                    else f"""DECLARE stored_procedure_results NO SCROLL CURSOR
+                             FOR SELECT * FROM {procedure_name}({placeholders});"""
+
+            start_time = time.perf_counter()
+            cursor_object.execute(call, parameters)
+            if routine_type == "procedure":
+                if cursor_object.description:
+                    out_parameters = tuple(cursor_object.fetchone() or ())
+                    cursor_names = [value for value, description
+                                    in zip(out_parameters, cursor_object.description)
+                                    if description[1] == refcursor_type_code and value]
+            elif returns_refcursors:
+                cursor_names = [row[0] for row in cursor_object.fetchall() if row[0]]
+            else:
+                cursor_names = ["stored_procedure_results"]
+            execution_time = round(time.perf_counter() - start_time, 3)
+
+            for cursor_name in cursor_names:
+                fetch_cursor(cursor_name)
+            dialect.commit(connection, cursor_object)
+        except Exception:
+            dialect.rollback(connection, cursor_object)
+            raise
+        return out_parameters, execution_time
 
     @staticmethod
     def database_exists(database_name: str, cursor_object: object) -> bool:
@@ -702,171 +1028,583 @@ class SQLUtilities:
 
         cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
 
-        # Define database existence check queries
-        query_map = {
-            Constants.MYSQL: "SHOW DATABASES;",
-            Constants.SQLITE: "PRAGMA database_list;",
-            Constants.POSTGRES: f"""SELECT 1 FROM pg_catalog.pg_database
-            WHERE datname = '{database_name}';"""
-        }
-        query = query_map.get(cursor_type)
-        if not query:
+        if cursor_type in (Constants.MYSQL, Constants.POSTGRES):
+            return SQLUtilities.databases_exist([database_name], cursor_object)[database_name]
+        if cursor_type != Constants.SQLITE:
             print(f"Unsupported database type: {cursor_type}")
             return False  # Unsupported database type
-        cursor_object.execute(query)
+        cursor_object.execute("PRAGMA database_list;")
+        return any(database_name in db[1] for db in cursor_object.fetchall())
+
+    @staticmethod
+    def databases_exist(database_names: Iterable[str], cursor_object: object) -> dict[str, bool]:
+        """
+        Checks many database names with one catalog query per chunk of names.
+
+        Supported Databases:
+        - MySQL: `information_schema.schemata`
+        - PostgreSQL: `pg_database`
+        - SQLite: the attached databases (`pragma_database_list`)
+
+        Args:
+            database_names (Iterable[str]): The database names to check.
+            cursor_object (object): A database cursor object used to execute SQL queries.
+
+        Returns:
+            dict[str, bool]: Each name mapped to True if the database exists.
+
+        Raises:
+            ValueError: If the database type is not supported.
+        """
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        query_map = {
+            Constants.MYSQL: """SELECT schema_name FROM information_schema.schemata
+                                WHERE schema_name IN ({});""",
+            Constants.POSTGRES: """SELECT datname FROM pg_catalog.pg_database
+                                   WHERE datname IN ({});""",
+            Constants.SQLITE: "SELECT name FROM pragma_database_list WHERE name IN ({});",
+        }
+        if cursor_type not in query_map:
+            raise ValueError(f"Unsupported database type: {cursor_type}")
+        database_names = list(database_names)
+        found = {row[0] for row in SQLUtilities.__find_existing(
+            query_map[cursor_type], database_names, cursor_object)}
+        return {name: name in found for name in database_names}
+
+    @staticmethod
+    def tables_exist(table_names: Iterable[str], cursor_object: object,
+                     database_name: Optional[str] = None) -> dict[str, bool]:
+        """
+        Checks many table (or view) names with one catalog query per chunk of names.
 
+        Supported Databases:
+        - MySQL: `information_schema.tables` of `database_name`, the current database by default
+        - PostgreSQL: `pg_class` relations in the user schemas of the current database
+        - SQLite: `sqlite_schema`
+
+        Args:
+            table_names (Iterable[str]): The table names to check.
+            cursor_object (object): A database cursor object used to execute SQL queries.
+            database_name (str, optional): The MySQL database to look in.
+
+        Returns:
+            dict[str, bool]: Each name mapped to True if the table or view exists.
+
+        Raises:
+            ValueError: If the database type is not supported.
+        """
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        leading_parameters: tuple = ()
         match cursor_type:
             case Constants.MYSQL:
-                return database_name in [db[0] for db in cursor_object.fetchall()]
-            case Constants.SQLITE:
-                return any(database_name in db[1] for db in cursor_object.fetchall())
+                query = """SELECT table_name FROM information_schema.tables
+                           WHERE table_schema = COALESCE(%s, DATABASE()) AND table_name IN ({});"""
+                leading_parameters = (database_name,)
             case Constants.POSTGRES:
-                return cursor_object.fetchone() is not None
-
+                query = """SELECT c.relname FROM pg_catalog.pg_class c
+                           JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+                           WHERE c.relkind IN ('r', 'p', 'v', 'm', 'f')
+                           AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+                           AND c.relname IN ({});"""
+            case Constants.SQLITE:
+                query = """SELECT name FROM sqlite_schema
+                           WHERE type IN ('table', 'view') AND name IN ({});"""
+            case _:
+                raise ValueError(f"Unsupported database type: {cursor_type}")
+        table_names = list(table_names)
+        found = {row[0] for row in SQLUtilities.__find_existing(
+            query, table_names, cursor_object, leading_parameters)}
+        return {name: name in found for name in table_names}
 
     @staticmethod
-    def __print_plus_dashes(table_columns_length: list) -> None:
-        """  
-        Prints the plus and dashes  
+    def columns_exist(column_names: Iterable[str], cursor_object: object) -> dict[str, bool]:
         """
-        plus_dashes = (
-            "+" + "+".join("-" * (length + 2) for length in table_columns_length) + "+"
-        )
-        print(plus_dashes)
+        Checks many "table.column" names with one catalog query per chunk of names.
 
-    @staticmethod
-    def __print_table_headers(table_columns_length: list, table_column_names: list[str]) -> None:
-        """  
-        Prints the table headers  
+        The query selects the columns whose table and column names are both in the
+        requested sets; the exact pairs are matched on the returned rows.
+
+        Supported Databases:
+        - MySQL: `information_schema.columns` of the current database
+        - PostgreSQL: `information_schema.columns` in the user schemas of the current database
+        - SQLite: `pragma_table_info` of every table and view
+
+        Args:
+            column_names (Iterable[str]): The names to check, each as "table.column".
+            cursor_object (object): A database cursor object used to execute SQL queries.
+
+        Returns:
+            dict[str, bool]: Each name mapped to True if the column exists.
+
+        Raises:
+            ValueError: If a name is not of the form "table.column" or the database type is
+                        not supported.
         """
-        SQLUtilities.__print_plus_dashes(table_columns_length)
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        match cursor_type:
+            case Constants.MYSQL:
+                query = """SELECT table_name, column_name FROM information_schema.columns
+                           WHERE table_schema = DATABASE()
+                           AND table_name IN ({0}) AND column_name IN ({1});"""
+            case Constants.POSTGRES:
+                query = """SELECT table_name, column_name FROM information_schema.columns
+                           WHERE table_catalog = current_database()
+                           AND table_schema NOT IN ('pg_catalog', 'information_schema')
+                           AND table_name IN ({0}) AND column_name IN ({1});"""
+            case Constants.SQLITE:
+                query = """SELECT m.name, p.name
+                           FROM sqlite_schema m JOIN pragma_table_info(m.name) p
+                           WHERE m.type IN ('table', 'view')
+                           AND m.name IN ({0}) AND p.name IN ({1});"""
+            case _:
+                raise ValueError(f"Unsupported database type: {cursor_type}")
+
+        column_names = list(column_names)
+        pairs = {}
+        for name in column_names:
+            table_name, separator, column_name = name.rpartition(".")
+            if not separator or not table_name or not column_name:
+                raise ValueError(f"Column names should be given as 'table.column': {name!r}")
+            pairs[name] = (table_name, column_name)
+
+        placeholder = get_dialect(cursor_type).PLACEHOLDER
+        found: set = set()
+        pair_list = list(set(pairs.values()))
+        chunk_size = SQLUtilities.EXISTENCE_CHECK_CHUNK_SIZE // 2
+        for start in range(0, len(pair_list), chunk_size):
+            chunk = pair_list[start:start + chunk_size]
+            tables = sorted({table_name for table_name, _ in chunk})
+            columns = sorted({column_name for _, column_name in chunk})
+            cursor_object.execute(query.format(", ".join([placeholder] * len(tables)),
+                                               ", ".join([placeholder] * len(columns))),
+                                  tuple(tables) + tuple(columns))
+            found.update(tuple(row) for row in cursor_object.fetchall())
+        return {name: pairs[name] in found for name in column_names}
 
-        # Print the table headers
-        table_headers = (
-            "|"
-            + "|".join(
-                f" {name:^{table_columns_length[i]}} "
-                for i, name in enumerate(table_column_names)
-            )
-            + "|"
-        )
-        print(table_headers)
-        SQLUtilities.__print_plus_dashes(table_columns_length)
+    @staticmethod
+    def __find_existing(query: str, names: list[str], cursor_object: object,
+                        leading_parameters: tuple = ()) -> list[tuple]:
+        """Runs an existence check query with its IN list filled in chunks of names"""
+        placeholder = get_dialect(SQLUtilities._get_cursor_type_name(cursor_object)).PLACEHOLDER
+        unique_names = list(dict.fromkeys(names))
+        rows: list = []
+        for start in range(0, len(unique_names), SQLUtilities.EXISTENCE_CHECK_CHUNK_SIZE):
+            chunk = unique_names[start:start + SQLUtilities.EXISTENCE_CHECK_CHUNK_SIZE]
+            cursor_object.execute(query.format(", ".join([placeholder] * len(chunk))),
+                                  leading_parameters + tuple(chunk))
+            rows.extend(cursor_object.fetchall())
+        return rows
 
     @staticmethod
     def __display_results(
         table_column_names: list[str],
-        results: list[list],
+        results: Iterable,
         exec_time: float,
-        result_limit,
-    ) -> None:
+        result_limit: Optional[int],
+        renderer: Optional[Renderer] = None,
+    ) -> int:
         """
         Displays the results of a query in a formatted table.
 
         Args:
         table_column_names (list[str]): The names of the columns in the result set.
-        results (list[list]): The rows of data returned from the query.
+        results (Iterable): The rows of data returned from the query.
         exec_time (float): The time taken to execute the query.
-        result_limit (int, optional): The maximum number of results to display. Defaults to 10.
+        result_limit (int, optional): The maximum number of results to display.
+        renderer (Renderer, optional): The renderer to write the results with.
+            Defaults to an ASCII table on stdout limited to `result_limit` rows.
 
         Returns:
-        None
-        """
-        table_columns_length = [len(name) for name in table_column_names]
-
-        # Calculate the maximum length of each column based on the results
-        for result in results:
-            for index, row_data in enumerate(result):
-                row_data_str = str(row_data) if row_data is not None else 'NULL'
-                table_columns_length[index] = max(table_columns_length[index], len(row_data_str))
-
-        SQLUtilities.__print_table_headers(table_columns_length, table_column_names)
-
-        # Print the table rows
-        is_truncated: bool = False
-        is_same: bool = (
-            len(results) == result_limit
-        )  # Check if the len of results returned is the same as the result limit
-        for limit, result in enumerate(results):
-            table_row = (
-                "|"
-                + "|".join(
-                    f""" {str(row_data) if row_data is not None
-                    else 'NULL':^{table_columns_length[i]}} """
-                    for i, row_data in enumerate(result)
-                )
-                + "|"
-            )
-            print(table_row)
-            if limit + 1 == result_limit:
-                is_truncated = True
-                break
+        int: The number of rows in the results.
+        """
+        renderer = renderer or AsciiRenderer(row_limit=result_limit)
+        return renderer.render(table_column_names, results, exec_time)
+
+    @staticmethod
+    def __iterate_rows(cursor_object: object, fetch_size: int = 1000) -> Iterator[tuple]:
+        """Yields the rows of the current result set, fetching `fetch_size` rows at a time"""
+        while rows := cursor_object.fetchmany(fetch_size):
+            yield from rows
+
+    @staticmethod
+    def set_statement_timeout(cursor_object: object, seconds: Optional[float]) -> None:
+        """
+        Sets the statement timeout of the cursor's connection, used by every later query.
+
+        - PostgreSQL: the session `statement_timeout`. Inside a transaction the setting is
+          reverted if the transaction is rolled back.
+        - MySQL: the session `MAX_EXECUTION_TIME`, which MySQL applies to SELECT statements.
+        - SQLite: a progress handler installed while `execute_query` and
+          `execute_display_query_results` run. Remove the timeout before closing a
+          connection not opened by `SQLiteConnectionFactory`, which does it on close.
+
+        Statements that run longer raise QueryTimeoutError.
+
+        Args:
+            cursor_object (object): A database cursor object of the connection.
+            seconds (float, optional): The timeout in seconds, None or 0 to remove it.
+
+        Raises:
+            ValueError: If the database type does not support statement timeouts.
+        """
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        dialect = get_dialect(cursor_type)
+        if not hasattr(dialect, "set_statement_timeout"):
+            raise ValueError(f"Statement timeouts are not supported for: {cursor_type}")
+        dialect.set_statement_timeout(SQLUtilities._get_connection(cursor_object),
+                                      cursor_object, seconds)
+
+    @staticmethod
+    def cancel_query(cursor_object: object,
+                     connection_factory: Optional[Callable[[], object]] = None) -> None:
+        """
+        Cancels the statement running on the cursor's connection. It is meant to be called
+        from another thread than the one running the statement, which then raises
+        QueryCancelledError.
+
+        - PostgreSQL: `connection.cancel()`
+        - MySQL: `KILL QUERY <connection id>`, sent over a second connection opened with
+          `connection_factory`
+        - SQLite: `connection.interrupt()`
+
+        Args:
+            cursor_object (object): The cursor running the statement.
+            connection_factory (Callable, optional): Returns a new connection (MySQL only).
+
+        Raises:
+            ValueError: If the database type does not support cancellation, or a MySQL
+                        query is cancelled without a connection_factory.
+        """
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        dialect = get_dialect(cursor_type)
+        if not hasattr(dialect, "cancel"):
+            raise ValueError(f"Cancelling queries is not supported for: {cursor_type}")
+        dialect.cancel(SQLUtilities._get_connection(cursor_object), connection_factory)
 
-        SQLUtilities.__print_plus_dashes(table_columns_length)
-        if is_truncated and not is_same:
-            print(f"!!!Result Truncated. Showing only {result_limit} results!!!")
-        message = "row returned" if len(results) == 1 else "rows returned"
-        print(f"{len(results)} {message} in time: ({exec_time} sec)")
-        print("\n")
+    @staticmethod
+    def __interruptible(cursor_object: object, timeout: Optional[float],
+                        query: str) -> ContextManager[str]:
+        """
+        Returns the dialect's context manager applying a statement timeout and translating
+        timeouts and cancellations; it yields the query to execute.
+        """
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        dialect = get_dialect(cursor_type)
+        if not hasattr(dialect, "interruptible"):
+            if timeout is not None:
+                raise ValueError(f"Statement timeouts are not supported for: {cursor_type}")
+            return contextlib.nullcontext(query)
+        return dialect.interruptible(SQLUtilities._get_connection(cursor_object),
+                                     cursor_object, timeout, query)
 
     @staticmethod
-    def execute_query(query: str, cursor_object: object) -> None:
-        """ Executes the passed query"""
+    def execute_query(query: str, cursor_object: object,
+                      parameters: Optional[tuple] = None, timeout: Optional[float] = None) -> None:
+        """
+        Executes the passed query, binding `parameters` to its placeholders if given.
+        With a `timeout` (in seconds) the statement is stopped with QueryTimeoutError once it
+        runs longer; see `set_statement_timeout`.
+        """
         start_time = time.perf_counter()
         exec_time: int = 0
+        with SQLUtilities.__interruptible(cursor_object, timeout, query) as bounded_query:
+            try:
+                if parameters is None:
+                    cursor_object.execute(bounded_query)
+                else:
+                    cursor_object.execute(bounded_query, parameters)
+                elapsed = time.perf_counter() - start_time
+                exec_time = round(elapsed, 3)
+                print(f"Query ran successfully in time: ({exec_time} sec)")
+            except SQLUtilities._get_driver_errors(cursor_object) + (SyntaxError,) as error:
+                print(f"An error occurred: {error}")
+                raise
+        if SQLUtilities._query_listeners:
+            row_count = getattr(cursor_object, "rowcount", -1)
+            SQLUtilities._notify_query_listeners(query, cursor_object, elapsed,
+                                                 row_count if row_count >= 0 else None,
+                                                 parameters)
+
+    @staticmethod
+    def execute_script(script: str, cursor_object: object, commit_every: Optional[int] = None,
+                       stop_on_error: bool = True,
+                       renderer: Optional[Renderer] = None) -> list[tuple]:
+        """
+        Executes a multi-statement SQL script inside explicit transactions and displays
+        the time taken by each statement.
+
+        The script is split on semicolons that are outside of quotes, comments and
+        PostgreSQL dollar-quoted bodies (MySQL style `DELIMITER` lines are honoured).
+        All statements run in one transaction, or in batches of `commit_every` statements
+        that are committed separately, so a setup script no longer pays a commit (and an
+        fsync on SQLite) for every statement.
+
+        Supported databases:
+        - MySQL (DDL statements commit implicitly on MySQL, ending the current batch early;
+          with stop_on_error=False they run without a savepoint, since the implicit commit
+          would destroy it, so a failing DDL statement is reported but cannot be undone)
+        - PostgreSQL
+        - SQLite
+
+        Args:
+            script (str): The SQL statements to execute.
+            cursor_object (object): A database cursor object used to execute SQL queries.
+            commit_every (int, optional): Commit after this many statements.
+                                          Defaults to None (one transaction for the script).
+            stop_on_error (bool): When True (the default) a failing statement rolls back
+                the current transaction and the error is raised. When False every statement
+                runs under a savepoint; a failing statement is rolled back to its savepoint,
+                reported, and the script continues.
+            renderer (Renderer, optional): The renderer used for the timing report.
+
+        Returns:
+            list[tuple]: One `(statement_number, statement, exec_time, status)` tuple per
+            statement that was executed.
+
+        Raises:
+            ValueError: If the script is empty, commit_every is not positive or the
+                        database type is not supported.
+            AssertionError: If the provided cursor object is not valid.
+        """
+        if not script.strip():
+            raise ValueError("Script cannot be empty.")
+        if commit_every is not None and commit_every < 1:
+            raise ValueError("commit_every must be a positive integer.")
+
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        if cursor_type not in (Constants.MYSQL, Constants.POSTGRES, Constants.SQLITE):
+            raise ValueError(f"Unsupported cursor type: {cursor_type}")
+        dialect = get_dialect(cursor_type)
+        connection = SQLUtilities._get_connection(cursor_object)
+        statements = SQLUtilities.__split_sql_script(script,
+                                                     hash_comments=cursor_type == Constants.MYSQL)
+
+        timings: list = []
+        start_time = time.perf_counter()
+        dialect.begin_transaction(connection, cursor_object)
         try:
-            cursor_object.execute(query)
-            exec_time = time.perf_counter() - start_time
-            exec_time = round(exec_time, 3)
-            print(f"Query ran successfully in time: ({exec_time} sec)")
-        except (sqlite_error, postgres_error, SyntaxError) as error:
+            for number, statement in enumerate(statements, start=1):
+                savepoint = f"script_statement_{number}"
+                use_savepoint = not stop_on_error and not (
+                    cursor_type == Constants.MYSQL and statement.split(None, 1)[0].upper()
+                    in SQLUtilities.MYSQL_IMPLICIT_COMMIT_KEYWORDS)
+                if use_savepoint:
+                    cursor_object.execute(f"SAVEPOINT {savepoint}")
+                statement_start = time.perf_counter()
+                status = "OK"
+                try:
+                    cursor_object.execute(statement)
+                except Exception as error:  # pylint: disable=broad-except
+                    if stop_on_error:
+                        timings.append((number, statement, round(time.perf_counter()
+                                                                 - statement_start, 3),
+                                        f"FAILED: {error}"))
+                        raise
+                    if use_savepoint:
+                        cursor_object.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                        status = f"ROLLED BACK: {error}"
+                    else:
+                        status = f"FAILED: {error}"
+                else:
+                    if use_savepoint:
+                        cursor_object.execute(f"RELEASE SAVEPOINT {savepoint}")
+                timings.append((number, statement,
+                                round(time.perf_counter() - statement_start, 3), status))
+
+                if commit_every and number % commit_every == 0 and number < len(statements):
+                    dialect.commit(connection, cursor_object)
+                    dialect.begin_transaction(connection, cursor_object)
+            dialect.commit(connection, cursor_object)
+        except Exception as error:
+            dialect.rollback(connection, cursor_object)
             print(f"An error occurred: {error}")
+            print("The uncommitted statements of the script were rolled back.")
             raise
+        finally:
+            exec_time = round(time.perf_counter() - start_time, 3)
+            SQLUtilities.__display_results(
+                ["#", "statement", "time (sec)", "status"],
+                [(number, " ".join(statement.split())[:60], statement_time, status)
+                 for number, statement, statement_time, status in timings],
+                exec_time, None, renderer)
+        return timings
+
+    @staticmethod
+    def __split_sql_script(script: str, hash_comments: bool = False) -> list[str]:
+        """
+        Splits a SQL script into statements.
+
+        Semicolons (or the delimiter set by a MySQL `DELIMITER` line) only end a statement
+        when they are outside quoted strings, quoted identifiers, comments and
+        PostgreSQL dollar-quoted strings. `#` starts a comment only when `hash_comments`
+        is set (MySQL), since it is an operator on PostgreSQL.
+        """
+        statements: list = []
+        delimiter = ";"
+        current: list = []
+        # Whether `current` holds more than whitespace, tracked to keep splitting linear
+        has_content = False
+        index, length = 0, len(script)
+
+        def end_statement():
+            nonlocal has_content
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current.clear()
+            has_content = False
+
+        while index < length:
+            char = script[index]
+
+            if not has_content and script[index:index + 10].upper() == "DELIMITER ":
+                line_end = script.find("\n", index)
+                line_end = length if line_end == -1 else line_end
+                delimiter = script[index + 10:line_end].strip() or ";"
+                current.clear()
+                index = line_end + 1
+                continue
+
+            if char in ("'", '"', "`"):
+                closing = index + 1
+                while closing < length:
+                    if script[closing] == "\\" and char != "`":
+                        closing += 2
+                        continue
+                    if script[closing] == char:
+                        # A doubled quote is an escaped quote
+                        if closing + 1 < length and script[closing + 1] == char:
+                            closing += 2
+                            continue
+                        break
+                    closing += 1
+                current.append(script[index:closing + 1])
+                has_content = True
+                index = closing + 1
+                continue
+
+            if script.startswith("--", index) or (hash_comments and char == "#"):
+                line_end = script.find("\n", index)
+                line_end = length if line_end == -1 else line_end
+                current.append(script[index:line_end])
+                has_content = True
+                index = line_end
+                continue
+
+            if script.startswith("/*", index):
+                comment_end = script.find("*/", index + 2)
+                comment_end = length if comment_end == -1 else comment_end + 2
+                current.append(script[index:comment_end])
+                has_content = True
+                index = comment_end
+                continue
+
+            if char == "$":
+                tag_end = script.find("$", index + 1)
+                tag = script[index:tag_end + 1] if tag_end != -1 else ""
+                if tag and (tag == "$$" or tag[1:-1].isidentifier()):
+                    body_end = script.find(tag, tag_end + 1)
+                    body_end = length if body_end == -1 else body_end + len(tag)
+                    current.append(script[index:body_end])
+                    has_content = True
+                    index = body_end
+                    continue
+
+            if script.startswith(delimiter, index):
+                end_statement()
+                index += len(delimiter)
+                continue
+
+            current.append(char)
+            has_content = has_content or not char.isspace()
+            index += 1
+
+        end_statement()
+        # Drop statements that only contain comments
+        return [statement for statement in statements
+                if SQLUtilities.__strip_sql_comments(statement)]
+
+    @staticmethod
+    def __strip_sql_comments(statement: str) -> str:
+        """Returns the statement without leading line and block comments"""
+        statement = statement.strip()
+        while statement.startswith(("--", "#", "/*")):
+            if statement.startswith("/*"):
+                end = statement.find("*/")
+                statement = statement[end + 2:].strip() if end != -1 else ""
+            else:
+                end = statement.find("\n")
+                statement = statement[end + 1:].strip() if end != -1 else ""
+        return statement
 
 
     @staticmethod
     def execute_display_query_results(
         query: str,
         cursor_object: object,
-        logger: Optional[object] = None
+        logger: Optional[object] = None,
+        renderer: Optional[Renderer] = None,
+        parameters: Optional[tuple] = None,
+        timeout: Optional[float] = None
     ) -> None:
         """
         Executes a SQL query and displays the results in a formatted table.
 
+        Rows are fetched in batches and streamed to the renderer, so large result sets
+        can be written to a file without holding them in memory.
+
         Args:
             query (str): The SQL query to be executed.
             cursor_object: The database cursor object used to execute the query.
             logger (Optional[object], optional): A logger object for logging query execution.
             Defaults to None.
+            renderer (Optional[Renderer], optional): The renderer used to write the results,
+            e.g. `CsvRenderer(sink=open("out.csv", "w"))` or `HtmlRenderer()` in Jupyter.
+            Defaults to an ASCII table printed to stdout.
+            parameters (Optional[tuple], optional): Values bound to the placeholders
+            of the query. Defaults to None.
+            timeout (Optional[float], optional): The maximum number of seconds the query may
+            run. Defaults to the connection's timeout (see `set_statement_timeout`).
 
         Returns:
             None: This function does not return a value; it prints the results directly.
+
+        Raises:
+            QueryTimeoutError: If the query runs longer than the timeout.
+            QueryCancelledError: If the query is cancelled with `cancel_query`.
         """
         cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
 
-        result_limit: int = 50
+        result_limit: Optional[int] = 50
         if logger:
             logger.info(f"Executing the query: {query}")
 
         query_string: str = query.lower()
         if "limit" in query_string:
-            index_of_limit: int = query_string.index("limit")
-            result_limit = query_string[index_of_limit + 6:]
+            # The query bounds its own result set
+            result_limit = None
         start_time = time.perf_counter()
         exec_time: int = 0
-        try:
-            cursor_object.execute(query)
-            exec_time = time.perf_counter() - start_time
-            exec_time = round(exec_time, 3)
-            results = cursor_object.fetchall()
-        except (sqlite_error, postgres_error, SyntaxError) as error:
-            print(f"An error occurred: {error}")
-            raise error
-        if Constants.MYSQL == cursor_type:
-            table_column_names = cursor_object.column_names
-        else:
-            table_column_names = [
-                description[0] for description in cursor_object.description]
-        SQLUtilities.__display_results(
-            table_column_names, results, exec_time, result_limit
-        )
+        # The rows are fetched inside the block so the timeout also bounds a SQLite fetch
+        with SQLUtilities.__interruptible(cursor_object, timeout, query) as bounded_query:
+            try:
+                if parameters is None:
+                    cursor_object.execute(bounded_query)
+                else:
+                    cursor_object.execute(bounded_query, parameters)
+                elapsed = time.perf_counter() - start_time
+                exec_time = round(elapsed, 3)
+            except SQLUtilities._get_driver_errors(cursor_object) + (SyntaxError,) as error:
+                print(f"An error occurred: {error}")
+                raise error
+            if Constants.MYSQL == cursor_type:
+                table_column_names = cursor_object.column_names
+            else:
+                table_column_names = [
+                    description[0] for description in cursor_object.description]
+            row_count = SQLUtilities.__display_results(
+                table_column_names, SQLUtilities.__iterate_rows(cursor_object), exec_time,
+                result_limit, renderer
+            )
+        SQLUtilities._notify_query_listeners(query, cursor_object, elapsed, row_count,
+                                             parameters)
@@ -0,0 +1,448 @@
+""" Pipelined copy of tables between the supported databases: MySQL, Postgres and Sqlite """
+
+# Import the required modules
+
+import datetime
+import decimal
+import pathlib
+import queue
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Iterable, Iterator, Optional
+from .constants import Constants
+from .dialects import get_dialect
+from .sql_utilities import SQLUtilities
+
+# Values sqlite3 binds natively; other driver types (Decimal, date, UUID, ...) are adapted
+SQLITE_NATIVE_TYPES: tuple = (int, float, str, bytes, type(None))
+
+# Generic type family -> declared type on each destination database.
+# "{length}", "{precision}" and "{scale}" are filled in from the source type arguments.
+TYPE_MAPPINGS: dict = {
+    "smallint": {Constants.MYSQL: "SMALLINT", Constants.POSTGRES: "SMALLINT",
+                 Constants.SQLITE: "INTEGER"},
+    "integer": {Constants.MYSQL: "INT", Constants.POSTGRES: "INTEGER",
+                Constants.SQLITE: "INTEGER"},
+    "bigint": {Constants.MYSQL: "BIGINT", Constants.POSTGRES: "BIGINT",
+               Constants.SQLITE: "INTEGER"},
+    "decimal": {Constants.MYSQL: "DECIMAL({precision}, {scale})",
+                Constants.POSTGRES: "NUMERIC({precision}, {scale})",
+                Constants.SQLITE: "DECIMAL({precision}, {scale})"},
+    "unbounded_decimal": {Constants.MYSQL: "DECIMAL(65, 30)", Constants.POSTGRES: "NUMERIC",
+                          Constants.SQLITE: "NUMERIC"},
+    "float": {Constants.MYSQL: "DOUBLE", Constants.POSTGRES: "DOUBLE PRECISION",
+              Constants.SQLITE: "REAL"},
+    "boolean": {Constants.MYSQL: "BOOLEAN", Constants.POSTGRES: "BOOLEAN",
+                Constants.SQLITE: "BOOLEAN"},
+    "varchar": {Constants.MYSQL: "VARCHAR({length})", Constants.POSTGRES: "VARCHAR({length})",
+                Constants.SQLITE: "VARCHAR({length})"},
+    "char": {Constants.MYSQL: "CHAR({length})", Constants.POSTGRES: "CHAR({length})",
+             Constants.SQLITE: "CHAR({length})"},
+    "text": {Constants.MYSQL: "LONGTEXT", Constants.POSTGRES: "TEXT",
+             Constants.SQLITE: "TEXT"},
+    "date": {Constants.MYSQL: "DATE", Constants.POSTGRES: "DATE",
+             Constants.SQLITE: "DATE"},
+    "time": {Constants.MYSQL: "TIME", Constants.POSTGRES: "TIME",
+             Constants.SQLITE: "TIME"},
+    "timestamp": {Constants.MYSQL: "DATETIME(6)", Constants.POSTGRES: "TIMESTAMP",
+                  Constants.SQLITE: "TIMESTAMP"},
+    "timestamptz": {Constants.MYSQL: "DATETIME(6)", Constants.POSTGRES: "TIMESTAMPTZ",
+                    Constants.SQLITE: "TIMESTAMP"},
+    "binary": {Constants.MYSQL: "LONGBLOB", Constants.POSTGRES: "BYTEA",
+               Constants.SQLITE: "BLOB"},
+    "json": {Constants.MYSQL: "JSON", Constants.POSTGRES: "JSONB",
+             Constants.SQLITE: "TEXT"},
+}
+
+# Declared source type (without arguments) -> generic type family
+TYPE_FAMILIES: dict = {
+    "tinyint": "smallint", "smallint": "smallint", "int2": "smallint",
+    "smallserial": "smallint", "mediumint": "integer", "int": "integer",
+    "int4": "integer", "integer": "integer", "serial": "integer",
+    "bigint": "bigint", "int8": "bigint", "bigserial": "bigint",
+    "decimal": "decimal", "numeric": "decimal",
+    "float": "float", "double": "float", "real": "float",
+    "double precision": "float", "float4": "float", "float8": "float",
+    "bool": "boolean", "boolean": "boolean", "bit": "boolean",
+    "varchar": "varchar", "character varying": "varchar", "nvarchar": "varchar",
+    "char": "char", "character": "char", "nchar": "char", "bpchar": "char",
+    "text": "text", "tinytext": "text", "mediumtext": "text", "longtext": "text",
+    "clob": "text", "enum": "text", "set": "text", "uuid": "text",
+    "date": "date", "time": "time", "time without time zone": "time",
+    "datetime": "timestamp", "timestamp": "timestamp",
+    "timestamp without time zone": "timestamp",
+    "timestamptz": "timestamptz", "timestamp with time zone": "timestamptz",
+    "blob": "binary", "tinyblob": "binary", "mediumblob": "binary", "longblob": "binary",
+    "binary": "binary", "varbinary": "binary", "bytea": "binary",
+    "json": "json", "jsonb": "json",
+}
+
+
+class TableCopy:
+    """Copies tables between MySQL, PostgreSQL and SQLite"""
+
+    @staticmethod
+    def map_column_type(declared_type: str, target_cursor_type: str,
+                        is_primary_key: bool = False) -> str:
+        """
+        Maps a declared column type of one database to the equivalent type on another.
+
+        The declared type is reduced to a generic family (e.g. `character varying(100)`,
+        `VARCHAR(100)` and `nvarchar(100)` all become `varchar` with a length of 100)
+        and then rendered with the spelling of the target database. Unknown types fall
+        back to the text family.
+
+        Args:
+            declared_type (str): The column type as reported by `SQLUtilities.get_columns`.
+            target_cursor_type (str): The cursor type name of the destination database.
+            is_primary_key (bool): Whether the column is part of the primary key. MySQL
+                                   cannot index unbounded text, so such keys become VARCHAR.
+
+        Returns:
+            str: The declared type to use on the destination database.
+        """
+        family, arguments = TableCopy.get_type_family(declared_type)
+        if family in ("varchar", "char") and not arguments:
+            family = "varchar" if target_cursor_type == Constants.MYSQL else "text"
+            arguments = ["255"]
+        if family == "text" and is_primary_key and target_cursor_type == Constants.MYSQL:
+            family, arguments = "varchar", ["255"]
+        if family == "decimal" and not arguments:
+            family = "unbounded_decimal"
+
+        return TYPE_MAPPINGS[family][target_cursor_type].format(
+            length=arguments[0] if arguments else "",
+            precision=arguments[0] if arguments else "",
+            scale=arguments[1] if len(arguments) > 1 else "0")
+
+    @staticmethod
+    def get_type_family(declared_type: str) -> tuple[str, list[str]]:
+        """
+        Reduces a declared column type to its generic family and type arguments,
+        e.g. `character varying(100)` to `("varchar", ["100"])`.
+
+        Args:
+            declared_type (str): The column type as reported by `SQLUtilities.get_columns`.
+
+        Returns:
+            tuple[str, list[str]]: The family (a key of TYPE_MAPPINGS) and the arguments.
+        """
+        declared_type = (declared_type or "").strip().lower()
+        match = re.match(r"^([a-z0-9_ ]+?)\s*(?:\((.*?)\))?(\s+unsigned)?(\s+zerofill)?\s*$",
+                         declared_type)
+        base_type, arguments = (match.group(1), match.group(2)) if match else (declared_type, None)
+        family = TYPE_FAMILIES.get(base_type, "text")
+        arguments = [argument.strip() for argument in arguments.split(",")] if arguments else []
+
+        # MySQL reports booleans as tinyint(1)
+        if base_type == "tinyint" and arguments == ["1"]:
+            family = "boolean"
+        return family, arguments
+
+    @staticmethod
+    def get_create_table_query(table_name: str, columns: list[tuple],
+                               target_cursor_type: str) -> str:
+        """
+        Builds a CREATE TABLE IF NOT EXISTS statement for the destination database.
+
+        Args:
+            table_name (str): The name of the table to create.
+            columns (list[tuple]): Column metadata as returned by `SQLUtilities.get_columns`.
+            target_cursor_type (str): The cursor type name of the destination database.
+
+        Returns:
+            str: The CREATE TABLE statement.
+        """
+        column_definitions = [
+            f"{column_name} "
+            f"{TableCopy.map_column_type(declared_type, target_cursor_type, is_primary_key)}"
+            f"{'' if is_nullable else ' NOT NULL'}"
+            for column_name, declared_type, is_nullable, is_primary_key in columns]
+        primary_key = [column[0] for column in columns if column[3]]
+        if primary_key:
+            column_definitions.append(f"PRIMARY KEY ({', '.join(primary_key)})")
+        return f"CREATE TABLE IF NOT EXISTS {table_name} ({', '.join(column_definitions)});"
+
+    @staticmethod
+    def bulk_insert(table_name: str, column_names: list[str], rows: list[tuple],
+                    cursor_object: object) -> None:
+        """
+        Inserts many rows using the fastest load path of the database.
+
+        - PostgreSQL: `COPY ... FROM STDIN` in text format
+        - MySQL: `executemany`, which the connector rewrites into multi-row INSERTs
+        - SQLite: `executemany` with a prepared INSERT statement
+
+        The caller is responsible for committing.
+
+        Args:
+            table_name (str): The table to load the rows into.
+            column_names (list[str]): The columns the row values belong to.
+            rows (list[tuple]): The rows to insert.
+            cursor_object (object): A database cursor object for the destination database.
+
+        Raises:
+            ValueError: If the database type is not supported.
+        """
+        if not rows:
+            return
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        columns = ", ".join(column_names)
+
+        match cursor_type:
+            case Constants.POSTGRES:
+                buffer = _CopyBuffer(rows)
+                cursor_object.copy_expert(f"COPY {table_name} ({columns}) FROM STDIN", buffer)
+            case Constants.MYSQL | Constants.SQLITE:
+                if cursor_type == Constants.SQLITE:
+                    rows = TableCopy.__sqlite_rows(rows)
+                placeholders = ", ".join([get_dialect(cursor_type).PLACEHOLDER] * len(column_names))
+                cursor_object.executemany(
+                    f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})", rows)
+            case _:
+                raise ValueError(f"Unsupported cursor type: {cursor_type}")
+
+    @staticmethod
+    def __sqlite_rows(rows: list[tuple]) -> list[tuple]:
+        """Adapts the values sqlite3 cannot bind, e.g. when loading rows read from Postgres"""
+        if all(type(value) in SQLITE_NATIVE_TYPES for row in rows for value in row):
+            return rows
+
+        def adapt(value: object) -> object:
+            if type(value) in SQLITE_NATIVE_TYPES:
+                return value
+            if isinstance(value, (bytearray, memoryview)):
+                return bytes(value)
+            if isinstance(value, bool):
+                return int(value)
+            if isinstance(value, decimal.Decimal):
+                return str(value)
+            if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+                return value.isoformat(" ") if isinstance(value, datetime.datetime) \
+                    else value.isoformat()
+            return str(value)
+        return [tuple(adapt(value) for value in row) for row in rows]
+
+    @staticmethod
+    def copy_table(src_cursor: object, dst_cursor: object, table_name: str,
+                   target_table_name: Optional[str] = None, chunk_size: int = 10000,
+                   queue_size: int = 4, resume: bool = True) -> dict:
+        """
+        Copies a table from one database to another through a read/write pipeline.
+
+        The destination table is created (if needed) with column types mapped from the
+        source metadata. Rows are read in chunks of `chunk_size` on a reader thread and
+        handed through a bounded queue to the calling thread, which writes each chunk with
+        the destination's bulk load path and commits it. Reading the next chunk therefore
+        overlaps with writing the current one, while the queue bounds memory use.
+
+        Tables with a single column primary key are read with keyset pagination in key
+        order, so an interrupted copy resumes after the largest key already committed in
+        the destination. Other tables are read in column order and resume by skipping
+        the number of rows already in the destination.
+
+        Args:
+            src_cursor (object): A cursor on the database to copy from.
+            dst_cursor (object): A cursor on the database to copy to.
+            table_name (str): The name of the table to copy.
+            target_table_name (str, optional): The destination table name.
+                                               Defaults to `table_name`.
+            chunk_size (int): The number of rows read, written and committed at a time.
+            queue_size (int): The number of chunks that can wait between reader and writer.
+            resume (bool): Continue after the rows already committed in the destination.
+                           When False the copy starts at the first source row.
+
+        Returns:
+            dict: The rows copied, chunks committed, elapsed seconds and rows per second.
+
+        Raises:
+            ValueError: If the table name is empty or chunk_size is not positive.
+            AssertionError: If one of the cursor objects is not valid.
+        """
+        if not table_name.strip():
+            raise ValueError(Constants.INVALID_TABLE_ARGUMENT)
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer.")
+
+        src_type = SQLUtilities._get_cursor_type_name(src_cursor)
+        dst_type = SQLUtilities._get_cursor_type_name(dst_cursor)
+        target_table_name = target_table_name or table_name
+
+        columns = SQLUtilities.get_columns(table_name, src_cursor)
+        if not columns:
+            raise ValueError(f"Table '{table_name}' does not exist or has no columns.")
+        column_names = [column[0] for column in columns]
+        primary_key = [column[0] for column in columns if column[3]]
+        key_column = primary_key[0] if len(primary_key) == 1 else None
+
+        dst_cursor.execute(TableCopy.get_create_table_query(target_table_name, columns, dst_type))
+        dst_connection = SQLUtilities._get_connection(dst_cursor)
+        dst_connection.commit()
+
+        # Work out where a previous run stopped from what is committed in the destination
+        last_key, skip_rows = None, 0
+        if resume:
+            if key_column:
+                dst_cursor.execute(f"SELECT MAX({key_column}) FROM {target_table_name};")
+                last_key = dst_cursor.fetchone()[0]
+            else:
+                dst_cursor.execute(f"SELECT COUNT(*) FROM {target_table_name};")
+                skip_rows = dst_cursor.fetchone()[0]
+        if last_key is not None or skip_rows:
+            print(f"Resuming copy of '{table_name}' after "
+                  f"{f'{key_column} = {last_key}' if last_key is not None else f'{skip_rows} rows'}")
+
+        def read_chunks(cursor_object: object) -> Iterator[list]:
+            return TableCopy.__read_chunks(cursor_object, src_type, table_name, column_names,
+                                           key_column, last_key, skip_rows, chunk_size)
+
+        start_time = time.perf_counter()
+        total_rows, total_chunks = 0, 0
+        for rows in TableCopy.__pipeline(read_chunks, src_cursor, src_type, queue_size):
+            TableCopy.bulk_insert(target_table_name, column_names, rows, dst_cursor)
+            dst_connection.commit()
+            total_rows += len(rows)
+            total_chunks += 1
+
+        elapsed = time.perf_counter() - start_time
+        exec_time = round(elapsed, 3)
+        rows_per_second = round(total_rows / elapsed) if elapsed else total_rows
+        print(f"Copied {total_rows} rows from '{table_name}' to '{target_table_name}' in "
+              f"{total_chunks} chunks in time: ({exec_time} sec) [{rows_per_second} rows/sec]")
+        return {"rows": total_rows, "chunks": total_chunks, "seconds": exec_time,
+                "rows_per_second": rows_per_second}
+
+    @staticmethod
+    def __read_chunks(cursor_object: object, cursor_type: str, table_name: str,
+                      column_names: list[str], key_column: Optional[str],
+                      last_key: object, skip_rows: int, chunk_size: int) -> Iterator[list]:
+        """Yields the source rows in chunks of at most `chunk_size` rows"""
+        columns = ", ".join(column_names)
+        placeholder = get_dialect(cursor_type).PLACEHOLDER
+
+        if key_column:
+            key_index = column_names.index(key_column)
+            while True:
+                if last_key is None:
+                    cursor_object.execute(f"SELECT {columns} FROM {table_name} "
+                                          f"ORDER BY {key_column} LIMIT {chunk_size};")
+                else:
+                    cursor_object.execute(f"SELECT {columns} FROM {table_name} "
+                                          f"WHERE {key_column} > {placeholder} "
+                                          f"ORDER BY {key_column} LIMIT {chunk_size};",
+                                          (last_key,))
+                rows = cursor_object.fetchall()
+                if not rows:
+                    return
+                last_key = rows[-1][key_index]
+                yield rows
+                if len(rows) < chunk_size:
+                    return
+
+        order_by = ", ".join(str(index + 1) for index in range(len(column_names)))
+        cursor_object.execute(f"SELECT {columns} FROM {table_name} ORDER BY {order_by};")
+        while skip_rows > 0:
+            skipped = cursor_object.fetchmany(min(chunk_size, skip_rows))
+            if not skipped:
+                return
+            skip_rows -= len(skipped)
+        while rows := cursor_object.fetchmany(chunk_size):
+            yield rows
+
+    @staticmethod
+    def __pipeline(read_chunks: Callable[[object], Iterator[list]], src_cursor: object,
+                   src_type: str, queue_size: int) -> Iterable[list]:
+        """
+        Runs the chunk reader on a background thread and yields the chunks it produces.
+
+        sqlite3 objects can only be used on the thread that created them, so a SQLite
+        source is read through a separate read-only connection to the same file. An
+        in-memory SQLite source cannot be reopened and is read on the calling thread.
+        Changes not yet committed on the source connection are not visible to the reader.
+        """
+        database_uri = None
+        if src_type == Constants.SQLITE:
+            src_cursor.execute("PRAGMA database_list;")
+            database_file = next((row[2] for row in src_cursor.fetchall() if row[1] == "main"), "")
+            if not database_file:
+                yield from read_chunks(src_cursor)
+                return
+            database_uri = f"{pathlib.Path(database_file).as_uri()}?mode=ro"
+
+        chunk_queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        stop_event = threading.Event()
+        errors: list = []
+        end_of_data = object()
+
+        def reader():
+            reader_connection = None
+            try:
+                reader_cursor = src_cursor
+                if database_uri:
+                    reader_connection = sqlite3.connect(database_uri, uri=True)
+                    reader_cursor = reader_connection.cursor()
+                for rows in read_chunks(reader_cursor):
+                    while not stop_event.is_set():
+                        try:
+                            chunk_queue.put(rows, timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+                    if stop_event.is_set():
+                        return
+            except Exception as error:  # pylint: disable=broad-except
+                errors.append(error)
+            finally:
+                if reader_connection is not None:
+                    reader_connection.close()
+                chunk_queue.put(end_of_data)
+
+        reader_thread = threading.Thread(target=reader, name="table-copy-reader",
+                                         daemon=True)
+        reader_thread.start()
+        try:
+            while (rows := chunk_queue.get()) is not end_of_data:
+                yield rows
+        finally:
+            stop_event.set()
+            # Unblock the reader if it is waiting on a full queue
+            while reader_thread.is_alive():
+                try:
+                    chunk_queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            reader_thread.join()
+        if errors:
+            raise errors[0]
+
+
+class _CopyBuffer:
+    """File-like object that encodes rows for `COPY ... FROM STDIN` in text format on demand"""
+
+    def __init__(self, rows: list[tuple]):
+        self.__rows = iter(rows)
+        self.__pending = ""
+
+    @staticmethod
+    def __encode(value: object) -> str:
+        if value is None:
+            return "\\N"
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return "\\\\x" + bytes(value).hex()
+        return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+                .replace("\n", "\\n").replace("\r", "\\r"))
+
+    def read(self, size: int = -1) -> str:
+        """Returns up to `size` characters of encoded rows"""
+        while size < 0 or len(self.__pending) < size:
+            row = next(self.__rows, None)
+            if row is None:
+                break
+            self.__pending += "\t".join(_CopyBuffer.__encode(value) for value in row) + "\n"
+        if size < 0:
+            data, self.__pending = self.__pending, ""
+        else:
+            data, self.__pending = self.__pending[:size], self.__pending[size:]
+        return data
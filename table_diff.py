@@ -0,0 +1,297 @@
+""" Chunked checksum comparison of a table between two databases """
+
+# Import the required modules
+
+import hashlib
+import math
+import time
+from typing import Optional
+from .constants import Constants
+from .dialects import get_dialect
+from .renderers import AsciiRenderer, Renderer
+from .sql_utilities import SQLUtilities
+from .table_copy import TableCopy
+
+
+class TableDiff:
+    """Compares a table between MySQL, Postgres and SQLite databases by range checksums"""
+
+    # The hex digits of the row md5 summed per range: two 28-bit parts, so sums stay integers
+    HASH_PART_DIGITS: int = 7
+    # The text hashed in place of NULL values
+    NULL_MARKER: str = "~NULL~"
+
+    @staticmethod
+    def diff_tables(src_cursor: object, dst_cursor: object, table_name: str,
+                    target_table_name: Optional[str] = None, key_column: Optional[str] = None,
+                    chunk_size: int = 10000, fanout: int = 16, row_threshold: int = 256,
+                    float_digits: int = 6, renderer: Optional[Renderer] = None) -> dict:
+        """
+        Finds the rows that differ between two copies of a table.
+
+        The table is split into key ranges of about `chunk_size` rows. For each range, both
+        databases compute the row count and a sum over the md5 of every row, so only one
+        small row per range crosses the network. Ranges whose checksums differ are split
+        into `fanout` smaller ranges until they hold at most `row_threshold` rows, and only
+        then are the keys and row hashes of those ranges fetched and compared.
+
+        Each value is normalised to the same text on every backend before hashing: numbers
+        with a fixed number of decimals (the declared scale, or `float_digits` for floating
+        point and unbounded decimals), booleans as 1/0, dates and times as ISO text without
+        fractional seconds, and binary values as lower case hex.
+
+        The key ranges are compared with < and >=, so the key must sort the same way on both
+        databases (integer keys always do; text keys depend on the collations). A key that
+        is not unique still works: a range holding a single repeated key cannot be split and
+        its rows are compared by their hashes.
+
+        Args:
+            src_cursor (object): A cursor on the first database.
+            dst_cursor (object): A cursor on the second database.
+            table_name (str): The name of the table in the first database.
+            target_table_name (str, optional): The table name in the second database.
+                                               Defaults to `table_name`.
+            key_column (str, optional): The column identifying rows. Defaults to the single
+                                        column primary key of the source table.
+            chunk_size (int): The number of rows in each top level range.
+            fanout (int): The number of sub ranges a differing range is split into.
+            row_threshold (int): The range size below which rows are compared one by one.
+            float_digits (int): The decimals kept for floating point values.
+            renderer (Renderer, optional): The renderer used to display the differences.
+
+        Returns:
+            dict: "identical", the keys "missing_in_target", "missing_in_source" and
+            "different", and the "ranges_checked", "rows_fetched", "queries" and "seconds".
+
+        Raises:
+            ValueError: If the table has no single column key, or an argument is invalid.
+        """
+        if not table_name.strip():
+            raise ValueError(Constants.INVALID_TABLE_ARGUMENT)
+        if chunk_size < 1 or fanout < 2 or row_threshold < 1:
+            raise ValueError("chunk_size and row_threshold must be positive and fanout at least 2.")
+        target_table_name = target_table_name or table_name
+        start_time = time.perf_counter()
+
+        src_columns = SQLUtilities.get_columns(table_name, src_cursor)
+        dst_columns = {column[0]: column for column in
+                       SQLUtilities.get_columns(target_table_name, dst_cursor)}
+        if not src_columns:
+            raise ValueError(f"Table '{table_name}' does not exist or has no columns.")
+        if key_column is None:
+            primary_key = [column[0] for column in src_columns if column[3]]
+            if len(primary_key) != 1:
+                raise ValueError(f"Table '{table_name}' has no single column primary key; "
+                                 "pass key_column.")
+            key_column = primary_key[0]
+        missing_columns = [column[0] for column in src_columns if column[0] not in dst_columns]
+        if missing_columns:
+            raise ValueError(f"Columns missing in '{target_table_name}': {missing_columns}")
+
+        sides = [TableDiff.__side(src_cursor, table_name, key_column, src_columns, float_digits),
+                 TableDiff.__side(dst_cursor, target_table_name, key_column,
+                                  [dst_columns[column[0]] for column in src_columns],
+                                  float_digits)]
+        report: dict = {"missing_in_target": [], "missing_in_source": [], "different": [],
+                        "ranges_checked": 0, "rows_fetched": 0, "queries": 0}
+
+        pending = [(low, high) for low, high
+                   in TableDiff.__split(sides[0], None, None, chunk_size, report)]
+        while pending:
+            low, high = pending.pop(0)
+            checksums = [TableDiff.__checksum(side, low, high, report) for side in sides]
+            report["ranges_checked"] += 1
+            if checksums[0] == checksums[1]:
+                continue
+            largest = sides[0] if checksums[0][0] >= checksums[1][0] else sides[1]
+            row_count = max(checksum[0] for checksum in checksums)
+            if row_count <= row_threshold:
+                TableDiff.__compare_rows(sides, low, high, report)
+                continue
+            sub_ranges = TableDiff.__split(largest, low, high,
+                                           math.ceil(row_count / fanout), report)
+            if len(sub_ranges) < 2:
+                # Every row of the range has the same key: splitting makes no progress
+                TableDiff.__compare_rows(sides, low, high, report)
+                continue
+            pending[:0] = sub_ranges
+
+        for difference in ("missing_in_target", "missing_in_source", "different"):
+            report[difference].sort()
+        report["identical"] = not (report["missing_in_target"] or report["missing_in_source"]
+                                   or report["different"])
+        report["seconds"] = round(time.perf_counter() - start_time, 3)
+
+        print(f"Compared '{table_name}' and '{target_table_name}' in {report['ranges_checked']} "
+              f"ranges with {report['queries']} queries, fetching {report['rows_fetched']} rows "
+              f"in time: ({report['seconds']} sec)")
+        if not report["identical"]:
+            (renderer or AsciiRenderer()).render(
+                [key_column, "difference"],
+                ((key, difference) for difference in
+                 ("missing_in_target", "missing_in_source", "different")
+                 for key in report[difference]))
+        return report
+
+    @staticmethod
+    def __side(cursor_object: object, table_name: str, key_column: str, columns: list[tuple],
+               float_digits: int) -> dict:
+        """Builds the per database expressions used to hash the rows of one table copy"""
+        cursor_type = SQLUtilities._get_cursor_type_name(cursor_object)
+        if cursor_type not in (Constants.MYSQL, Constants.POSTGRES, Constants.SQLITE):
+            raise ValueError(f"Unsupported cursor type: {cursor_type}")
+        if cursor_type == Constants.SQLITE:
+            connection = SQLUtilities._get_connection(cursor_object)
+            connection.create_function(
+                "md5", 1, lambda text: hashlib.md5(text.encode("utf-8")).hexdigest(),
+                deterministic=True)
+            connection.create_function("hex_to_int", 1, lambda text: int(text, 16),
+                                       deterministic=True)
+
+        values = [TableDiff.__normalise(column_name, declared_type, cursor_type, float_digits)
+                  for column_name, declared_type, _, _ in columns]
+        values = [f"COALESCE({value}, '{TableDiff.NULL_MARKER}')" for value in values]
+        match cursor_type:
+            case Constants.MYSQL:
+                row_hash = f"MD5(CONCAT_WS('|', {', '.join(values)}))"
+                to_int = "CAST(CONV({}, 16, 10) AS UNSIGNED)"
+            case Constants.POSTGRES:
+                row_hash = f"md5(concat_ws('|', {', '.join(values)}))"
+                to_int = f"('x' || {{}})::bit({TableDiff.HASH_PART_DIGITS * 4})::bigint"
+            case _:
+                row_hash = "md5(" + " || '|' || ".join(values) + ")"
+                to_int = "hex_to_int({})"
+        digits = TableDiff.HASH_PART_DIGITS
+        return {"cursor": cursor_type, "cursor_object": cursor_object, "table": table_name,
+                "key": key_column, "row_hash": row_hash,
+                "placeholder": get_dialect(cursor_type).PLACEHOLDER,
+                "hash_parts": [to_int.format(f"SUBSTR(row_hash, {start}, {digits})")
+                               for start in (1, digits + 1)]}
+
+    @staticmethod
+    def __normalise(column_name: str, declared_type: str, cursor_type: str,
+                    float_digits: int) -> str:
+        """Returns an expression rendering a column as backend independent text"""
+        family, arguments = TableCopy.get_type_family(declared_type)
+        scale = None
+        if family == "float" or family == "decimal" and len(arguments) < 2:
+            scale = float_digits
+        elif family == "decimal":
+            scale = int(arguments[1])
+
+        match cursor_type, family:
+            case Constants.MYSQL, ("float" | "decimal"):
+                return f"CAST(CAST({column_name} AS DECIMAL(65, {scale})) AS CHAR)"
+            case Constants.POSTGRES, ("float" | "decimal"):
+                return f"ROUND({column_name}::numeric, {scale})::text"
+            case Constants.SQLITE, ("float" | "decimal"):
+                return f"printf('%.{scale}f', {column_name})"
+            case Constants.SQLITE, ("smallint" | "integer" | "bigint" | "boolean"):
+                return f"printf('%d', {column_name})"
+            case Constants.POSTGRES, "boolean":
+                return f"CASE WHEN {column_name} THEN '1' ELSE '0' END"
+            case Constants.MYSQL, "date":
+                return f"DATE_FORMAT({column_name}, '%Y-%m-%d')"
+            case Constants.POSTGRES, "date":
+                return f"to_char({column_name}, 'YYYY-MM-DD')"
+            case Constants.SQLITE, "date":
+                return f"date({column_name})"
+            case Constants.MYSQL, "time":
+                return f"TIME_FORMAT({column_name}, '%H:%i:%S')"
+            case Constants.POSTGRES, "time":
+                return f"substr({column_name}::text, 1, 8)"
+            case Constants.SQLITE, "time":
+                return f"time({column_name})"
+            case Constants.MYSQL, ("timestamp" | "timestamptz"):
+                return f"DATE_FORMAT({column_name}, '%Y-%m-%d %H:%i:%S')"
+            case Constants.POSTGRES, "timestamp":
+                return f"to_char({column_name}, 'YYYY-MM-DD HH24:MI:SS')"
+            case Constants.POSTGRES, "timestamptz":
+                return f"to_char({column_name} AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS')"
+            case Constants.SQLITE, ("timestamp" | "timestamptz"):
+                return f"strftime('%Y-%m-%d %H:%M:%S', {column_name})"
+            case Constants.MYSQL, "binary":
+                return f"LOWER(HEX({column_name}))"
+            case Constants.POSTGRES, "binary":
+                return f"encode({column_name}, 'hex')"
+            case Constants.SQLITE, "binary":
+                return f"lower(hex({column_name}))"
+            case Constants.MYSQL, _:
+                return f"CAST({column_name} AS CHAR)"
+            case _:
+                return f"CAST({column_name} AS TEXT)"
+
+    @staticmethod
+    def __range_condition(side: dict, low: object, high: object) -> tuple[str, tuple]:
+        """Returns the WHERE clause and parameters selecting the key range [low, high)"""
+        conditions, parameters = [], []
+        if low is not None:
+            conditions.append(f"{side['key']} >= {side['placeholder']}")
+            parameters.append(low)
+        if high is not None:
+            conditions.append(f"{side['key']} < {side['placeholder']}")
+            parameters.append(high)
+        return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), tuple(parameters)
+
+    @staticmethod
+    def __execute(side: dict, query: str, parameters: tuple, report: dict) -> list:
+        report["queries"] += 1
+        side["cursor_object"].execute(query, parameters)
+        return side["cursor_object"].fetchall()
+
+    @staticmethod
+    def __split(side: dict, low: object, high: object, step: int, report: dict) -> list[tuple]:
+        """Splits a key range into ranges of `step` rows of one table copy, in one query"""
+        where, parameters = TableDiff.__range_condition(side, low, high)
+        # MOD() is not available in every SQLite build
+        boundary_filter = (f"(row_position - 1) % {step} = 0"
+                           if side["cursor"] == Constants.SQLITE
+                           else f"MOD(row_position - 1, {step}) = 0")
+        boundaries = [row[0] for row in TableDiff.__execute(side, f"""
+            SELECT range_start FROM (
+                SELECT {side['key']} AS range_start,
+                       ROW_NUMBER() OVER (ORDER BY {side['key']}) AS row_position
+                FROM {side['table']} {where}) numbered
+            WHERE {boundary_filter} AND row_position > 1
+            ORDER BY range_start;""", parameters, report)]
+        # Repeated keys give repeated boundaries, which would make empty ranges
+        edges = [low]
+        for boundary in boundaries:
+            if boundary != edges[-1]:
+                edges.append(boundary)
+        edges.append(high)
+        return list(zip(edges[:-1], edges[1:]))
+
+    @staticmethod
+    def __checksum(side: dict, low: object, high: object, report: dict) -> tuple:
+        """Returns the row count and summed row hash parts of a key range"""
+        where, parameters = TableDiff.__range_condition(side, low, high)
+        first_part, second_part = side["hash_parts"]
+        row = TableDiff.__execute(side, f"""
+            SELECT COUNT(*), SUM({first_part}), SUM({second_part})
+            FROM (SELECT {side['row_hash']} AS row_hash FROM {side['table']} {where}) hashes;""",
+                                  parameters, report)[0]
+        return tuple(int(value or 0) for value in row)
+
+    @staticmethod
+    def __compare_rows(sides: list[dict], low: object, high: object, report: dict) -> None:
+        """Fetches the keys and row hashes of a small range and records the differences"""
+        row_hashes = []
+        for side in sides:
+            where, parameters = TableDiff.__range_condition(side, low, high)
+            rows = TableDiff.__execute(side, f"""SELECT {side['key']}, {side['row_hash']}
+                                                 FROM {side['table']} {where};""",
+                                       parameters, report)
+            report["rows_fetched"] += len(rows)
+            # The sorted hashes of the rows of each key, for keys that are not unique
+            hashes: dict = {}
+            for key, row_hash in rows:
+                hashes.setdefault(key, []).append(row_hash)
+            row_hashes.append({key: sorted(values) for key, values in hashes.items()})
+        source_rows, target_rows = row_hashes
+        for key, row_hash in source_rows.items():
+            if key not in target_rows:
+                report["missing_in_target"].append(key)
+            elif target_rows[key] != row_hash:
+                report["different"].append(key)
+        report["missing_in_source"].extend(key for key in target_rows if key not in source_rows)
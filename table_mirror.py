@@ -0,0 +1,395 @@
+""" Read-through SQLite mirror of frequently queried remote tables and query results """
+
+# Import the required modules
+
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Optional
+from .constants import Constants
+from .dialects import get_dialect
+from .renderers import Renderer
+from .sql_utilities import SQLUtilities
+from .sqlite_connection import SQLiteConnectionFactory
+from .table_copy import TableCopy
+
+
+@dataclass
+class MirrorEntry:
+    """A table (or query result) materialized in the mirror"""
+    name: str
+    source_query: Optional[str]
+    parameters: Optional[tuple]
+    index_columns: list
+    max_age: Optional[float]
+    marker_query: Optional[str]
+    marker: object = None
+    refreshed_at: Optional[float] = None
+    rows: int = 0
+    refreshes: int = 0
+    hits: int = 0
+
+
+class TableMirror:
+    """
+    Materializes remote Postgres/MySQL tables, or query results, into a local SQLite
+    database and answers read queries from it while it is fresh.
+
+    An entry is stale when it is older than its `max_age` (seconds) or when its change
+    marker has moved. The marker is the result of a cheap query run on the source, e.g.
+    `SELECT MAX(updated_at) FROM tbl_orders`; Postgres tables default to the insert,
+    update and delete counters of `pg_stat_user_tables`. MySQL has no reliable cheap
+    default (information_schema update times are cached), so MySQL entries are refreshed
+    by age unless a marker query is given.
+
+    Example:
+        mirror = TableMirror(postgres_cursor, max_age=300)
+        mirror.mirror_table("tbl_products", index_columns=["category_id"])
+        mirror.execute_display_query_results("SELECT category_id, COUNT(*) FROM "
+                                             "tbl_products GROUP BY category_id;")
+    """
+
+    POSTGRES_TABLE_MARKER_QUERY: str = """
+        SELECT n_tup_ins + n_tup_upd + n_tup_del FROM pg_stat_user_tables
+        WHERE relid = %s::regclass"""
+    # The tokens of a query: quoted literals and identifiers, comments, placeholders, words
+    # and single characters. MySQL strings also take backslash escapes.
+    TOKEN_PATTERN = re.compile(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|--[^\n]*|/\*.*?\*/"""
+                               r"""|%[s%]|[A-Za-z_][\w.$]*|\S""", re.DOTALL)
+    MYSQL_TOKEN_PATTERN = re.compile(r"""'(?:[^'\\]|''|\\.)*'|"(?:[^"]|"")*"|`[^`]*`"""
+                                     r"""|--[^\n]*|/\*.*?\*/|%[s%]|[A-Za-z_][\w.$]*|\S""",
+                                     re.DOTALL)
+    # The keywords ending a FROM clause
+    FROM_CLAUSE_END: tuple = ("WHERE", "GROUP", "HAVING", "ORDER", "LIMIT", "OFFSET", "FETCH",
+                              "UNION", "INTERSECT", "EXCEPT", "WINDOW", "FOR", "RETURNING")
+    READ_QUERY_PATTERN = re.compile(r"^\s*(?:SELECT|WITH)\b", re.IGNORECASE)
+
+    def __init__(self, source_cursor: object, database: str = ":memory:",
+                 max_age: Optional[float] = 300.0, profile: str = "read_heavy_analytics",
+                 chunk_size: int = 10000):
+        """
+        Args:
+            source_cursor (object): A cursor on the remote (Postgres or MySQL) database.
+            database (str): The SQLite mirror: ":memory:" or a (temporary) file path.
+            max_age (float, optional): The default number of seconds an entry stays fresh.
+                                       None to refresh on marker changes only.
+            profile (str): The SQLiteConnectionFactory profile of the mirror connection.
+            chunk_size (int): The number of rows copied into the mirror at a time.
+        """
+        self.__source = source_cursor
+        self.__source_type = SQLUtilities._get_cursor_type_name(source_cursor)
+        self.__token_pattern = TableMirror.MYSQL_TOKEN_PATTERN \
+            if self.__source_type == Constants.MYSQL else TableMirror.TOKEN_PATTERN
+        self.__connection = SQLiteConnectionFactory.connect(database, profile)
+        self.__cursor = self.__connection.cursor()
+        self.__max_age = max_age
+        self.__chunk_size = chunk_size
+        self.__entries: dict[str, MirrorEntry] = {}
+
+    def __enter__(self) -> "TableMirror":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def cursor(self) -> sqlite3.Cursor:
+        """A cursor on the mirror database"""
+        return self.__cursor
+
+    @property
+    def entries(self) -> dict:
+        """The mirrored names mapped to their MirrorEntry"""
+        return dict(self.__entries)
+
+    def close(self) -> None:
+        """Closes the mirror database"""
+        self.__connection.close()
+
+    def mirror_table(self, table_name: str, index_columns: Optional[list] = None,
+                     max_age: Optional[float] = -1,
+                     marker_query: Optional[str] = None) -> MirrorEntry:
+        """
+        Copies a remote table into the mirror (with `TableCopy.copy_table`) and indexes it.
+
+        Args:
+            table_name (str): The remote table to mirror.
+            index_columns (list, optional): Columns to index in the mirror; a tuple of column
+                                            names creates one composite index.
+            max_age (float, optional): Seconds the copy stays fresh, None for no age limit.
+                                       Defaults to the max_age of the mirror.
+            marker_query (str, optional): A query on the source returning one value that
+                                          changes when the table changes.
+
+        Returns:
+            MirrorEntry: The mirrored table.
+
+        Raises:
+            ValueError: If the table name is empty.
+        """
+        if not table_name.strip():
+            raise ValueError(Constants.INVALID_TABLE_ARGUMENT)
+        if marker_query is None and self.__source_type == Constants.POSTGRES:
+            marker_query = TableMirror.POSTGRES_TABLE_MARKER_QUERY
+        return self.__add_entry(MirrorEntry(
+            table_name, None, None, list(index_columns or []),
+            self.__max_age if max_age == -1 else max_age, marker_query))
+
+    def mirror_query(self, name: str, query: str, parameters: Optional[tuple] = None,
+                     index_columns: Optional[list] = None,
+                     max_age: Optional[float] = -1,
+                     marker_query: Optional[str] = None) -> MirrorEntry:
+        """
+        Materializes the result of a remote query as the mirror table `name`.
+
+        Args:
+            name (str): The name of the mirror table holding the result.
+            query (str): The query run on the source.
+            parameters (tuple, optional): Values bound to the placeholders of the query.
+            index_columns (list, optional): Result columns to index in the mirror.
+            max_age (float, optional): Seconds the result stays fresh, None for no age limit.
+                                       Defaults to the max_age of the mirror.
+            marker_query (str, optional): A query on the source returning one value that
+                                          changes when the result would change.
+
+        Returns:
+            MirrorEntry: The mirrored query result.
+
+        Raises:
+            ValueError: If the name or query is empty.
+        """
+        if not name.strip() or not query.strip():
+            raise ValueError("Both a mirror table name and a query are required.")
+        return self.__add_entry(MirrorEntry(
+            name, query, parameters, list(index_columns or []),
+            self.__max_age if max_age == -1 else max_age, marker_query))
+
+    def is_fresh(self, name: str) -> bool:
+        """
+        Returns True if the entry is younger than its max_age and its marker has not moved.
+
+        Raises:
+            ValueError: If the name is not mirrored.
+        """
+        entry = self.__get_entry(name)
+        if entry.refreshed_at is None:
+            return False
+        if entry.max_age is not None and time.monotonic() - entry.refreshed_at >= entry.max_age:
+            return False
+        return entry.marker_query is None or self.__read_marker(entry) == entry.marker
+
+    def refresh(self, name: Optional[str] = None, force: bool = False) -> dict:
+        """
+        Reloads stale entries (or all of them with `force`).
+
+        Args:
+            name (str, optional): Only refresh this entry.
+            force (bool): Reload even fresh entries.
+
+        Returns:
+            dict: The refreshed entry names mapped to the number of rows loaded.
+        """
+        names = [name] if name else list(self.__entries)
+        refreshed = {}
+        for entry_name in names:
+            if force or not self.is_fresh(entry_name):
+                refreshed[entry_name] = self.__load(self.__get_entry(entry_name))
+        return refreshed
+
+    def routes_to_mirror(self, query: str, refresh_stale: bool = True) -> bool:
+        """
+        Returns True if the query would be answered by the mirror: it is a read query and
+        every table it reads is mirrored and fresh (stale ones are refreshed first when
+        `refresh_stale` is True).
+        """
+        entries = self.__covering_entries(query)
+        if not entries:
+            return False
+        for entry in entries:
+            if not self.is_fresh(entry.name):
+                if not refresh_stale:
+                    return False
+                self.__load(entry)
+        return True
+
+    def execute_display_query_results(self, query: str, renderer: Optional[Renderer] = None,
+                                      parameters: Optional[tuple] = None,
+                                      refresh_stale: bool = True) -> None:
+        """
+        Runs a read query on the mirror when it covers every table of the query, and on the
+        source otherwise (or if SQLite cannot run the query), displaying the results like
+        `SQLUtilities.execute_display_query_results`.
+
+        When parameters are given, `%s` placeholders are rewritten to `?` for the mirror
+        (see `to_sqlite_placeholders`).
+
+        Args:
+            query (str): The query to run.
+            renderer (Renderer, optional): The renderer used to display the results.
+            parameters (tuple, optional): Values bound to the placeholders of the query.
+            refresh_stale (bool): Refresh stale mirrored tables instead of using the source.
+        """
+        if self.routes_to_mirror(query, refresh_stale):
+            mirror_query = query
+            if parameters is not None and get_dialect(self.__source_type).PLACEHOLDER != "?":
+                mirror_query = TableMirror.to_sqlite_placeholders(query, self.__source_type)
+            try:
+                print("Answering from the SQLite mirror")
+                SQLUtilities.execute_display_query_results(mirror_query, self.__cursor,
+                                                           renderer=renderer,
+                                                           parameters=parameters)
+                for entry in self.__covering_entries(query):
+                    entry.hits += 1
+                return
+            except sqlite3.Error as error:
+                print(f"The mirror cannot run the query ({error}); using the source")
+        SQLUtilities.execute_display_query_results(query, self.__source, renderer=renderer,
+                                                   parameters=parameters)
+
+    @staticmethod
+    def to_sqlite_placeholders(query: str, source_type: str = Constants.POSTGRES) -> str:
+        """
+        Rewrites a query with `%s` placeholders (psycopg2, mysql-connector) for sqlite3:
+        placeholders outside quoted literals, identifiers and comments become `?`, and the
+        `%%` escapes the drivers expect alongside parameters become `%`. A `%s` inside a
+        literal stays text.
+
+        Args:
+            query (str): The query written for the source database.
+            source_type (str): The cursor type of the source, which decides whether string
+                               literals take backslash escapes (MySQL).
+
+        Returns:
+            str: The query for the SQLite mirror.
+        """
+        pattern = TableMirror.MYSQL_TOKEN_PATTERN if source_type == Constants.MYSQL \
+            else TableMirror.TOKEN_PATTERN
+
+        def rewrite(match: re.Match) -> str:
+            token = match.group()
+            if token == "%s":
+                return "?"
+            return token.replace("%%", "%") if token[0] in "%'" else token
+
+        return pattern.sub(rewrite, query)
+
+    def __add_entry(self, entry: MirrorEntry) -> MirrorEntry:
+        self.__entries[entry.name] = entry
+        self.__load(entry)
+        return entry
+
+    def __get_entry(self, name: str) -> MirrorEntry:
+        if name not in self.__entries:
+            raise ValueError(f"'{name}' is not mirrored.")
+        return self.__entries[name]
+
+    def __covering_entries(self, query: str) -> list[MirrorEntry]:
+        """The entries of every table a read query uses, or [] if one is not mirrored"""
+        if not TableMirror.READ_QUERY_PATTERN.match(query):
+            return []
+        referenced = self.__table_references(query)
+        # Names defined by a WITH clause are not tables
+        referenced -= {alias.lower() for alias in
+                       re.findall(r"\b([A-Za-z_]\w*)\s+AS\s*\(", query, re.IGNORECASE)}
+        mirrored = {entry_name.lower(): entry for entry_name, entry in self.__entries.items()}
+        if not referenced or not referenced <= mirrored.keys():
+            return []
+        return [mirrored[reference] for reference in referenced]
+
+    def __table_references(self, query: str) -> set[str]:
+        """The lower case names following FROM, JOIN or a comma of a FROM list"""
+        references: set = set()
+        depth = 0
+        # The parenthesis depths of the FROM clauses being read
+        from_depths: list = []
+        expect_table = False
+        for token in self.__token_pattern.findall(query):
+            if token.startswith(("--", "/*")):
+                continue
+            if expect_table:
+                expect_table = False
+                if token[0].isalpha() or token[0] in "_\"`":
+                    references.add(token.strip("\"`").lower())
+                    continue
+            word = token.upper()
+            if token == "(":
+                depth += 1
+            elif token == ")":
+                while from_depths and from_depths[-1] >= depth:
+                    from_depths.pop()
+                depth -= 1
+            elif word in ("FROM", "JOIN"):
+                expect_table = True
+                if word == "FROM" and not (from_depths and from_depths[-1] == depth):
+                    from_depths.append(depth)
+            elif from_depths and from_depths[-1] == depth:
+                if token == ",":
+                    expect_table = True
+                elif word in TableMirror.FROM_CLAUSE_END:
+                    from_depths.pop()
+        return references
+
+    def __read_marker(self, entry: MirrorEntry) -> object:
+        if entry.marker_query is TableMirror.POSTGRES_TABLE_MARKER_QUERY:
+            # Statistics are cached for the rest of the transaction once read
+            self.__source.execute("SELECT pg_stat_clear_snapshot();")
+            self.__source.execute(entry.marker_query, (entry.name,))
+        else:
+            self.__source.execute(entry.marker_query)
+        row = self.__source.fetchone()
+        return row[0] if row else None
+
+    def __load(self, entry: MirrorEntry) -> int:
+        """Loads the entry into a new mirror table and swaps it in, so readers never see a
+        partial copy"""
+        start_time = time.perf_counter()
+        # Read the marker first: changes made during the copy move it again
+        marker = self.__read_marker(entry) if entry.marker_query else None
+        loading_name = f"{entry.name}__mirror_loading"
+        self.__cursor.execute(f"DROP TABLE IF EXISTS {loading_name};")
+        if entry.source_query is None:
+            rows = TableCopy.copy_table(self.__source, self.__cursor, entry.name,
+                                        target_table_name=loading_name,
+                                        chunk_size=self.__chunk_size, resume=False)["rows"]
+        else:
+            rows = self.__load_query(entry, loading_name)
+
+        dialect = get_dialect(Constants.SQLITE)
+        dialect.begin_transaction(self.__connection, self.__cursor)
+        try:
+            self.__cursor.execute(f"DROP TABLE IF EXISTS {entry.name};")
+            self.__cursor.execute(f"ALTER TABLE {loading_name} RENAME TO {entry.name};")
+            for columns in entry.index_columns:
+                columns = [columns] if isinstance(columns, str) else list(columns)
+                self.__cursor.execute(
+                    f"CREATE INDEX idx_{entry.name}_{'_'.join(columns)} "
+                    f"ON {entry.name} ({', '.join(columns)});")
+            self.__cursor.execute(f"ANALYZE {entry.name};")
+            dialect.commit(self.__connection, self.__cursor)
+        except sqlite3.Error:
+            dialect.rollback(self.__connection, self.__cursor)
+            raise
+
+        entry.marker, entry.refreshed_at = marker, time.monotonic()
+        entry.rows, entry.refreshes = rows, entry.refreshes + 1
+        exec_time = round(time.perf_counter() - start_time, 3)
+        print(f"Mirrored '{entry.name}' ({rows} rows) in time: ({exec_time} sec)")
+        return rows
+
+    def __load_query(self, entry: MirrorEntry, loading_name: str) -> int:
+        """Copies the result of the entry's query into the mirror table `loading_name`"""
+        if entry.parameters is None:
+            self.__source.execute(entry.source_query)
+        else:
+            self.__source.execute(entry.source_query, entry.parameters)
+        quoted_names = [f'"{column[0]}"' for column in self.__source.description]
+        # SQLite columns without a declared type keep every value as it was read
+        self.__cursor.execute(f"CREATE TABLE {loading_name} "
+                              f"({', '.join(quoted_names)});")
+        rows = 0
+        while chunk := self.__source.fetchmany(self.__chunk_size):
+            TableCopy.bulk_insert(loading_name, quoted_names, chunk, self.__cursor)
+            rows += len(chunk)
+        self.__connection.commit()
+        return rows
@@ -0,0 +1,30 @@
+""" Regression checks of the SQLite schema dump order """
+
+import importlib
+import io
+import pathlib
+import sqlite3
+import sys
+
+PACKAGE_DIR = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PACKAGE_DIR.parent))
+SchemaDump = importlib.import_module(f"{PACKAGE_DIR.name}.schema_dump").SchemaDump
+
+
+def test_sqlite_views_follow_the_views_they_select_from():
+    """A view recreated after a view that selects from it is still dumped first"""
+    connection = sqlite3.connect(":memory:")
+    connection.executescript("""
+        CREATE TABLE tbl_orders (order_id INTEGER PRIMARY KEY, total_amount REAL);
+        CREATE VIEW v1 AS SELECT order_id FROM tbl_orders;
+        CREATE VIEW "V2" AS SELECT order_id FROM V1 WHERE order_id > 10;
+        DROP VIEW v1;
+        CREATE VIEW v1 AS SELECT order_id, total_amount FROM tbl_orders;""")
+    sink = io.StringIO()
+    SchemaDump.dump_schema(connection.cursor(), sink)
+    dump = sink.getvalue()
+    assert dump.index("CREATE VIEW v1") < dump.index('CREATE VIEW "V2"')
+
+    restored = sqlite3.connect(":memory:")
+    restored.executescript(dump)
+    assert restored.execute('SELECT COUNT(*) FROM "V2";').fetchone() == (0,)
@@ -0,0 +1,50 @@
+""" Regression checks of the query routing of the SQLite table mirror """
+
+import importlib
+import pathlib
+import sqlite3
+import sys
+
+PACKAGE_DIR = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PACKAGE_DIR.parent))
+TableMirror = importlib.import_module(f"{PACKAGE_DIR.name}.table_mirror").TableMirror
+Constants = importlib.import_module(f"{PACKAGE_DIR.name}.constants").Constants
+
+
+def mirror_of_orders() -> TableMirror:
+    """A mirror of tbl_orders, read from a SQLite source that also has tbl_customers"""
+    source = sqlite3.connect(":memory:")
+    source.executescript("""
+        CREATE TABLE tbl_orders (order_id INTEGER PRIMARY KEY, customer_id INTEGER);
+        CREATE TABLE tbl_customers (customer_id INTEGER PRIMARY KEY, country TEXT);
+        INSERT INTO tbl_orders VALUES (1, 1);
+        INSERT INTO tbl_customers VALUES (1, 'NL');""")
+    mirror = TableMirror(source.cursor(), max_age=None)
+    mirror.mirror_table("tbl_orders")
+    return mirror
+
+
+def test_comma_joins_need_every_table_mirrored():
+    """A table listed after a comma in a FROM clause keeps the query on the source"""
+    mirror = mirror_of_orders()
+    assert mirror.routes_to_mirror("SELECT * FROM tbl_orders o WHERE o.order_id IN (1, 2);")
+    assert not mirror.routes_to_mirror("SELECT * FROM tbl_orders, tbl_customers;")
+    assert not mirror.routes_to_mirror(
+        "SELECT * FROM tbl_orders o JOIN tbl_orders p ON o.order_id = p.order_id, "
+        "tbl_customers c WHERE c.customer_id = o.customer_id;")
+    assert not mirror.routes_to_mirror(
+        "SELECT * FROM (SELECT order_id FROM tbl_orders) o, tbl_customers;")
+
+
+def test_placeholders_inside_literals_stay_text():
+    """Only placeholders outside quoted literals are rewritten for the mirror"""
+    query = "SELECT '%s' AS pattern, 'it''s 100%%' AS label, order_id FROM tbl_orders " \
+            "WHERE order_id = %s;"
+    mirror_query = TableMirror.to_sqlite_placeholders(query)
+    assert mirror_query == "SELECT '%s' AS pattern, 'it''s 100%' AS label, order_id " \
+                           "FROM tbl_orders WHERE order_id = ?;"
+    assert mirror_of_orders().cursor.execute(mirror_query, (1,)).fetchall() == \
+        [("%s", "it's 100%", 1)]
+    assert TableMirror.to_sqlite_placeholders(r"SELECT 'it\'s %s', %s;",
+                                              Constants.MYSQL) == \
+        r"SELECT 'it\'s %s', ?;"